@@ -0,0 +1 @@
+"""Offline benchmarks for the BWEE home integration."""
@@ -0,0 +1,666 @@
+"""End-to-end load and soak harness for DeviceManager against the simulator.
+
+Measures startup time (``init_devices`` until the MQTT subscription is live),
+command-to-state latency (``async_turn_on`` until the entity writes the new
+state), pairing (a ``res/device/add`` burst until every entity is registered)
+and sustained MQTT throughput (``res/light/update`` messages applied per
+second, and the state writes they turn into).  Requires Home Assistant to be importable.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_gateway --devices 5000 --commands 200
+    python -m benchmarks.bench_gateway --devices 1000 --soak 600 \\
+        --event-rate 100 --error-rate 0.05 --disconnect-interval 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from functools import partial
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from . import harness  # noqa: F401  必须先导入，设置 sys.path
+from .gateway_simulator import GatewaySimulator, SimulatorConfig
+from .payloads import make_device
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def describe(name: str, values: list[float]) -> str:
+    """Summarize latencies in milliseconds."""
+    if not values:
+        return f"{name}: no samples"
+    return (
+        f"{name}: n={len(values)} "
+        f"mean={statistics.fmean(values) * 1000:.1f}ms "
+        f"p50={percentile(values, 50) * 1000:.1f}ms "
+        f"p95={percentile(values, 95) * 1000:.1f}ms "
+        f"p99={percentile(values, 99) * 1000:.1f}ms"
+    )
+
+
+async def monitor_loop_lag(lags: list[float], interval: float = 0.001) -> None:
+    """Record how late each short sleep wakes up, i.e. how long the loop was blocked."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+@dataclass
+class WriteRecorder:
+    """Stands in for the entity platform and records state writes."""
+
+    writes: int = 0
+    removed: int = 0
+    last: dict[object, object] = field(default_factory=dict)  # 实体 -> 最后写入的亮度
+    waiters: list[tuple[object, object, asyncio.Future]] = field(default_factory=list)
+    written: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def attach(self, entity) -> None:
+        """Route the entity's state writes and removal to the recorder."""
+
+        def write_state() -> None:
+            self.writes += 1
+            self.last[entity] = entity.brightness
+            self.written.set()
+            for waiter in list(self.waiters):
+                waiter_entity, predicate, future = waiter
+                if waiter_entity is entity and predicate() and not future.done():
+                    future.set_result(time.perf_counter())
+                    self.waiters.remove(waiter)
+
+        async def remove() -> None:
+            """Nothing to unregister outside Home Assistant."""
+            self.removed += 1
+
+        entity.async_write_ha_state = write_state
+        entity.async_remove = remove
+
+    def wait_for(self, entity, predicate) -> asyncio.Future:
+        """Resolve with the time of the first write on entity where predicate holds."""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((entity, predicate, future))
+        return future
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the load phases."""
+    from custom_components.bwee_home.bweetech import API
+    from custom_components.bwee_home.const import DOMAIN
+    from custom_components.bwee_home import light as light_platform
+    from custom_components.bwee_home.bweetech.adaptive import (
+        AdaptiveEngine,
+        AdaptiveProfile,
+    )
+    from custom_components.bwee_home.bweetech.enums import RequestPriority
+    from custom_components.bwee_home.bweetech.heartbeat import HeartbeatMonitor
+    from custom_components.bwee_home.bweetech.profiler import PROFILER
+    from custom_components.bwee_home.bweetech.write_limiter import StateWriteLimiter
+    from custom_components.bwee_home.light import DeviceManager
+    from homeassistant.components.light import ColorMode
+    from homeassistant.util.color import brightness_to_value, value_to_brightness
+
+    def expected_brightness(brightness: int) -> int:
+        """Brightness the entity reports once the gateway applied the command."""
+        value = int(brightness_to_value((1, 100), brightness))
+        return value_to_brightness((1, 100), value)
+
+    config = SimulatorConfig(
+        devices=args.devices,
+        channels=args.channels,
+        http_port=args.http_port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        echo_latency=args.echo_latency,
+        error_rate=args.error_rate,
+        event_rate=0,
+        disconnect_interval=0,
+    )
+    simulator = GatewaySimulator(config)
+    await simulator.start()
+
+    hass = SimpleNamespace(data={DOMAIN: {"devices": {}, "lights": {}, "entities": {}}})
+    recorder = WriteRecorder()
+    entities = []
+    add_calls = 0
+
+    def add_entities(new_entities) -> None:
+        nonlocal add_calls
+        add_calls += 1
+        for entity in new_entities:
+            entity.hass = hass
+            recorder.attach(entity)
+            entities.append(entity)
+
+    API.init_gateway_info(config.host, config.api_key, port=config.http_port)
+    API.hedge_reads = bool(args.hedge)
+    if args.decode_threshold is not None:
+        API.init_decode_pool(args.decode_threshold, args.decode_workers)
+    await API.init_session()
+
+    # 控制指令走 MQTT，未回显时回退到 HTTP
+    light_platform.MQTT_COMMAND_ENABLED = args.mqtt_commands
+
+    # 启动耗时
+    if args.trace_memory:
+        tracemalloc.start()
+    def behind() -> int:
+        """Lights whose stored brightness differs from the gateway's."""
+        lights = hass.data[DOMAIN]["lights"]
+        return sum(
+            light_id in lights
+            and lights[light_id].brightness != light["brightness"]
+            for light_id, light in simulator.lights.items()
+        )
+
+    async def churn() -> None:
+        """Change lights on the gateway while the integration starts."""
+        while True:
+            simulator.random_light_update()
+            await asyncio.sleep(args.startup_event_interval)
+
+    if args.profile:
+        PROFILER.start()
+    lags: list[float] = []
+    lag_monitor = asyncio.create_task(monitor_loop_lag(lags))
+    churn_task = (
+        asyncio.create_task(churn()) if args.startup_event_interval > 0 else None
+    )
+    start = time.perf_counter()
+    manager = DeviceManager(hass, add_entities, config.host)
+    if args.write_rate is not None:
+        manager.state_writes = StateWriteLimiter(args.write_rate)
+    if args.adaptive_ticks > 0:
+        # 固定在下午一点，每次运行的目标相同
+        manager.adaptive = AdaptiveEngine(
+            lambda: hass.data[DOMAIN]["lights"],
+            partial(manager.send_frames, priority=RequestPriority.BULK),
+            interval=args.adaptive_interval,
+            hour=lambda: 13.0,
+        )
+    if args.heartbeat_timeout > 0:
+        manager.heartbeats = HeartbeatMonitor(
+            manager.on_devices_silent, timeout=args.heartbeat_timeout
+        )
+    await manager.init_devices()
+    await asyncio.wait_for(
+        simulator.broker.wait_subscribed("res/light/update"), 30
+    )
+    startup = time.perf_counter() - start
+    lag_monitor.cancel()
+    print(f"startup: {startup * 1000:.1f}ms for {len(entities)} entities")
+    if churn_task:
+        churn_task.cancel()
+        await asyncio.sleep(0.2)
+        print(
+            f"startup_events: {manager.early_events_replayed} replayed, "
+            f"{behind()} lights out of sync with the gateway"
+        )
+    # 模拟器与集成共用事件循环，阻塞中也包含模拟器生成响应的时间
+    decode = API.latency_as_dict()["decode"]
+    print(
+        f"startup_loop: max blocked {max(lags, default=0) * 1000:.1f}ms, "
+        f"decode on loop {decode['loop_total_ms']}ms "
+        f"(longest {decode['loop']['max_ms']}ms), "
+        f"{decode['offloaded']} decode steps offloaded"
+    )
+    if args.trace_memory:
+        # 包含模拟器在同一进程内的分配
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"startup_memory: peak {peak / 1024 / 1024:.1f}MiB, "
+            f"retained {current / 1024 / 1024:.1f}MiB"
+        )
+
+    # 指令到状态的延迟
+    requests_before = simulator.requests
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(args.commands):
+        entity = rng.choice(entities)
+        brightness = rng.randint(1, 255)
+
+        def applied(entity=entity, expected=expected_brightness(brightness)) -> bool:
+            return entity.brightness == expected
+
+        if applied():
+            continue
+        waiter = recorder.wait_for(entity, applied)
+        sent = time.perf_counter()
+        await entity.async_turn_on(brightness=brightness)
+        try:
+            latencies.append(await asyncio.wait_for(waiter, 10) - sent)
+        except TimeoutError:
+            print(f"command timed out for {entity.unique_id}", file=sys.stderr)
+    print(describe("command_to_state", latencies))
+    if args.mqtt_commands:
+        print(
+            f"mqtt_commands: {simulator.commands} received by the gateway, "
+            f"{simulator.requests - requests_before} HTTP requests"
+        )
+    await asyncio.sleep(args.echo_latency + 0.1)
+    print(f"diagnostics: {manager.diagnostics()}")
+
+    # 批量配对：res/device/add 不带 ext_light，需要逐个查询
+    if args.pair > 0:
+        rng_pair = random.Random(1)
+        new_devices = [
+            make_device(args.devices + index, rng_pair, args.channels)
+            for index in range(args.pair)
+        ]
+        expected = len(entities) + args.pair * args.channels
+        add_calls = 0
+        requests = simulator.requests
+        collapsed = API.collapsed
+        start = time.perf_counter()
+        # 同一设备的新增事件可能重复到达
+        for _ in range(args.pair_repeat):
+            simulator.publish_device_add(new_devices, with_lights=False)
+        deadline = time.monotonic() + 30
+        while len(entities) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        print(
+            f"pairing: {len(entities) - expected + args.pair * args.channels}/"
+            f"{args.pair * args.channels} entities "
+            f"in {elapsed * 1000:.1f}ms, {simulator.requests - requests} requests, "
+            f"{add_calls} add_entities calls, "
+            f"{API.collapsed - collapsed} requests collapsed"
+        )
+
+    # 读请求的尾延迟（自适应超时与对冲请求）
+    if args.reads > 0:
+        from custom_components.bwee_home.bweetech.light import get_lights
+        from custom_components.bwee_home.bweetech.resource_cache import (
+            RESOURCE_CACHE,
+        )
+
+        simulator.config.stall_rate = args.stall_rate
+        device_ids = list(simulator.devices)
+        read_latencies = []
+        failures = 0
+        stalls = simulator.stalls
+        for _ in range(args.reads):
+            start = time.perf_counter()
+            res = await get_lights(rng.choice(device_ids), use_cache=args.read_cache)
+            read_latencies.append(time.perf_counter() - start)
+            failures += not res.is_ok()
+        simulator.config.stall_rate = 0.0
+        print(describe("get_lights", read_latencies))
+        print(
+            f"reads: {failures} failed, {simulator.stalls - stalls} stalled, "
+            f"{API.hedged} hedged, {API.hedge_wins} won by the hedge"
+        )
+        if args.read_cache:
+            print(f"cache: {RESOURCE_CACHE.as_dict()}")
+
+    # MQTT 吞吐
+    light_ids = list(simulator.lights)
+
+    recorder.writes = 0
+    start = time.perf_counter()
+    for index in range(args.messages):
+        simulator.random_light_update()
+        if index % 100 == 0:
+            await asyncio.sleep(0)
+    deadline = time.monotonic() + 60
+    while behind() and time.monotonic() < deadline:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    print(
+        f"mqtt_throughput: {args.messages} updates applied in {elapsed:.2f}s "
+        f"({args.messages / elapsed:.0f} msg/s, {len(light_ids)} lights, "
+        f"{behind()} behind)"
+    )
+    # 等待限频后的延迟写入，每个实体最后写入的应是最终状态
+    deadline = time.monotonic() + 10
+    while manager.state_writes.as_dict()["pending"] and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    stale = sum(
+        entity in recorder.last and recorder.last[entity] != entity.brightness
+        for entity in entities
+    )
+    print(
+        f"state_writes: {recorder.writes} writes for {args.messages} updates, "
+        f"{stale} entities left stale, {manager.state_writes.as_dict()}"
+    )
+
+    # 自适应照明：第一次整批发送，之后只发送偏离目标的灯
+    if args.adaptive_ticks > 0:
+        adaptive = manager.adaptive
+        requests = simulator.requests
+        start = time.perf_counter()
+        enrolled = manager.enable_adaptive(None, AdaptiveProfile())
+        dispatched = []
+        for tick in range(1, args.adaptive_ticks + 1):
+            while adaptive.ticks < tick:
+                await asyncio.sleep(0.01)
+            dispatched.append(adaptive.dispatched - sum(dispatched))
+            # 模拟手动调整：下一次计算应跳过这些灯
+            if tick == 1:
+                adaptable = [
+                    entity
+                    for entity in entities
+                    if ColorMode.COLOR_TEMP in entity.supported_color_modes
+                ]
+                for entity in adaptable[:5]:
+                    await entity.async_turn_on(brightness=10)
+                # 厂商 App 或墙面开关的调整只通过网关推送得知
+                for entity in adaptable[5:10]:
+                    simulator.publish_light_update(entity._light_id, {"brightness": 10})
+        elapsed = time.perf_counter() - start
+        print(
+            f"adaptive: {enrolled} lights enrolled, {args.adaptive_ticks} ticks "
+            f"in {elapsed:.2f}s, dispatched per tick {dispatched}, "
+            f"{simulator.requests - requests} requests, {adaptive.as_dict()}"
+        )
+        manager.disable_adaptive(None)
+
+    # 刷新：MQTT 断线期间网关侧发生变化，重连后重新拉取，只应触及变化的设备
+    if args.refresh_changes > 0:
+        count = args.refresh_changes
+        rng_refresh = random.Random(2)
+        picked = rng_refresh.sample(list(simulator.devices), 3 * count)
+        for device_id in picked[:count]:
+            simulator.devices[device_id]["name"] += " (renamed)"
+        for device_id in picked[count : 2 * count]:
+            simulator.remove_device(device_id)
+        for device_id in picked[2 * count :]:
+            light = simulator.devices[device_id]["ext_light"][0]
+            light["brightness"] = light["brightness"] % 100 + 1
+        for index in range(count):
+            simulator.add_device(
+                make_device(
+                    args.devices + args.pair + index, rng_refresh, args.channels
+                )
+            )
+        writes, removed = recorder.writes, recorder.removed
+        add_calls = 0
+        last_reconcile = manager.last_reconcile
+        start = time.perf_counter()
+        simulator.broker.drop_clients()
+        deadline = time.monotonic() + 30
+        while manager.last_reconcile is last_reconcile and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        while manager.state_writes.as_dict()["pending"] and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        print(
+            f"refresh after reconnect: {elapsed * 1000:.1f}ms, "
+            f"{manager.last_reconcile}, "
+            f"{recorder.writes - writes} state writes, "
+            f"{recorder.removed - removed} entities removed, "
+            f"{add_calls} add_entities calls, {behind()} lights behind"
+        )
+
+    # 渐变：大量灯同时渐变时不超过限速，用户指令插在渐变帧之前
+    if args.transition_lights > 0:
+        engine = manager.transition_engine
+        fading = entities[: args.transition_lights]
+        others = entities[args.transition_lights :][: args.transition_clicks]
+        requests, sent = simulator.requests, engine.frames_sent
+        start = time.perf_counter()
+        for entity in fading:
+            await entity.async_turn_on(brightness=255, transition=args.transition_time)
+        clicks = []
+        for entity in others:
+            await asyncio.sleep(args.transition_time / (len(others) + 1))
+            click = time.perf_counter()
+            await entity.async_turn_on(brightness=64)
+            clicks.append(time.perf_counter() - click)
+        while engine.as_dict()["active"]:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        print(describe("transition_clicks", clicks))
+        print(
+            f"transition: {len(fading)} lights faded over {args.transition_time}s "
+            f"in {elapsed:.2f}s, budget {manager.transition_budget()} frames/tick, "
+            f"{engine.frames_sent - sent} frames, "
+            f"{(simulator.requests - requests) / elapsed:.1f} requests/s"
+        )
+
+    # 网关短暂不可达：指令暂存并按灯合并，恢复后整批重发
+    if args.outage > 0:
+        outbox = manager.outbox
+        simulator.config.outage = True
+        rng_outage = random.Random(3)
+        targets = rng_outage.sample(entities, min(len(entities), args.outage_lights))
+        intents = {}
+        requests = simulator.requests
+        start = time.perf_counter()
+        for _ in range(args.outage_commands):
+            entity = rng_outage.choice(targets)
+            brightness = rng_outage.randint(1, 255)
+            intents[entity] = int(brightness_to_value((1, 100), brightness))
+            await entity.async_turn_on(brightness=brightness)
+        queued = time.perf_counter() - start
+        depth = outbox.as_dict()["depth"]
+        await asyncio.sleep(args.outage)
+        simulator.config.outage = False
+        # 只有 HTTP 中断，MQTT 保持连接：恢复后的下一条指令立即触发重发
+        start = time.perf_counter()
+        entity = next(entity for entity in entities if entity not in intents)
+        intents[entity] = int(brightness_to_value((1, 100), 128))
+        await entity.async_turn_on(brightness=128)
+        deadline = time.monotonic() + 30
+
+        def pending() -> int:
+            return sum(
+                simulator.lights[entity._light_id]["brightness"] != value
+                for entity, value in intents.items()
+            )
+
+        light = simulator.lights[entity._light_id]
+        while light["brightness"] != intents[entity] and time.monotonic() < deadline:
+            await asyncio.sleep(0.001)
+        clicked = time.perf_counter()
+        while (len(outbox) or pending()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        print(
+            f"outage: {args.outage_commands} commands to {len(intents) - 1} lights "
+            f"queued in {queued * 1000:.1f}ms (depth {depth}), next command applied "
+            f"in {(clicked - start) * 1000:.1f}ms, queue replayed "
+            f"{time.perf_counter() - start:.2f}s after it, {pending()} lights "
+            f"not applied, {simulator.requests - requests} requests, {outbox.as_dict()}"
+        )
+
+    # 心跳：部分设备断电后不再应答，超时探测后只有这些设备不可用
+    if args.heartbeat_timeout > 0:
+        device_ids = list(simulator.devices)
+        unplugged = device_ids[: max(1, len(device_ids) // 10)]
+        for device_id in unplugged:
+            simulator.devices.pop(device_id)
+        expected = sum(
+            entity._id in unplugged for entity in entities
+        )
+        requests = simulator.requests
+        start = time.perf_counter()
+        deadline = time.monotonic() + args.heartbeat_timeout * 3 + 10
+
+        def unavailable() -> int:
+            return sum(not entity.available for entity in entities)
+
+        while unavailable() < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        print(
+            f"heartbeat: {unavailable()}/{expected} unplugged entities unavailable "
+            f"after {elapsed:.2f}s (timeout {args.heartbeat_timeout}s), "
+            f"{simulator.requests - requests} probe requests, "
+            f"{manager.heartbeats.as_dict()}"
+        )
+
+    # 持续压测
+    if args.soak > 0:
+        simulator.config.event_rate = args.event_rate
+        simulator.config.disconnect_interval = args.disconnect_interval
+        simulator.start_traffic()
+        recorder.writes = 0
+        requests, errors = simulator.requests, simulator.errors
+        soak_latencies = []
+        timeouts = 0
+        end = time.monotonic() + args.soak
+        while time.monotonic() < end:
+            entity = rng.choice(entities)
+            brightness = rng.randint(1, 255)
+            waiter = recorder.wait_for(
+                entity,
+                lambda entity=entity, expected=expected_brightness(brightness): (
+                    entity.brightness == expected
+                ),
+            )
+            sent = time.perf_counter()
+            await entity.async_turn_on(brightness=brightness)
+            try:
+                soak_latencies.append(await asyncio.wait_for(waiter, 10) - sent)
+            except TimeoutError:
+                timeouts += 1
+            await asyncio.sleep(args.command_interval)
+        print(
+            f"soak: {args.soak}s, {recorder.writes} writes, "
+            f"{simulator.requests - requests} requests, "
+            f"{simulator.errors - errors} injected 400s, {timeouts} timeouts"
+        )
+        print(describe("soak_command_to_state", soak_latencies))
+        simulator.stop_traffic()
+
+    if args.profile:
+        report = PROFILER.stop()
+        with open(args.profile, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        for call in report["calls"][:5]:
+            print(
+                f"profile: {call['name']} n={call['count']} "
+                f"total={call['total_ms']}ms max={call['max_ms']}ms"
+            )
+        print(f"profile: written to {args.profile}")
+
+    await manager.close()
+    await API.close_session()
+    await simulator.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse options and run."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--channels", type=int, default=1, help="lights per device")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="report the tracemalloc peak during startup",
+    )
+    parser.add_argument(
+        "--mqtt-commands",
+        action="store_true",
+        help="send commands over MQTT, falling back to HTTP without an ack",
+    )
+    parser.add_argument("--reads", type=int, default=0, help="get_lights calls")
+    parser.add_argument(
+        "--read-cache",
+        action="store_true",
+        help="serve --reads through the resource cache",
+    )
+    parser.add_argument(
+        "--stall-rate",
+        type=float,
+        default=0.0,
+        help="share of requests the gateway never answers during --reads",
+    )
+    parser.add_argument("--hedge", type=int, default=1, help="hedge reads (0 or 1)")
+    parser.add_argument("--pair", type=int, default=30, help="devices paired at once")
+    parser.add_argument(
+        "--pair-repeat",
+        type=int,
+        default=1,
+        help="times each res/device/add is delivered",
+    )
+    parser.add_argument(
+        "--write-rate",
+        type=float,
+        help="state writes per entity per second (default: STATE_WRITE_MAX_RATE)",
+    )
+    parser.add_argument(
+        "--decode-threshold",
+        type=int,
+        help="bytes from which responses decode off the loop (0: always inline)",
+    )
+    parser.add_argument("--decode-workers", type=int, default=1)
+    parser.add_argument(
+        "--startup-event-interval",
+        type=float,
+        default=0.0,
+        help="seconds between light changes published during startup",
+    )
+    parser.add_argument(
+        "--adaptive-ticks",
+        type=int,
+        default=0,
+        help="adaptive lighting ticks to run on every light (0: skip phase)",
+    )
+    parser.add_argument("--adaptive-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--refresh-changes",
+        type=int,
+        default=0,
+        help="devices renamed, removed, dimmed and added while MQTT is down",
+    )
+    parser.add_argument(
+        "--transition-lights",
+        type=int,
+        default=0,
+        help="lights faded at once while other lights are clicked (0: skip phase)",
+    )
+    parser.add_argument("--transition-time", type=float, default=5.0)
+    parser.add_argument("--transition-clicks", type=int, default=20)
+    parser.add_argument(
+        "--outage",
+        type=float,
+        default=0.0,
+        help="seconds the gateway HTTP API is down while commands are sent",
+    )
+    parser.add_argument("--outage-commands", type=int, default=200)
+    parser.add_argument("--outage-lights", type=int, default=50)
+    parser.add_argument(
+        "--heartbeat-timeout",
+        type=float,
+        default=0.0,
+        help="seconds without events before a device is probed (0: skip phase)",
+    )
+    parser.add_argument(
+        "--profile", help="profile every phase and write the report to this file"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--echo-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--soak", type=float, default=0.0, help="soak seconds")
+    parser.add_argument("--event-rate", type=float, default=50.0)
+    parser.add_argument("--disconnect-interval", type=float, default=0.0)
+    parser.add_argument("--command-interval", type=float, default=0.5)
+    asyncio.run(run(parser.parse_args(argv)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Import-time benchmark and budget check for the integration package.
+
+Each run starts a fresh interpreter, preloads what Home Assistant core has
+already imported at boot, then times ``import custom_components.bwee_home``.
+The check fails (exit status 1) when the median exceeds ``--budget-ms`` or
+when the package import pulls in a module that should only load with its
+platform or config flow.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --budget-ms 50 --runs 9
+    python -m benchmarks.bench_import --importtime   # per-module breakdown
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+REPO_PATH = Path(__file__).resolve().parent.parent
+PACKAGE = "custom_components.bwee_home"
+
+# Home Assistant 启动时已经加载的模块，不计入集成的导入耗时
+PRELOAD = (
+    "aiohttp",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.const",
+    "homeassistant.helpers.config_validation",
+)
+
+# 导入集成包时不应加载的模块
+FORBIDDEN = (
+    f"{PACKAGE}.light",
+    f"{PACKAGE}.config_flow",
+    # 服务处理函数按需加载
+    f"{PACKAGE}.bweetech.adaptive",
+    f"{PACKAGE}.bweetech.models",
+    "tracemalloc",
+    "paho",
+    "ping3",
+)
+
+DEFAULT_BUDGET_MS = 50.0
+
+_PROBE = """
+import json, sys, time
+for name in {preload!r}:
+    __import__(name)
+before = set(sys.modules)
+start = time.perf_counter()
+import {package}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def probe(importtime: bool = False) -> dict:
+    """Time one import of the package in a fresh interpreter."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE.format(preload=PRELOAD, package=PACKAGE)]
+    completed = subprocess.run(
+        command, cwd=REPO_PATH, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if importtime:
+        result["importtime"] = completed.stderr
+    return result
+
+
+def forbidden_modules(modules: list[str]) -> list[str]:
+    """Return the loaded modules that belong to a forbidden package."""
+    return [
+        module
+        for module in modules
+        if any(module == name or module.startswith(f"{name}.") for name in FORBIDDEN)
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark and the budget check."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="print the -X importtime lines of the newly loaded modules",
+    )
+    args = parser.parse_args(argv)
+
+    results = [probe() for _ in range(args.runs)]
+    timings = [result["ms"] for result in results]
+    median = statistics.median(timings)
+    modules = results[-1]["modules"]
+    print(
+        f"import {PACKAGE}: median {median:.1f}ms, "
+        f"min {min(timings):.1f}ms, max {max(timings):.1f}ms, "
+        f"{len(modules)} new modules"
+    )
+
+    if args.importtime:
+        lines = probe(importtime=True)["importtime"].splitlines()
+        new = set(modules)
+        for line in lines:
+            name = line.rsplit("|", 1)[-1].strip()
+            if name in new:
+                print(line)
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median {median:.1f}ms exceeds budget {args.budget_ms}ms")
+    failures.extend(f"unexpected import: {module}" for module in forbidden_modules(modules))
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
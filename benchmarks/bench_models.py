@@ -0,0 +1,358 @@
+"""Micro-benchmarks for the codec, model and capability layers.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_models
+    python -m benchmarks.bench_models --save baseline.json
+    python -m benchmarks.bench_models --baseline baseline.json --threshold 0.2
+
+With ``--baseline`` the process exits with status 1 when any benchmark is
+slower, or peaks higher, than the baseline by more than ``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import json
+import random
+import sys
+from types import SimpleNamespace
+
+from . import harness  # 必须先导入，设置 sys.path
+from .harness import (
+    BenchResult,
+    find_regressions,
+    format_results,
+    load_results,
+    measure,
+    save_results,
+)
+from .payloads import make_devices, make_light_update_json, make_result_json
+
+from bweetech.adaptive import AdaptiveEngine, AdaptiveProfile
+from bweetech.api_models import parse_result
+from bweetech.const import STREAM_CHUNK_SIZE
+from bweetech.enums import DeviceSupport
+from bweetech.forms import ControlForm
+from bweetech.interning import ModelInterner
+from bweetech.models import Device, LightUpdatePayload
+from bweetech.patch import DEVICE_PATCHER, LIGHT_PATCHER
+from bweetech.utils import dataclass_to_dict, dict_to_bean, json_to_bean
+from bweetech.utils import color_utils, light_utils
+from bweetech.utils.json_stream import ArrayStreamDecoder
+from bweetech.utils.timer_wheel import TimerWheel
+
+DEFAULT_SIZES = (10, 1000, 10000)
+
+
+def stream_decode(body: bytes) -> list[Device]:
+    """Decode a device list the way ApiClient does with stream=True."""
+    decoder = ArrayStreamDecoder()
+    devices = []
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        chunk = body[start : start + STREAM_CHUNK_SIZE]
+        devices.extend(dict_to_bean(item, Device) for item in decoder.feed(chunk))
+    _, tail = decoder.close()
+    devices.extend(dict_to_bean(item, Device) for item in tail)
+    return devices
+
+
+def bench_codec(size: int) -> list[BenchResult]:
+    """Benchmark json_to_bean, parse_result and dataclass_to_dict."""
+    result_json = make_result_json(size)
+    result_bytes = result_json.encode()
+    devices_json = json.dumps(make_devices(size))
+    update_json = make_light_update_json(size)
+    devices = json_to_bean(devices_json, list[Device])
+    forms = [
+        ControlForm(on=1, brightness=index % 100 + 1, color_cw=4000)
+        for index in range(size)
+    ]
+    return [
+        measure(
+            "json_to_bean[list[Device]]",
+            size,
+            lambda: json_to_bean(devices_json, list[Device]),
+        ),
+        measure(
+            "json_to_bean[LightUpdatePayload]",
+            size,
+            lambda: json_to_bean(update_json, list[LightUpdatePayload]),
+        ),
+        measure("parse_result[Device]", size, lambda: parse_result(result_json, Device)),
+        measure("stream_decode[Device]", size, lambda: stream_decode(result_bytes)),
+        measure(
+            "dataclass_to_dict[Device]",
+            size,
+            lambda: [dataclass_to_dict(device) for device in devices],
+        ),
+        measure(
+            "dataclass_to_dict[ControlForm]",
+            size,
+            lambda: [dataclass_to_dict(form) for form in forms],
+        ),
+    ]
+
+
+def bench_interning(size: int) -> list[BenchResult]:
+    """Benchmark decoding with and without shared Room/Product instances."""
+    devices_json = json.dumps(make_devices(size))
+    return [
+        measure(
+            "decode[Device]",
+            size,
+            lambda: json_to_bean(devices_json, list[Device]),
+        ),
+        measure(
+            "decode_interned[Device]",
+            size,
+            lambda: ModelInterner().intern_devices(
+                json_to_bean(devices_json, list[Device])
+            ),
+        ),
+    ]
+
+
+def interning_savings(results: list[BenchResult]) -> list[str]:
+    """Describe the retained memory saved by interning, per size."""
+    plain = {r.size: r for r in results if r.name == "decode[Device]"}
+    lines = []
+    for result in results:
+        base = plain.get(result.size)
+        if result.name != "decode_interned[Device]" or not base:
+            continue
+        saved = base.retained_bytes - result.retained_bytes
+        lines.append(
+            f"interning[{result.size}]: retained {base.retained_bytes / 1024:.1f} -> "
+            f"{result.retained_bytes / 1024:.1f} KiB "
+            f"(-{saved / max(base.retained_bytes, 1):.0%})"
+        )
+    return lines
+
+
+def bench_patch(size: int) -> list[BenchResult]:
+    """Benchmark applying update payloads to stored models."""
+    devices = json_to_bean(json.dumps(make_devices(size)), list[Device])
+    lights = [device.ext_light[0] for device in devices]
+    updates = json_to_bean(make_light_update_json(size), list[LightUpdatePayload])
+    values = [update.value for update in updates]
+    device_values = [
+        {"name": f"Renamed {index}", "online": "1", "has_new": index % 2}
+        for index in range(size)
+    ]
+    return [
+        measure(
+            "LIGHT_PATCHER.apply[LightUpdateValue]",
+            size,
+            lambda: [LIGHT_PATCHER.apply(l, v) for l, v in zip(lights, values)],
+        ),
+        measure(
+            "DEVICE_PATCHER.apply[dict]",
+            size,
+            lambda: [
+                DEVICE_PATCHER.apply(d, v) for d, v in zip(devices, device_values)
+            ],
+        ),
+    ]
+
+
+def bench_timer_wheel(size: int) -> list[BenchResult]:
+    """Benchmark heartbeat deadlines on the timer wheel."""
+    keys = [f"device-{index}" for index in range(size)]
+    rng = random.Random(0)
+    deadlines = [300 + rng.random() * 10 for _ in range(size)]
+    wheel = TimerWheel(1.0, 512, now=0)
+    for key, deadline in zip(keys, deadlines):
+        wheel.schedule(key, deadline)
+
+    def expire_all() -> list:
+        expiring = TimerWheel(1.0, 512, now=0)
+        for key, deadline in zip(keys, deadlines):
+            expiring.schedule(key, deadline)
+        return expiring.advance(320)
+
+    return [
+        measure(
+            "TimerWheel.schedule[seen]",
+            size,
+            lambda: [wheel.schedule(k, d) for k, d in zip(keys, deadlines)],
+        ),
+        measure("TimerWheel.schedule+advance[expire all]", size, expire_all),
+    ]
+
+
+def bench_adaptive(size: int) -> list[BenchResult]:
+    """Benchmark one adaptive lighting tick over every light."""
+    devices = json_to_bean(json.dumps(make_devices(size)), list[Device])
+    lights = {device.ext_light[0].id: device.ext_light[0] for device in devices}
+    for light in lights.values():
+        light.on = 1
+
+    async def send(_) -> None:
+        pass
+
+    engine = AdaptiveEngine(lambda: lights, send, hour=lambda: 13.0)
+
+    async def enroll() -> None:
+        # 只登记，退出时取消后台节拍
+        engine.enable(lights, AdaptiveProfile())
+
+    asyncio.run(enroll())
+    return [measure("AdaptiveEngine.next_batch", size, engine.next_batch)]
+
+
+def bench_capability(size: int) -> list[BenchResult]:
+    """Benchmark DeviceSupport.of_gp_id and the light_utils checks."""
+    devices = json_to_bean(json.dumps(make_devices(size)), list[Device])
+    gp_ids = [device.product.cat3_id for device in devices]
+    abilities = [device.ext_light[0].ability for device in devices]
+    checks = (
+        light_utils.is_support_power,
+        light_utils.is_support_bright,
+        light_utils.is_support_cw,
+        light_utils.is_support_color,
+        light_utils.is_support_segment,
+    )
+    return [
+        measure(
+            "DeviceSupport.of_gp_id",
+            size,
+            lambda: [DeviceSupport.of_gp_id(gp_id=gp_id) for gp_id in gp_ids],
+        ),
+        measure(
+            "light_utils.is_support_*",
+            size,
+            lambda: [check(ability) for ability in abilities for check in checks],
+        ),
+    ]
+
+
+def bench_color(size: int) -> list[BenchResult]:
+    """Benchmark the color engine on segment arrays."""
+    rng = random.Random(size)
+    colors = [tuple(rng.randint(0, 255) for _ in range(3)) for _ in range(size)]
+    hs_colors = [(rng.uniform(0, 360), rng.uniform(0, 100)) for _ in range(size)]
+    color_arr = color_utils.rgb_list_to_color_arr(colors)
+    return [
+        measure(
+            "color_utils.rgb_list_to_color_arr",
+            size,
+            lambda: color_utils.rgb_list_to_color_arr(colors),
+        ),
+        measure(
+            "color_utils.hs_to_xy16",
+            size,
+            lambda: [color_utils.hs_to_xy16(*hs) for hs in hs_colors],
+        ),
+        measure(
+            "color_utils.color_arr_to_rgb_list",
+            size,
+            lambda: color_utils.color_arr_to_rgb_list(color_arr),
+        ),
+    ]
+
+
+def _light_entity_bench() -> Callable[[int], list[BenchResult]] | None:
+    """Return the BweeLight benchmark, or None without Home Assistant."""
+    try:
+        from custom_components.bwee_home.const import DOMAIN
+        from custom_components.bwee_home.light import BweeLight
+    except ImportError as e:
+        print(f"Skipping BweeLight property reads: {e}", file=sys.stderr)
+        return None
+
+    def bench_light_entity(size: int) -> list[BenchResult]:
+        devices = json_to_bean(json.dumps(make_devices(size)), list[Device])
+        hass = SimpleNamespace(
+            data={
+                DOMAIN: {
+                    "devices": {d.id: d for d in devices},
+                    "lights": {l.id: l for d in devices for l in d.ext_light},
+                }
+            }
+        )
+        lights = []
+        for device in devices:
+            light = BweeLight(device, device.ext_light[0])
+            light.hass = hass
+            lights.append(light)
+
+        def read_all() -> list:
+            return [
+                (
+                    light.supported_color_modes,
+                    light.color_mode,
+                    light.name,
+                    light.available,
+                    light.is_on,
+                    light.brightness,
+                    light.color_temp_kelvin,
+                    light.xy_color,
+                )
+                for light in lights
+            ]
+
+        return [measure("BweeLight properties", size, read_all)]
+
+    return bench_light_entity
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma separated device counts",
+    )
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--save", help="write the results to this baseline file")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed relative regression before failing",
+    )
+    args = parser.parse_args(argv)
+    harness.MIN_TIME = args.min_time
+
+    suites = [
+        bench_codec,
+        bench_interning,
+        bench_patch,
+        bench_timer_wheel,
+        bench_adaptive,
+        bench_capability,
+        bench_color,
+    ]
+    light_entity = _light_entity_bench()
+    if light_entity:
+        suites.append(light_entity)
+
+    results: list[BenchResult] = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        for suite in suites:
+            results.extend(suite(size))
+
+    print(format_results(results))
+    for line in interning_savings(results):
+        print(line)
+    if args.save:
+        save_results(args.save, results)
+    if args.baseline:
+        regressions = find_regressions(
+            results, load_results(args.baseline), args.threshold
+        )
+        if regressions:
+            print("\nRegressions:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
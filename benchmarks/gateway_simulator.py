@@ -0,0 +1,598 @@
+"""Local BWEE gateway simulator for end-to-end load and soak tests.
+
+The simulator serves the ``/api`` and ``/clip/v2/resource/*`` HTTP endpoints
+with aiohttp and runs a small MQTT 3.1.1 broker stand-in that publishes the
+``res/device/*`` and ``res/light/update`` topics.  Latency, 400 responses,
+client disconnects and background event rates are configurable.
+
+Run it standalone (from the repository root)::
+
+    python -m benchmarks.gateway_simulator --devices 2000 --event-rate 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import json
+import logging
+import random
+import struct
+import time
+
+from aiohttp import web
+
+from .payloads import make_device
+
+_LOGGER = logging.getLogger(__name__)
+
+# 客户端发布控制指令的主题，与 bweetech.const.MQTT_COMMAND_TOPIC 一致
+COMMAND_TOPIC = "req/light/update"
+
+# MQTT 控制报文类型
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+@dataclass
+class SimulatorConfig:
+    """Simulator settings."""
+
+    host: str = "127.0.0.1"
+    http_port: int = 8080
+    mqtt_port: int = 1883
+    devices: int = 100  # 设备数量
+    channels: int = 1  # 每个设备的灯光通道数
+    api_key: str = "simulator-key"
+    latency: float = 0.0  # HTTP 平均延迟（秒）
+    latency_jitter: float = 0.0  # HTTP 延迟抖动（秒）
+    echo_latency: float = 0.0  # 控制后推送 res/light/update 的延迟（秒）
+    error_rate: float = 0.0  # 返回 400 的比例
+    stall_rate: float = 0.0  # 请求卡住不返回（模拟丢包）的比例
+    stall_time: float = 30.0  # 卡住的时长（秒）
+    event_rate: float = 0.0  # 每秒后台推送的灯光更新数
+    disconnect_interval: float = 0.0  # 定期断开 MQTT 客户端的间隔（秒）
+    link_pressed: bool = True  # /api 授权时网关按键是否已按下
+    compress: bool = True  # 客户端支持时压缩设备列表
+    mqtt_commands: bool = True  # 是否处理 MQTT 控制指令，关闭时模拟不支持的固件
+    outage: bool = False  # HTTP 接口不可用，全部返回 503
+    seed: int = 0
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """Match an MQTT topic against a subscription pattern with + and #."""
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(pattern_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts):
+            return False
+        if part not in ("+", topic_parts[index]):
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+
+def _encode_length(length: int) -> bytes:
+    """Encode the MQTT remaining length."""
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        encoded.append(byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _encode_string(value: str) -> bytes:
+    """Encode an MQTT UTF-8 string."""
+    data = value.encode()
+    return struct.pack("!H", len(data)) + data
+
+
+def _packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    """Build an MQTT packet."""
+    return bytes([packet_type << 4 | flags]) + _encode_length(len(body)) + body
+
+
+@dataclass
+class _MqttSession:
+    """One connected MQTT client."""
+
+    writer: asyncio.StreamWriter
+    subscriptions: set[str] = field(default_factory=set)
+
+
+class MqttBrokerStandIn:
+    """A minimal MQTT 3.1.1 broker, enough for the gateway topics."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Init broker."""
+        self._host = host
+        self._port = port
+        self._server: asyncio.AbstractServer | None = None
+        self._sessions: list[_MqttSession] = []
+        self._subscription_changed = asyncio.Event()
+        self.published = 0  # 已发送给客户端的消息数
+        self.received: list[tuple[str, bytes]] = []  # 客户端发布的消息
+        self.on_client_publish = None
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(
+            self._handle_client, self._host, self._port
+        )
+
+    async def stop(self) -> None:
+        """Stop the broker and drop every client."""
+        self.drop_clients()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def drop_clients(self) -> None:
+        """Close every client connection to simulate a network loss."""
+        for session in self._sessions:
+            session.writer.close()
+        self._sessions.clear()
+
+    def is_subscribed(self, topic: str) -> bool:
+        """Return True if any client would receive topic."""
+        return any(
+            topic_matches(sub, topic)
+            for session in self._sessions
+            for sub in session.subscriptions
+        )
+
+    async def wait_subscribed(self, topic: str) -> None:
+        """Wait until a client subscribes to a pattern matching topic."""
+        while not self.is_subscribed(topic):
+            self._subscription_changed.clear()
+            await self._subscription_changed.wait()
+
+    def publish(self, topic: str, payload: str | bytes) -> None:
+        """Publish a message to every matching subscriber with QoS 0."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        packet = _packet(PUBLISH, 0, _encode_string(topic) + payload)
+        for session in self._sessions:
+            if any(topic_matches(sub, topic) for sub in session.subscriptions):
+                session.writer.write(packet)
+                self.published += 1
+
+    async def _read_packet(
+        self, reader: asyncio.StreamReader
+    ) -> tuple[int, int, bytes]:
+        """Read one packet and return type, flags and body."""
+        header = await reader.readexactly(1)
+        length = 0
+        multiplier = 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        body = await reader.readexactly(length) if length else b""
+        return header[0] >> 4, header[0] & 0x0F, body
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one client connection."""
+        session = _MqttSession(writer)
+        self._sessions.append(session)
+        try:
+            while True:
+                packet_type, flags, body = await self._read_packet(reader)
+                if packet_type == CONNECT:
+                    writer.write(_packet(CONNACK, 0, b"\x00\x00"))
+                elif packet_type == SUBSCRIBE:
+                    self._handle_subscribe(session, body)
+                elif packet_type == UNSUBSCRIBE:
+                    writer.write(_packet(UNSUBACK, 0, body[:2]))
+                elif packet_type == PUBLISH:
+                    self._handle_publish(session, flags, body)
+                elif packet_type == PINGREQ:
+                    writer.write(_packet(PINGRESP, 0, b""))
+                elif packet_type == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            writer.close()
+
+    def _handle_subscribe(self, session: _MqttSession, body: bytes) -> None:
+        """Register subscriptions and answer with SUBACK."""
+        packet_id = body[:2]
+        offset = 2
+        granted = bytearray()
+        while offset < len(body):
+            (topic_len,) = struct.unpack_from("!H", body, offset)
+            offset += 2
+            topic = body[offset : offset + topic_len].decode()
+            offset += topic_len
+            qos = body[offset]
+            offset += 1
+            session.subscriptions.add(topic)
+            granted.append(min(qos, 1))
+        session.writer.write(_packet(SUBACK, 0, packet_id + bytes(granted)))
+        self._subscription_changed.set()
+
+    def _handle_publish(self, session: _MqttSession, flags: int, body: bytes) -> None:
+        """Accept a publish from a client."""
+        qos = (flags >> 1) & 0x03
+        (topic_len,) = struct.unpack_from("!H", body, 0)
+        topic = body[2 : 2 + topic_len].decode()
+        offset = 2 + topic_len
+        if qos:
+            session.writer.write(_packet(PUBACK, 0, body[offset : offset + 2]))
+            offset += 2
+        payload = body[offset:]
+        self.received.append((topic, payload))
+        if self.on_client_publish:
+            self.on_client_publish(topic, payload)
+
+
+class GatewaySimulator:
+    """Simulated BWEE bridge: HTTP API, MQTT broker and device state."""
+
+    def __init__(self, config: SimulatorConfig | None = None) -> None:
+        """Init simulator."""
+        self.config = config or SimulatorConfig()
+        self._rng = random.Random(self.config.seed)
+        self.devices: dict[str, dict] = {}
+        self.lights: dict[str, dict] = {}  # light_id -> light
+        self._light_device: dict[str, str] = {}  # light_id -> device_id
+        self._light_ids: list[str] | None = None  # 随机选择用的缓存
+        self.broker = MqttBrokerStandIn(self.config.host, self.config.mqtt_port)
+        self._runner: web.AppRunner | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.requests = 0  # 收到的 HTTP 请求数
+        self.errors = 0  # 注入的 400 响应数
+        self.commands = 0  # 收到的 MQTT 控制指令数
+        self.stalls = 0  # 注入的卡住请求数
+        for index in range(self.config.devices):
+            self.add_device(make_device(index, self._rng, self.config.channels))
+
+    def add_device(self, device: dict) -> None:
+        """Add a device to the simulated state."""
+        self.devices[device["id"]] = device
+        for light in device["ext_light"]:
+            self.lights[light["id"]] = light
+            self._light_device[light["id"]] = device["id"]
+        self._light_ids = None
+
+    def remove_device(self, device_id: str) -> None:
+        """Remove a device from the simulated state without publishing."""
+        device = self.devices.pop(device_id, None)
+        for light in (device or {}).get("ext_light", []):
+            self.lights.pop(light["id"], None)
+            self._light_device.pop(light["id"], None)
+        self._light_ids = None
+
+    async def start(self) -> None:
+        """Start the HTTP server, MQTT broker and background traffic."""
+        app = web.Application()
+        app.router.add_post("/api", self._handle_auth)
+        app.router.add_get("/clip/v2/resource/bridge", self._handle_bridge)
+        app.router.add_get("/clip/v2/resource/device", self._handle_devices)
+        app.router.add_get("/clip/v2/resource/device/{uuid}", self._handle_device)
+        app.router.add_put(
+            "/clip/v2/resource/device/{uuid}/light", self._handle_device_control
+        )
+        app.router.add_get("/clip/v2/resource/light", self._handle_all_lights)
+        app.router.add_get("/clip/v2/resource/light/{uuid}", self._handle_lights)
+        app.router.add_put("/clip/v2/resource/light/{uuid}", self._handle_light_control)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.config.host, self.config.http_port)
+        await site.start()
+        self.broker.on_client_publish = self._on_client_publish
+        await self.broker.start()
+        self.start_traffic()
+
+    def start_traffic(self) -> None:
+        """(Re)start background events and disconnects from the config."""
+        self.stop_traffic()
+        if self.config.event_rate > 0:
+            self._tasks.append(asyncio.create_task(self._event_loop()))
+        if self.config.disconnect_interval > 0:
+            self._tasks.append(asyncio.create_task(self._disconnect_loop()))
+
+    def stop_traffic(self) -> None:
+        """Stop background events and disconnects."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    async def stop(self) -> None:
+        """Stop everything."""
+        self.stop_traffic()
+        await self.broker.stop()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---- MQTT 事件 ----
+
+    def publish_light_update(self, light_id: str, value: dict) -> None:
+        """Apply value to a light and publish res/light/update."""
+        self.lights[light_id].update(value)
+        payload = [
+            {"device_id": self._light_device[light_id], "id": light_id, "value": value}
+        ]
+        self.broker.publish("res/light/update", json.dumps(payload))
+
+    def publish_device_add(self, devices: list[dict], with_lights: bool = True) -> None:
+        """Add devices and publish res/device/add.
+
+        With ``with_lights=False`` the payload omits ``ext_light``, as the
+        gateway does right after pairing, so the client has to fetch it.
+        """
+        for device in devices:
+            self.add_device(device)
+        if not with_lights:
+            devices = [
+                {key: value for key, value in device.items() if key != "ext_light"}
+                for device in devices
+            ]
+        self.broker.publish("res/device/add", json.dumps(devices))
+
+    def publish_device_remove(self, device_ids: list[str]) -> None:
+        """Remove devices and publish res/device/remove."""
+        for device_id in device_ids:
+            self.remove_device(device_id)
+        payload = [{"id": device_id, "type": "device"} for device_id in device_ids]
+        self.broker.publish("res/device/remove", json.dumps(payload))
+
+    def publish_device_update(self, device_id: str, value: dict) -> None:
+        """Update a device and publish res/device/update."""
+        self.devices[device_id].update(value)
+        payload = [{"id": device_id, "value": value}]
+        self.broker.publish("res/device/update", json.dumps(payload))
+
+    def random_light_update(self) -> None:
+        """Publish one random brightness change."""
+        if self._light_ids is None:
+            self._light_ids = list(self.lights)
+        light_id = self._rng.choice(self._light_ids)
+        self.publish_light_update(
+            light_id, {"brightness": self._rng.randint(1, 100), "on": 1}
+        )
+
+    async def _event_loop(self) -> None:
+        """Publish background light updates at the configured rate."""
+        interval = 1 / self.config.event_rate
+        next_at = time.monotonic()
+        while True:
+            next_at += interval
+            self.random_light_update()
+            await asyncio.sleep(max(next_at - time.monotonic(), 0))
+
+    async def _disconnect_loop(self) -> None:
+        """Drop MQTT clients periodically."""
+        while True:
+            await asyncio.sleep(self.config.disconnect_interval)
+            _LOGGER.info("Simulating MQTT disconnect")
+            self.broker.drop_clients()
+
+    # ---- HTTP ----
+
+    async def _before_request(self) -> web.Response | None:
+        """Apply latency and error injection."""
+        self.requests += 1
+        delay = self.config.latency
+        if self.config.latency_jitter:
+            delay += self._rng.uniform(0, self.config.latency_jitter)
+        if self.config.stall_rate and self._rng.random() < self.config.stall_rate:
+            self.stalls += 1
+            delay += self.config.stall_time
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.config.outage:
+            return web.Response(status=503)
+        if self.config.error_rate and self._rng.random() < self.config.error_rate:
+            self.errors += 1
+            return web.Response(status=400)
+        return None
+
+    @staticmethod
+    def _ok(arr: list | None = None, obj: dict | None = None) -> web.Response:
+        """Build a successful Result response."""
+        data = {}
+        if arr is not None:
+            data["arr"] = arr
+            data["len"] = len(arr)
+        if obj is not None:
+            data["obj"] = obj
+        return web.json_response({"code": 0, "msg": "success", "data": data})
+
+    @staticmethod
+    def _fail(code: int, msg: str) -> web.Response:
+        """Build a failed Result response."""
+        return web.json_response({"code": code, "msg": msg})
+
+    def _check_auth(self, request: web.Request) -> bool:
+        """Check the application-key header."""
+        return request.headers.get("application-key") == self.config.api_key
+
+    async def _handle_auth(self, _: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        if not self.config.link_pressed:
+            return self._fail(101, "link button not pressed")
+        return self._ok(obj={"username": self.config.api_key})
+
+    async def _handle_bridge(self, request: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        if not self._check_auth(request):
+            return self._fail(401, "unauthorized")
+        return self._ok(
+            arr=[
+                {
+                    "id": "bridge-simulator",
+                    "ip": self.config.host,
+                    "mac": "00:11:22:33:44:55",
+                    "model": "BW-GW-SIM",
+                    "name": "Bwee Bridge Simulator",
+                    "type": "bridge",
+                    "version": "1.0.0",
+                }
+            ]
+        )
+
+    def _render_device(self, device: dict, query) -> dict:
+        """Render a device with the ext_light/ext_room switches."""
+        result = dict(device)
+        if query.get("ext_light") != "1":
+            result.pop("ext_light", None)
+        if query.get("ext_room") != "1":
+            result.pop("ext_room", None)
+        return result
+
+    async def _handle_devices(self, request: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        query = request.query
+        response = self._ok(
+            arr=[self._render_device(device, query) for device in self.devices.values()]
+        )
+        if self.config.compress:
+            # 按请求的 Accept-Encoding 协商
+            response.enable_compression()
+        return response
+
+    async def _handle_device(self, request: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        device = self.devices.get(request.match_info["uuid"])
+        if device is None:
+            return self._fail(404, "device not found")
+        return self._ok(arr=[device])
+
+    async def _control(self, light_ids: list[str], body: dict) -> web.Response:
+        """Apply a control body to lights and schedule the echo."""
+        if not light_ids:
+            return self._fail(404, "light not found")
+        self._schedule_echo(light_ids, body)
+        return self._ok()
+
+    def _schedule_echo(self, light_ids: list[str], body: dict) -> None:
+        """Apply a control body to lights after echo_latency and publish it."""
+        value = {key: val for key, val in body.items() if key != "name"}
+        # 网关切换颜色模式后随回显上报
+        if "color_x" in value or "color_arr" in value:
+            value["color_mode"] = 1
+        elif "color_cw" in value:
+            value["color_mode"] = 2
+        loop = asyncio.get_running_loop()
+        for light_id in light_ids:
+            if self.config.echo_latency > 0:
+                loop.call_later(
+                    self.config.echo_latency,
+                    self.publish_light_update,
+                    light_id,
+                    value,
+                )
+            else:
+                loop.call_soon(self.publish_light_update, light_id, value)
+
+    def _on_client_publish(self, topic: str, payload: bytes) -> None:
+        """Handle a control command published by the client over MQTT."""
+        if topic != COMMAND_TOPIC or not self.config.mqtt_commands:
+            return
+        self.commands += 1
+        command = json.loads(payload)
+        if command.get("id") in self.lights:
+            self._schedule_echo([command["id"]], command.get("value") or {})
+
+    async def _handle_device_control(self, request: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        device = self.devices.get(request.match_info["uuid"])
+        light_ids = [light["id"] for light in (device or {}).get("ext_light", [])]
+        return await self._control(light_ids, await request.json())
+
+    async def _handle_light_control(self, request: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        light_id = request.match_info["uuid"]
+        light_ids = [light_id] if light_id in self.lights else []
+        return await self._control(light_ids, await request.json())
+
+    async def _handle_all_lights(self, _: web.Request) -> web.Response:
+        if (error := await self._before_request()) is not None:
+            return error
+        return self._ok(arr=list(self.lights.values()))
+
+    async def _handle_lights(self, request: web.Request) -> web.Response:
+        """Lights of a device, or a single light, by uuid."""
+        if (error := await self._before_request()) is not None:
+            return error
+        uuid = request.match_info["uuid"]
+        if uuid in self.devices:
+            return self._ok(arr=self.devices[uuid]["ext_light"])
+        if uuid in self.lights:
+            return self._ok(arr=[self.lights[uuid]])
+        return self._fail(404, "light not found")
+
+
+def _parse_args(argv: list[str] | None) -> SimulatorConfig:
+    """Parse command line options into a config."""
+    parser = argparse.ArgumentParser(description="BWEE gateway simulator")
+    config = SimulatorConfig()
+    for name, default in vars(config).items():
+        option = "--" + name.replace("_", "-")
+        if isinstance(default, bool):
+            parser.add_argument(
+                option,
+                type=lambda value: value.lower() in ("1", "true", "yes"),
+                default=default,
+            )
+        else:
+            parser.add_argument(option, type=type(default), default=default)
+    return SimulatorConfig(**vars(parser.parse_args(argv)))
+
+
+async def _serve(config: SimulatorConfig) -> None:
+    """Run the simulator until cancelled."""
+    simulator = GatewaySimulator(config)
+    await simulator.start()
+    _LOGGER.info(
+        "Simulating %s devices on http://%s:%s and mqtt://%s:%s",
+        config.devices,
+        config.host,
+        config.http_port,
+        config.host,
+        config.mqtt_port,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(_parse_args(None)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,137 @@
+"""Minimal timing and allocation harness for the benchmarks."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+import gc
+import json
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+# 让基准测试可以直接导入 bweetech 包，而不加载 Home Assistant
+COMPONENT_PATH = Path(__file__).resolve().parent.parent / "custom_components" / "bwee_home"
+REPO_PATH = COMPONENT_PATH.parent.parent
+for _path in (str(COMPONENT_PATH), str(REPO_PATH)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+# 每轮计时的最短时间（秒）
+MIN_TIME = 0.2
+
+
+@dataclass
+class BenchResult:
+    """One benchmark measurement."""
+
+    name: str = None
+    size: int = None
+    ops_per_sec: float = None  # 每秒执行次数
+    items_per_sec: float = None  # 每秒处理的设备数
+    peak_bytes: int = None  # 单次执行的内存峰值
+    alloc_blocks: int = None  # 单次执行后仍存活的内存块
+    retained_bytes: int = None  # 单次执行后仍存活的内存
+
+    @property
+    def key(self) -> str:
+        """Key used to match a baseline entry."""
+        return f"{self.name}[{self.size}]"
+
+
+def measure(
+    name: str,
+    size: int,
+    func: Callable[[], object],
+    min_time: float | None = None,
+    repeat: int = 3,
+) -> BenchResult:
+    """Measure ops/sec (best of repeat) and allocations of func."""
+    min_time = MIN_TIME if min_time is None else min_time
+    func()  # 预热
+    best = 0.0
+    for _ in range(repeat):
+        loops = 0
+        gc.collect()
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            func()
+            loops += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, loops / elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    keep = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del keep
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    retained = sum(stat.size_diff for stat in stats)
+
+    return BenchResult(
+        name=name,
+        size=size,
+        ops_per_sec=best,
+        items_per_sec=best * size,
+        peak_bytes=peak,
+        alloc_blocks=max(blocks, 0),
+        retained_bytes=max(retained, 0),
+    )
+
+
+def format_results(results: list[BenchResult]) -> str:
+    """Render results as a fixed width table."""
+    lines = [
+        f"{'benchmark':<36}{'size':>8}{'ops/sec':>14}{'items/sec':>14}"
+        f"{'peak KiB':>12}{'blocks':>10}{'kept KiB':>12}"
+    ]
+    lines.extend(
+        f"{result.name:<36}{result.size:>8}{result.ops_per_sec:>14.1f}"
+        f"{result.items_per_sec:>14.0f}{result.peak_bytes / 1024:>12.1f}"
+        f"{result.alloc_blocks:>10}{(result.retained_bytes or 0) / 1024:>12.1f}"
+        for result in results
+    )
+    return "\n".join(lines)
+
+
+def save_results(path: str, results: list[BenchResult]) -> None:
+    """Save results as a baseline file."""
+    data = {result.key: asdict(result) for result in results}
+    Path(path).write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def load_results(path: str) -> dict[str, BenchResult]:
+    """Load a baseline file."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {key: BenchResult(**value) for key, value in data.items()}
+
+
+def find_regressions(
+    results: list[BenchResult],
+    baseline: dict[str, BenchResult],
+    threshold: float,
+) -> list[str]:
+    """Return a message for every result slower or bigger than baseline by threshold."""
+    messages = []
+    for result in results:
+        base = baseline.get(result.key)
+        if base is None:
+            continue
+        if result.ops_per_sec < base.ops_per_sec * (1 - threshold):
+            messages.append(
+                f"{result.key}: {result.ops_per_sec:.1f} ops/sec, "
+                f"baseline {base.ops_per_sec:.1f}"
+            )
+        if base.peak_bytes and result.peak_bytes > base.peak_bytes * (1 + threshold):
+            messages.append(
+                f"{result.key}: peak {result.peak_bytes} bytes, "
+                f"baseline {base.peak_bytes}"
+            )
+    return messages
@@ -0,0 +1,135 @@
+"""Synthetic gateway payloads for offline benchmarks."""
+
+from __future__ import annotations
+
+import json
+import random
+
+ROOM_COUNT = 20
+PRODUCT_COUNT = 8
+
+
+def light_id(index: int, channel: int = 0) -> str:
+    """Id of one light channel of device index."""
+    return f"light-{index:08d}" if channel == 0 else f"light-{index:08d}-{channel}"
+
+
+def make_light(index: int, rng: random.Random, channel: int = 0) -> dict:
+    """Build one ext_light entry."""
+    return {
+        "ability": rng.choice((1, 3, 7, 11, 15)),
+        "brightness": rng.randint(1, 100),
+        "color_arr": [
+            {"x": rng.randint(0, 65535), "y": rng.randint(0, 65535)} for _ in range(3)
+        ],
+        "color_cw": rng.randint(2000, 6500),
+        "color_len": 3,
+        "color_mode": rng.choice((1, 2)),
+        "color_x": rng.randint(0, 65535),
+        "color_y": rng.randint(0, 65535),
+        "id": light_id(index, channel),
+        "name": f"Light {index}",
+        "on": rng.randint(0, 1),
+        "pack": [],
+        "position_x": 0,
+        "position_y": 0,
+        "positions": "",
+        "power_on": {
+            "brightness": 100,
+            "brightness_mode": 0,
+            "color_cw": 4000,
+            "color_mode": 2,
+            "color_x": 0,
+            "color_y": 0,
+            "mode": 0,
+            "on": 1,
+            "on_mode": 0,
+        },
+        "support_segment": 0,
+        "sync_status": 1,
+        "type": "light",
+    }
+
+
+def make_room(index: int) -> dict:
+    """Build one ext_room entry."""
+    return {
+        "background": 0,
+        "icon": "living_room",
+        "id": f"room-{index:04d}",
+        "name": f"Room {index}",
+        "room_kind": 1,
+        "room_type": "living_room",
+        "sequence": index,
+        "type": "room",
+    }
+
+
+def make_product(index: int) -> dict:
+    """Build one product block, the gp id encodes the DeviceSupport."""
+    support = index % 6
+    return {
+        "cat1_id": 2,
+        "cat1_name": "Light",
+        "cat2_id": 20,
+        "cat2_name": "Bulb",
+        "cat3_id": 2000 + support * 100 + index,
+        "cat3_name": f"Bulb model {index}",
+        "hardware_version": "1.0.0",
+        "manufacturer": "BWEE",
+        "model": f"BW-{index:03d}",
+        "software_version": "2.3.1",
+        "zigbee_version": "3.0",
+    }
+
+
+def make_device(index: int, rng: random.Random, channels: int = 1) -> dict:
+    """Build one device as returned with ext_light=1 and ext_room=1."""
+    return {
+        "ext_light": [make_light(index, rng, channel) for channel in range(channels)],
+        "ext_room": make_room(index % ROOM_COUNT),
+        "has_new": 0,
+        "id": f"device-{index:08d}",
+        "join_status": 1,
+        "name": f"Device {index}",
+        "new_version": "",
+        "online": 1,
+        "product": make_product(index % PRODUCT_COUNT),
+        "services": [
+            {"rid": light_id(index, channel), "rtype": "light"}
+            for channel in range(channels)
+        ],
+        "type": "device",
+    }
+
+
+def make_devices(count: int, seed: int = 0) -> list[dict]:
+    """Build a reproducible device list."""
+    rng = random.Random(seed)
+    return [make_device(index, rng) for index in range(count)]
+
+
+def make_result_json(count: int, seed: int = 0) -> str:
+    """Build a get_all_devices response body."""
+    return json.dumps(
+        {
+            "code": 0,
+            "msg": "success",
+            "data": {"arr": make_devices(count, seed), "len": count},
+        }
+    )
+
+
+def make_light_update_json(count: int, seed: int = 0) -> str:
+    """Build a res/light/update payload."""
+    rng = random.Random(seed)
+    return json.dumps(
+        [
+            {
+                "device_id": f"device-{index:08d}",
+                "id": f"light-{index:08d}",
+                "value": {"brightness": rng.randint(1, 100), "on": 1},
+            }
+            for index in range(count)
+        ]
+    )
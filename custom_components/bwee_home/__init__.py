@@ -3,13 +3,18 @@
 from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING
 
-from .light import DeviceManager
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from .bweetech import API
-from .config_flow import BweeConfigFlow
 from .const import DOMAIN, SUPPORT_PLATFORMS
+from .services import async_setup_services
+
+if TYPE_CHECKING:
+    # 平台和配置流程由 Home Assistant 按需加载，这里只用于类型检查
+    from .light import DeviceManager
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +31,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
         hass.data[DOMAIN]["entities"][platform] = []
     # 初始化API
     await API.init_session()
+    async_setup_services(hass)
     return True
 
 
@@ -35,12 +41,14 @@ async def async_shutdown(hass: HomeAssistant) -> None:
     await API.close_session()
 
 
-async def async_setup_entry(hass: HomeAssistant, config_entry: BweeConfigFlow) -> bool:
+async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up BWEE home from a config entry."""
     _LOGGER.info("Setup Bwee Home entry")
     hass.data.setdefault(DOMAIN, {})
     # {[lights:Light]: list[Light]}
     hass.data[DOMAIN].setdefault("devices", {})
+    # {[light_id:str]: Light} 灯ID索引
+    hass.data[DOMAIN].setdefault("lights", {})
     # {[gateway:GatewayInfo]: gateways}
     hass.data[DOMAIN].setdefault("gateways", {})
     # {dm:DeviceManager}
@@ -53,7 +61,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: BweeConfigFlow) -
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, _: BweeConfigFlow) -> bool:
+async def async_unload_entry(hass: HomeAssistant, _: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.info("Unload Bwee Home entry")
     # 清空设备
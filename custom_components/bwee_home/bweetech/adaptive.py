@@ -0,0 +1,249 @@
+"""Adaptive (circadian) brightness and color temperature for many lights."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+import logging
+import math
+import time
+from typing import Any
+
+from .command_tracker import COLOR_MODE_CW
+from .const import (
+    ADAPTIVE_BRIGHTNESS_TOLERANCE,
+    ADAPTIVE_INTERVAL,
+    ADAPTIVE_KELVIN_TOLERANCE,
+    ADAPTIVE_MAX_BRIGHTNESS,
+    ADAPTIVE_MIN_BRIGHTNESS,
+    ADAPTIVE_SUNRISE,
+    ADAPTIVE_SUNSET,
+    MAX_KELVIN,
+    MIN_KELVIN,
+)
+from .forms import ControlForm
+from .models import Light, LightUpdateValue
+from .transition import FrameBatch
+from .utils import color_utils
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AdaptiveProfile:
+    """Daily curve: warm and dim at night, cool and bright at midday."""
+
+    min_kelvin: int = MIN_KELVIN
+    max_kelvin: int = MAX_KELVIN
+    min_brightness: int = ADAPTIVE_MIN_BRIGHTNESS  # 1-100
+    max_brightness: int = ADAPTIVE_MAX_BRIGHTNESS  # 1-100
+    sunrise: float = ADAPTIVE_SUNRISE  # 小时
+    sunset: float = ADAPTIVE_SUNSET  # 小时
+
+    def target(self, hour: float) -> tuple[int, int]:
+        """Return (brightness, kelvin) at an hour of the local day."""
+        day = (self.sunset - self.sunrise) % 24 or 24
+        elapsed = (hour - self.sunrise) % 24
+        # 白天按正弦曲线升降，正午最高；夜间保持最低
+        phase = math.sin(math.pi * elapsed / day) if elapsed < day else 0.0
+        brightness = self.min_brightness + (
+            self.max_brightness - self.min_brightness
+        ) * phase
+        kelvin = self.min_kelvin + (self.max_kelvin - self.min_kelvin) * phase
+        return round(brightness), color_utils.clamp_kelvin(kelvin)
+
+
+def _local_hour() -> float:
+    now = time.localtime()
+    return now.tm_hour + now.tm_min / 60 + now.tm_sec / 3600
+
+
+def _moved(
+    new: int | None, current: int | None, sent: int | None, tolerance: int
+) -> bool:
+    """Return True if new is a change away from current that we did not send."""
+    if new is None or abs(new - (current or 0)) <= tolerance:
+        return False
+    return sent is None or abs(new - sent) > tolerance
+
+
+class AdaptiveEngine:
+    """Keep enrolled lights on their profile's curve.
+
+    Every ``interval`` seconds the target is computed once per profile,
+    then one pass over the enrolled lights skips those that are off,
+    manually overridden or already within tolerance. The rest are sent
+    as one batch, lights with the same target sharing one form.
+
+    A light counts as manually overridden when a command from Home
+    Assistant sets its level, or when the gateway reports a level the
+    engine did not send (vendor app, wall switch).
+    """
+
+    def __init__(
+        self,
+        lights: Callable[[], dict[str, Light]],
+        send_batch: Callable[[FrameBatch], Awaitable[None]],
+        interval: float = ADAPTIVE_INTERVAL,
+        hour: Callable[[], float] = _local_hour,
+    ) -> None:
+        """Init engine."""
+        self._lights = lights
+        self._send_batch = send_batch
+        self._interval = interval
+        self._hour = hour
+        self._enrolled: dict[str, AdaptiveProfile] = {}  # 灯ID -> 曲线
+        self._overridden: set[str] = set()  # 用户手动调整过的灯ID
+        self._sent: dict[str, tuple[int, int]] = {}  # 灯ID -> 最后发送的目标
+        self._task: asyncio.Task | None = None
+        self.ticks = 0
+        self.dispatched = 0  # 已发送的灯光指令数
+        self.skipped_off = 0
+        self.skipped_overridden = 0
+        self.skipped_in_tolerance = 0
+
+    def enable(
+        self, light_ids: Iterable[str], profile: AdaptiveProfile | None = None
+    ) -> None:
+        """Enroll lights, clear their overrides and apply the curve now."""
+        profile = profile or AdaptiveProfile()
+        for light_id in light_ids:
+            self._enrolled[light_id] = profile
+            self._overridden.discard(light_id)
+        self._restart()
+
+    def disable(self, light_ids: Iterable[str]) -> None:
+        """Stop adapting lights, they keep their current state."""
+        for light_id in light_ids:
+            self._enrolled.pop(light_id, None)
+            self._overridden.discard(light_id)
+            self._sent.pop(light_id, None)
+        if not self._enrolled and self._task:
+            self._task.cancel()
+            self._task = None
+
+    def on_user_command(self, light_id: str, form: ControlForm) -> None:
+        """Fill a plain turn-on with the target, or mark a manual override.
+
+        Turning a light off clears its override, so it adapts again the
+        next time it is turned on.
+        """
+        profile = self._enrolled.get(light_id)
+        if profile is None:
+            return
+        if form.on == 0:
+            self._overridden.discard(light_id)
+            return
+        if (
+            form.brightness is not None
+            or form.color_cw is not None
+            or form.color_x is not None
+        ):
+            self._overridden.add(light_id)
+            return
+        if light_id not in self._overridden:
+            form.brightness, form.color_cw = profile.target(self._hour())
+            self._sent[light_id] = (form.brightness, form.color_cw)
+
+    def on_light_update(
+        self, light_id: str, light: Light, value: LightUpdateValue
+    ) -> None:
+        """Mark an override when the gateway reports a level not sent by us.
+
+        Only call this for updates that answer no command from Home
+        Assistant. light is the state before the update is applied.
+        """
+        if light_id not in self._enrolled:
+            return
+        if value.on == 0:
+            self._overridden.discard(light_id)
+            return
+        if light_id in self._overridden:
+            return
+        brightness, kelvin = self._sent.get(light_id, (None, None))
+        if (
+            _moved(
+                value.brightness,
+                light.brightness,
+                brightness,
+                ADAPTIVE_BRIGHTNESS_TOLERANCE,
+            )
+            or _moved(value.color_cw, light.color_cw, kelvin, ADAPTIVE_KELVIN_TOLERANCE)
+            or (value.color_x is not None and value.color_x != light.color_x)
+        ):
+            self._overridden.add(light_id)
+
+    def _restart(self) -> None:
+        # 立即执行一次，再按间隔执行
+        if self._task:
+            self._task.cancel()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """The shared tick."""
+        while self._enrolled:
+            batch = self.next_batch()
+            if batch:
+                try:
+                    await self._send_batch(batch)
+                except Exception:
+                    _LOGGER.exception("Failed to send adaptive lighting")
+            await asyncio.sleep(self._interval)
+
+    def next_batch(self) -> FrameBatch:
+        """Compute this tick's changes."""
+        self.ticks += 1
+        hour = self._hour()
+        targets: dict[AdaptiveProfile, tuple[int, int]] = {}
+        groups: dict[tuple[int, int], list[str]] = {}
+        lights = self._lights()
+        for light_id, profile in self._enrolled.items():
+            light = lights.get(light_id)
+            if light is None or light.on != 1:
+                self.skipped_off += 1
+                continue
+            if light_id in self._overridden:
+                self.skipped_overridden += 1
+                continue
+            target = targets.get(profile)
+            if target is None:
+                target = targets[profile] = profile.target(hour)
+            brightness, kelvin = target
+            if (
+                light.color_mode == COLOR_MODE_CW
+                and abs((light.brightness or 0) - brightness)
+                <= ADAPTIVE_BRIGHTNESS_TOLERANCE
+                and abs((light.color_cw or 0) - kelvin) <= ADAPTIVE_KELVIN_TOLERANCE
+            ):
+                self.skipped_in_tolerance += 1
+                continue
+            groups.setdefault(target, []).append(light_id)
+            self._sent[light_id] = target
+        batch = [
+            (ControlForm(brightness=brightness, color_cw=kelvin), light_ids)
+            for (brightness, kelvin), light_ids in groups.items()
+        ]
+        self.dispatched += sum(len(light_ids) for light_ids in groups.values())
+        return batch
+
+    async def close(self) -> None:
+        """Stop everything."""
+        self._enrolled.clear()
+        self._overridden.clear()
+        self._sent.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters, for diagnostics."""
+        return {
+            "enrolled": len(self._enrolled),
+            "overridden": len(self._overridden),
+            "ticks": self.ticks,
+            "dispatched": self.dispatched,
+            "skipped_off": self.skipped_off,
+            "skipped_overridden": self.skipped_overridden,
+            "skipped_in_tolerance": self.skipped_in_tolerance,
+        }
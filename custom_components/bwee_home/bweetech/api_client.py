@@ -1,20 +1,61 @@
 """Api client for BweeTech API."""
 
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import platform
+import re
 import sys
+import time
 from typing import Any, TypeVar
 
 import aiohttp
 
-from .api_models import Result, parse_result
-from .const import REQUEST_TIMEOUT
+from .api_models import (
+    CODE_HTTP_ERROR,
+    CODE_TRANSPORT_ERROR,
+    Result,
+    parse_result,
+)
+from .const import (
+    API_HEDGE_READS,
+    API_RATE_BURST,
+    API_RATE_LIMIT,
+    DECODE_OFFLOAD_THRESHOLD,
+    DECODE_WORKERS,
+    REQUEST_TIMEOUT,
+    REQUEST_TIMEOUT_FACTOR,
+    REQUEST_TIMEOUT_MIN,
+    REQUEST_TIMEOUT_MIN_SAMPLES,
+    STREAM_CHUNK_SIZE,
+)
+from .enums import RequestPriority
+from .profiler import profiled
+from .utils import dict_to_bean
+from .utils.json_stream import ArrayStreamDecoder
+from .utils.rate_limiter import PriorityRateLimiter
+from .utils.stats import AdaptiveTimeout, LatencyStats
 
 # 日志设置
 _LOGGER = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 # 泛型
 T = TypeVar("T")
+# 资源路径中的ID段，按接口统计延迟时替换为 {id}
+_ID_SEGMENT = re.compile(r"^(/clip/v2/resource/[^/]+)/[^/]+")
+_ID_REPLACEMENT = r"\1/{id}"
+
+
+def _status_code(status: int) -> int:
+    """Result code of a failed HTTP status: 5xx may pass, 4xx will not."""
+    return CODE_TRANSPORT_ERROR if status >= 500 else CODE_HTTP_ERROR
+
+
+def _freeze(values: dict[str, Any] | None) -> tuple:
+    """Hashable form of query params or headers."""
+    if not values:
+        return ()
+    return tuple(sorted((key, str(value)) for key, value in values.items()))
 
 
 class ApiClient:
@@ -26,6 +67,21 @@ class ApiClient:
         self._user_agent: str | None = None
         self.gateway_host = ""
         self.api_key = ""
+        self.rate_limiter = PriorityRateLimiter(API_RATE_LIMIT, API_RATE_BURST)
+        self._latency: dict[str, AdaptiveTimeout] = {}  # 接口 -> 延迟统计
+        self.hedge_reads = API_HEDGE_READS
+        self.hedged = 0  # 发出的对冲请求数
+        self.hedge_wins = 0  # 对冲请求先返回的次数
+        # 进行中的 GET 请求，相同的并发请求共用一个
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self.collapsed = 0  # 被合并到进行中请求的次数
+        # 大响应在线程池中解码
+        self.decode_threshold = DECODE_OFFLOAD_THRESHOLD
+        self._decode_workers = DECODE_WORKERS
+        self._decode_pool: ThreadPoolExecutor | None = None
+        self.decode_loop = LatencyStats()  # 每次在事件循环中解码的耗时
+        self.decode_offloaded = 0  # 在线程池中解码的次数
+        self.decode_offloaded_bytes = 0
 
     async def init_session(self) -> None:
         """Initialize the aiohttp session for the bwee_home integration."""
@@ -39,6 +95,9 @@ class ApiClient:
         if self._session:
             await self._session.close()
             self._session = None
+        if self._decode_pool:
+            self._decode_pool.shutdown(wait=False, cancel_futures=True)
+            self._decode_pool = None
 
     def init_user_agent(self) -> None:
         """Generate User-Agent for the bwee_home integration."""
@@ -63,6 +122,19 @@ class ApiClient:
         self.api_key = api_key
         self.init_api_auth()
 
+    def init_rate_limit(self, rate: float, burst: int) -> None:
+        """Set the request rate (per second) and burst for this gateway."""
+        self.rate_limiter.configure(rate, burst)
+
+    def init_decode_pool(self, threshold: int, workers: int) -> None:
+        """Set the body size from which responses decode in worker threads."""
+        self.decode_threshold = threshold
+        self._decode_workers = workers
+        if self._decode_pool:
+            self._decode_pool.shutdown(wait=False)
+            self._decode_pool = None
+
+    @profiled
     async def send_request(
         self,
         method: str,
@@ -72,8 +144,117 @@ class ApiClient:
         data: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
         data_type: type[T] = dict,
+        priority: RequestPriority = RequestPriority.REFRESH,
+        stream: bool = False,
+    ) -> Result[T]:
+        """Send a request to the API.
+
+        Concurrent identical GETs (same host, URL, params and headers) are merged:
+        only the first one is sent and every caller gets its result.
+        With ``stream`` the elements of ``data.arr`` are decoded one by one
+        while the response body arrives, instead of from the full text.
+        Non-streaming GETs are hedged: if no answer came by the endpoint's
+        p95, a second request is sent and the first good answer wins.
+        """
+        args = (method, host, url, params, data, headers, data_type, priority, stream)
+        if method != "GET":
+            return await self._send_hedged(*args)
+        key = (host, url, _freeze(params), _freeze(headers), data_type, stream)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send_hedged(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.collapsed += 1
+        # 某个调用方被取消时，不影响其他等待同一请求的调用方
+        return await asyncio.shield(task)
+
+    async def _send_hedged(
+        self,
+        method: str,
+        host: str,
+        url: str,
+        params: dict[str, Any] | None,
+        data: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        data_type: type[T],
+        priority: RequestPriority,
+        stream: bool,
+    ) -> Result[T]:
+        """Send a request, hedging non-streaming GETs."""
+        latency = self.endpoint_latency(method, url)
+        delay = (
+            latency.hedge_delay()
+            if self.hedge_reads and method == "GET" and not stream
+            else None
+        )
+        args = (method, host, url, params, data, headers, data_type, priority, stream)
+        if delay is None:
+            return await self._send_once(*args)
+
+        # 拿到令牌后再开始计时，排队时间不触发对冲
+        await self.rate_limiter.acquire(priority)
+        tasks = [asyncio.ensure_future(self._send_once(*args, acquired=True))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+            # 第一个请求超过 p95 仍未返回，再发一个
+            self.hedged += 1
+            tasks.append(asyncio.ensure_future(self._send_once(*args)))
+            pending = set(tasks)
+            result: Result[T] | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    if result.is_ok():
+                        if task is tasks[1]:
+                            self.hedge_wins += 1
+                        return result
+            return result
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def endpoint_latency(self, method: str, url: str) -> AdaptiveTimeout:
+        """Latency stats of an endpoint, resource ids replaced by {id}.
+
+        Only GETs get an adaptive timeout, writes keep REQUEST_TIMEOUT.
+        """
+        key = f"{method} {_ID_SEGMENT.sub(_ID_REPLACEMENT, url)}"
+        latency = self._latency.get(key)
+        if latency is None:
+            # 写请求超时后网关可能仍会执行，保持固定的超时，不按延迟收紧
+            latency = AdaptiveTimeout(
+                floor=REQUEST_TIMEOUT_MIN if method == "GET" else REQUEST_TIMEOUT,
+                ceiling=REQUEST_TIMEOUT,
+                factor=REQUEST_TIMEOUT_FACTOR,
+                min_samples=REQUEST_TIMEOUT_MIN_SAMPLES,
+            )
+            self._latency[key] = latency
+        return latency
+
+    async def _send_once(
+        self,
+        method: str,
+        host: str,
+        url: str,
+        params: dict[str, Any] | None,
+        data: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        data_type: type[T],
+        priority: RequestPriority,
+        stream: bool,
+        acquired: bool = False,
     ) -> Result[T]:
-        """Send a request to the API."""
+        """Send one request, with the endpoint's adaptive timeout."""
+        if not acquired:
+            await self.rate_limiter.acquire(priority)
         if self._session is None:
             await self.init_session()
         params = params if params is not None else {}
@@ -81,6 +262,9 @@ class ApiClient:
         headers = headers if headers is not None else {}
         for key in self._session.headers:
             headers.setdefault(key, self._session.headers.get(key))
+        latency = self.endpoint_latency(method, url)
+        timeout = latency.timeout()
+        start = time.monotonic()
         try:
             full_url = host + url
             async with self._session.request(
@@ -89,39 +273,154 @@ class ApiClient:
                 params=params,
                 json=data,
                 headers=headers,
-                timeout=REQUEST_TIMEOUT,
+                timeout=aiohttp.ClientTimeout(total=timeout),
             ) as response:
-                # If the response is successful
-                response_data = await response.text()  # Assuming the API returns JSON
                 status_code = response.status
 
                 _LOGGER.info(
                     "Http Request:%s,params:%s,data:%s,headers:%s", full_url, params, data, headers
                 )
 
+                if response.status == 200 and stream:
+                    result = await self._read_stream(response, data_type)
+                    latency.add(time.monotonic() - start)
+                    return result
+                # If the response is successful
+                response_data = await response.text()  # Assuming the API returns JSON
+
                 # Create Result object based on response status and data
                 if response.status == 200:
+                    latency.add(time.monotonic() - start)
                     _LOGGER.debug("Http Response:%s", response_data)
-                    return parse_result(response_data, data_type)
+                    size = len(response_data)
+                    return await self._decode(
+                        self._offload(size), size, parse_result, response_data, data_type
+                    )
                 if response.status == 400:
-                    return await self.send_request(method, host, url, params, data, headers, data_type)
+                    return await self._send_once(
+                        method,
+                        host,
+                        url,
+                        params,
+                        data,
+                        headers,
+                        data_type,
+                        priority,
+                        stream,
+                    )
                 return self.handle_aiohttp_error(
-                    method, url, f"Response code: {status_code}"
+                    method,
+                    url,
+                    f"Response code: {status_code}",
+                    _status_code(status_code),
                 )
         except aiohttp.ClientResponseError as e:
-            return self.handle_aiohttp_error(method, url, str(e))
+            return self.handle_aiohttp_error(method, url, str(e), _status_code(e.status))
         except aiohttp.ClientConnectionError as e:
             return self.handle_aiohttp_error(method, url, str(e))
         except aiohttp.ClientError as e:
-            return self.handle_aiohttp_error(method, url, str(e))
+            return self.handle_aiohttp_error(method, url, str(e), CODE_HTTP_ERROR)
         except TimeoutError as e:
-            return self.handle_aiohttp_error(method, url, str(e))
+            latency.add_timeout()
+            return self.handle_aiohttp_error(
+                method, url, str(e) or f"Timeout after {timeout:.1f}s"
+            )
+
+    def _offload(self, size: int) -> bool:
+        """Whether a body of this size is decoded in the pool."""
+        return 0 < self.decode_threshold <= size and self._decode_workers > 0
+
+    async def _decode(
+        self, offload: bool, size: int, func: Callable[..., T], *args: Any
+    ) -> T:
+        """Run a decode step of size bytes, inline or in the pool."""
+        if offload:
+            if self._decode_pool is None:
+                self._decode_pool = ThreadPoolExecutor(
+                    self._decode_workers, thread_name_prefix="bwee_decode"
+                )
+            self.decode_offloaded += 1
+            self.decode_offloaded_bytes += size
+            return await asyncio.get_running_loop().run_in_executor(
+                self._decode_pool, func, *args
+            )
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.decode_loop.add(time.perf_counter() - start)
+
+    @staticmethod
+    def _decode_chunk(
+        decoder: ArrayStreamDecoder, chunk: bytes, data_type: type[T]
+    ) -> list[T]:
+        return [dict_to_bean(item, data_type) for item in decoder.feed(chunk)]
+
+    @staticmethod
+    def _decode_tail(decoder: ArrayStreamDecoder, data_type: type[T]) -> tuple:
+        envelope, tail = decoder.close()
+        return envelope, [dict_to_bean(item, data_type) for item in tail]
+
+    async def _read_stream(
+        self, response: aiohttp.ClientResponse, data_type: type[T]
+    ) -> Result[T]:
+        """Decode a response whose data.arr holds many items.
+
+        Chunks are decoded inline until the body passes the decode
+        threshold, then in the pool, one chunk at a time.
+        """
+        decoder = ArrayStreamDecoder()
+        items: list[T] = []
+        received = 0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            received += len(chunk)
+            items.extend(
+                await self._decode(
+                    self._offload(received),
+                    len(chunk),
+                    self._decode_chunk,
+                    decoder,
+                    chunk,
+                    data_type,
+                )
+            )
+        envelope, tail = await self._decode(
+            self._offload(received), 0, self._decode_tail, decoder, data_type
+        )
+        items.extend(tail)
+        result: Result[T] = dict_to_bean(envelope, Result[data_type])
+        if result.data and items:
+            result.data.arr = items
+            result.data.len = len(items)
+        return result
+
+    def latency_as_dict(self) -> dict[str, Any]:
+        """Per-endpoint latency, timeouts, hedging, merging and decoding."""
+        return {
+            "decode": {
+                "threshold": self.decode_threshold,
+                "workers": self._decode_workers,
+                "offloaded": self.decode_offloaded,
+                "offloaded_bytes": self.decode_offloaded_bytes,
+                "loop_total_ms": round(self.decode_loop.total * 1000, 2),
+                "loop": self.decode_loop.as_dict(),
+            },
+            "inflight": len(self._inflight),
+            "collapsed": self.collapsed,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "endpoints": {
+                key: latency.as_dict() for key, latency in self._latency.items()
+            },
+        }
 
     @staticmethod
-    def handle_aiohttp_error(method: str, url: str, message: str) -> Result[T]:
+    def handle_aiohttp_error(
+        method: str, url: str, message: str, code: int = CODE_TRANSPORT_ERROR
+    ) -> Result[T]:
         """Handle and log aiohttp errors, return a Result object."""
         _LOGGER.error("Error while sending %s request to %s: %s", method, url, message)
-        return Result(code=-10086, msg=message)
+        return Result(code=code, msg=message)
 
     async def get(
         self,
@@ -129,6 +428,8 @@ class ApiClient:
         params: dict[str, Any] | None = None,
         headers: dict[str, Any] | None = None,
         data_type: type[T] = dict,
+        priority: RequestPriority = RequestPriority.REFRESH,
+        stream: bool = False,
     ) -> Result[T]:
         """Send a GET request."""
         return await self.send_request(
@@ -138,6 +439,8 @@ class ApiClient:
             params=params,
             headers=headers,
             data_type=data_type,
+            priority=priority,
+            stream=stream,
         )
 
     async def post(
@@ -146,6 +449,7 @@ class ApiClient:
         data: dict[str, Any] | None = None,
         headers: dict[str, Any] | None = None,
         data_type: type[T] = dict,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
     ) -> Result[T]:
         """Send a POST request."""
         return await self.send_request(
@@ -155,6 +459,7 @@ class ApiClient:
             data=data,
             headers=headers,
             data_type=data_type,
+            priority=priority,
         )
 
     async def put(
@@ -163,6 +468,7 @@ class ApiClient:
         data: dict[str, Any] | None = None,
         headers: dict[str, Any] | None = None,
         data_type: type[T] = dict,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
     ) -> Result[T]:
         """Send a PUT request."""
         return await self.send_request(
@@ -172,6 +478,7 @@ class ApiClient:
             data=data,
             headers=headers,
             data_type=data_type,
+            priority=priority,
         )
 
     async def delete(
@@ -180,6 +487,7 @@ class ApiClient:
         params: dict[str, Any] | None = None,
         headers: dict[str, Any] | None = None,
         data_type: type[T] = dict,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
     ) -> Result[T]:
         """Send a DELETE request."""
         return await self.send_request(
@@ -189,4 +497,5 @@ class ApiClient:
             params=params,
             headers=headers,
             data_type=data_type,
+            priority=priority,
         )
@@ -7,6 +7,11 @@ from .utils import json_to_bean
 
 T = TypeVar("T")
 
+# 网关不可达：连接失败、超时或 5xx，稍后可以重试
+CODE_TRANSPORT_ERROR = -10086
+# 网关拒绝了请求（4xx 等），重试也不会成功
+CODE_HTTP_ERROR = -10087
+
 
 @dataclass
 class ResultData(Generic[T]):
@@ -29,6 +34,10 @@ class Result(Generic[T]):
         """Return True if the result is OK."""
         return self.code == 0
 
+    def is_transport_error(self) -> bool:
+        """Return True if the gateway could not be reached."""
+        return self.code == CODE_TRANSPORT_ERROR
+
 
 # 修改parse_result函数以支持类型参数
 def parse_result(json_data: str, data_type: type[T]) -> Result[T]:
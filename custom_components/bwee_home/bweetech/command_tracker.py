@@ -0,0 +1,165 @@
+"""Optimistic light commands waiting for their res/light/update echo."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any
+
+from .const import COMMAND_ECHO_TIMEOUT
+from .forms import ControlForm
+from .models import Light, LightUpdateValue
+from .utils.stats import LatencyStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# ControlForm 中会写入 Light 的字段
+CONTROL_FIELDS = ("on", "brightness", "color_cw", "color_x", "color_y", "color_arr")
+
+# color_mode 的取值
+COLOR_MODE_XY = 1
+COLOR_MODE_CW = 2
+
+
+@dataclass
+class PendingCommand:
+    """A command applied optimistically and not yet echoed."""
+
+    device_id: str = None  # 设备ID
+    light: Light = None  # 被修改的灯
+    # 尚未回显的指令，按发送顺序 (期望的值, 发送时间)
+    commands: list[tuple[dict[str, Any], float]] = field(default_factory=list)
+    snapshot: dict[str, Any] = field(default_factory=dict)  # 修改前的值，用于回滚
+    timer: asyncio.TimerHandle | None = None  # 回显超时
+
+
+def form_to_values(form: ControlForm) -> dict[str, Any]:
+    """Return the light fields a control form will change."""
+    values = {
+        name: getattr(form, name)
+        for name in CONTROL_FIELDS
+        if getattr(form, name) is not None
+    }
+    if form.color_x is not None or form.color_y is not None or form.color_arr:
+        values["color_mode"] = COLOR_MODE_XY
+    elif form.color_cw is not None:
+        values["color_mode"] = COLOR_MODE_CW
+    return values
+
+
+class CommandTracker:
+    """Apply commands optimistically and confirm or roll them back."""
+
+    def __init__(
+        self,
+        timeout: float = COMMAND_ECHO_TIMEOUT,
+        on_rollback: Callable[[PendingCommand], None] | None = None,
+    ) -> None:
+        """Init tracker."""
+        self._timeout = timeout
+        self._pending: dict[str, PendingCommand] = {}
+        self.on_rollback = on_rollback
+        self.latency = LatencyStats()
+        self.confirmed = 0  # 收到匹配回显
+        self.superseded = 0  # 回显与期望不一致，以设备状态为准
+        self.rolled_back = 0  # 发送失败或超时后回滚
+
+    def track(self, device_id: str, light: Light, form: ControlForm) -> PendingCommand:
+        """Apply the form to the light and remember how to undo it."""
+        values = form_to_values(form)
+        pending = self._pending.get(light.id)
+        if pending is None:
+            pending = PendingCommand(device_id=device_id, light=light)
+            self._pending[light.id] = pending
+        elif pending.timer:
+            pending.timer.cancel()
+            pending.timer = None
+        for name, value in values.items():
+            # 连续指令保留最早的快照，回滚到最后确认的状态
+            pending.snapshot.setdefault(name, getattr(light, name))
+            setattr(light, name, value)
+        pending.commands.append((values, time.monotonic()))
+        return pending
+
+    def arm(self, light_id: str) -> None:
+        """Start the echo timeout once the gateway accepted the command."""
+        pending = self._pending.get(light_id)
+        if pending is None or pending.timer is not None:
+            return
+        pending.timer = asyncio.get_running_loop().call_later(
+            self._timeout, self._on_timeout, light_id
+        )
+
+    def is_pending(self, light_id: str) -> bool:
+        """Return True if a command sent for the light awaits its echo."""
+        return light_id in self._pending
+
+    def confirm(self, light_id: str, value: LightUpdateValue) -> None:
+        """Match a res/light/update echo against the pending command."""
+        pending = self._pending.get(light_id)
+        if pending is None or value is None:
+            return
+        related = False
+        # 从最新的指令往前找，回显可能对应较早的一条
+        for index in range(len(pending.commands) - 1, -1, -1):
+            expected, sent_at = pending.commands[index]
+            overlap = [name for name in expected if getattr(value, name, None) is not None]
+            if not overlap:
+                continue
+            related = True
+            if all(getattr(value, name) == expected[name] for name in overlap):
+                latency = time.monotonic() - sent_at
+                self.confirmed += 1
+                self.latency.add(latency)
+                _LOGGER.debug("Command on %s echoed after %.3fs", light_id, latency)
+                del pending.commands[: index + 1]
+                if not pending.commands:
+                    self._finish(light_id)
+                return
+        if related:
+            # 回显与所有指令都不一致，以设备状态为准
+            self.superseded += 1
+            self._finish(light_id)
+
+    def rollback(self, light_id: str) -> PendingCommand | None:
+        """Restore the state captured before the pending command."""
+        pending = self._finish(light_id)
+        if pending is None:
+            return None
+        for name, value in pending.snapshot.items():
+            setattr(pending.light, name, value)
+        self.rolled_back += 1
+        return pending
+
+    def _finish(self, light_id: str) -> PendingCommand | None:
+        """Forget a pending command."""
+        pending = self._pending.pop(light_id, None)
+        if pending and pending.timer:
+            pending.timer.cancel()
+            pending.timer = None
+        return pending
+
+    def _on_timeout(self, light_id: str) -> None:
+        """No echo arrived in time."""
+        _LOGGER.warning("No echo for command on %s, rolling back", light_id)
+        pending = self.rollback(light_id)
+        if pending and self.on_rollback:
+            self.on_rollback(pending)
+
+    def clear(self) -> None:
+        """Cancel every pending command without rolling back."""
+        for light_id in list(self._pending):
+            self._finish(light_id)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters and latency, for diagnostics."""
+        return {
+            "pending": len(self._pending),
+            "confirmed": self.confirmed,
+            "superseded": self.superseded,
+            "rolled_back": self.rolled_back,
+            "echo_latency": self.latency.as_dict(),
+        }
@@ -2,3 +2,67 @@
 
 STORE_FILE_NAME = "bwee_home_data.json"
 REQUEST_TIMEOUT = 10
+# 乐观更新等待 res/light/update 回显的超时（秒）
+COMMAND_ECHO_TIMEOUT = 5
+# 渐变与效果的帧间隔（秒）
+TRANSITION_FRAME_INTERVAL = 0.2
+# 不限速时每帧最多发送的设备指令数
+TRANSITION_FRAME_BUDGET = 10
+# 限速时渐变与效果最多占用的请求配额比例，其余留给用户指令
+TRANSITION_RATE_SHARE = 0.75
+# 每个网关每秒允许的请求数，小于等于 0 表示不限速
+API_RATE_LIMIT = 20
+# 令牌桶容量（允许的突发请求数）
+API_RATE_BURST = 10
+# 通过 MQTT 发送控制指令（需要网关固件支持），关闭时只使用 HTTP
+MQTT_COMMAND_ENABLED = False
+# MQTT 控制指令主题
+MQTT_COMMAND_TOPIC = "req/light/update"
+# 等待 MQTT 指令回显的超时（秒），超时后改用 HTTP
+MQTT_COMMAND_TIMEOUT = 1.0
+# 流式解码时每次读取的响应字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+# GET 的自适应超时：p99 的倍数，限制在 [下限, REQUEST_TIMEOUT] 之间
+REQUEST_TIMEOUT_FACTOR = 3
+REQUEST_TIMEOUT_MIN = 1.0
+# 接口样本数达到该值后才使用自适应超时和对冲请求
+REQUEST_TIMEOUT_MIN_SAMPLES = 20
+# GET 请求在 p95 仍未返回时再发一次，取先返回的结果
+API_HEDGE_READS = True
+# 资源读取缓存：条目最长有效期（秒）和最大条目数，期间由 MQTT 事件更新或失效
+RESOURCE_CACHE_TTL = 60
+RESOURCE_CACHE_SIZE = 1024
+# 网关推送的状态每个实体每秒最多写入的次数，小于等于 0 表示不限制
+STATE_WRITE_MAX_RATE = 2
+# 响应体超过该字节数后在线程池中解码，避免阻塞事件循环；小于等于 0 表示始终在事件循环中解码
+DECODE_OFFLOAD_THRESHOLD = 256 * 1024
+# 解码线程数
+DECODE_WORKERS = 1
+# 设备超过该秒数没有任何消息时主动探测，探测失败则标记为不可用
+HEARTBEAT_TIMEOUT = 300
+# 心跳时间轮的节拍（秒）和槽数
+HEARTBEAT_TICK = 1.0
+HEARTBEAT_WHEEL_SLOTS = 512
+# 同一批超时的设备超过该数量时，改为重新拉取整个设备列表
+HEARTBEAT_PROBE_BULK = 50
+# 站点一直没有消息时，每次整表拉取成功后下次探测的间隔翻倍，最多为超时的该倍数
+HEARTBEAT_PROBE_BACKOFF = 8
+# 灯具支持的色温范围（开尔文）
+MIN_KELVIN = 2000
+MAX_KELVIN = 6500
+# 自适应照明的计算间隔（秒）
+ADAPTIVE_INTERVAL = 60
+# 自适应照明的默认曲线：亮度范围（1-100）、日出和日落（小时）
+ADAPTIVE_MIN_BRIGHTNESS = 30
+ADAPTIVE_MAX_BRIGHTNESS = 100
+ADAPTIVE_SUNRISE = 6.0
+ADAPTIVE_SUNSET = 20.0
+# 当前亮度（1-100）和色温（K）与目标相差不超过该值时不再发送
+ADAPTIVE_BRIGHTNESS_TOLERANCE = 2
+ADAPTIVE_KELVIN_TOLERANCE = 100
+# 网关不可达时暂存控制指令：每个网关最多暂存的灯数、指令有效期（秒）、重试间隔（秒）
+OUTBOX_SIZE = 256
+OUTBOX_TTL = 60
+OUTBOX_RETRY_INTERVAL = 5
+# 新指令触发的重发，在上次重发失败后至少间隔的秒数
+OUTBOX_PROBE_INTERVAL = 1
@@ -1,25 +1,43 @@
 """调用light相关接口."""
 
 from . import API, Result
+from .enums import RequestPriority
 from .forms import ControlForm, SearchForm
 from .models import Device
 from .utils import dataclass_to_dict
 
 
-async def get_all_devices(form: SearchForm) -> Result[Device]:
+async def get_all_devices(
+    form: SearchForm, priority: RequestPriority = RequestPriority.BULK
+) -> Result[Device]:
     """Get devices."""
     return await API.get(
-        "/clip/v2/resource/device", params=dataclass_to_dict(form), data_type=Device
+        "/clip/v2/resource/device",
+        params=dataclass_to_dict(form),
+        data_type=Device,
+        priority=priority,
+        # 设备列表可能很大，逐个解码，避免同时持有文本、字典和对象三份数据
+        stream=True,
     )
 
 
-async def device_by_uuid(device_uuid: str) -> Result[Device]:
+async def device_by_uuid(
+    device_uuid: str, priority: RequestPriority = RequestPriority.REFRESH
+) -> Result[Device]:
     """Get devices."""
-    return await API.get(f"/clip/v2/resource/device/{device_uuid}", data_type=Device)
+    return await API.get(
+        f"/clip/v2/resource/device/{device_uuid}", data_type=Device, priority=priority
+    )
 
 
-async def device_control(device_uuid: str, form: ControlForm) -> Result:
+async def device_control(
+    device_uuid: str,
+    form: ControlForm,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+) -> Result:
     """Control devices."""
     return await API.put(
-        f"/clip/v2/resource/device/{device_uuid}/light", data=dataclass_to_dict(form)
+        f"/clip/v2/resource/device/{device_uuid}/light",
+        data=dataclass_to_dict(form),
+        priority=priority,
     )
@@ -1,6 +1,6 @@
 """Bwee enums."""
 
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class DeviceSupport(Enum):
@@ -27,3 +27,11 @@ class DeviceSupport(Enum):
                 if device_support.support_code == support:
                     return device_support
         return DeviceSupport.NONE
+
+
+class RequestPriority(IntEnum):
+    """请求优先级，数值越小越优先."""
+
+    INTERACTIVE = 0  # 用户控制
+    REFRESH = 1  # 状态刷新
+    BULK = 2  # 批量同步
@@ -1,6 +1,7 @@
 """调用网关本身的接口."""
 
 from . import API, Result
+from .enums import RequestPriority
 from .models import GatewayInfo, User
 
 
@@ -13,6 +14,7 @@ async def get_auth(gateway_ip) -> Result[User]:
         None,
         {"device_type": "bweetech#home_assistant"},
         data_type=User,
+        priority=RequestPriority.INTERACTIVE,
     )
 
 
@@ -0,0 +1,83 @@
+"""Last-seen tracking of devices on a single timer wheel."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import time
+from typing import Any
+
+from .const import HEARTBEAT_TICK, HEARTBEAT_TIMEOUT, HEARTBEAT_WHEEL_SLOTS
+from .utils.timer_wheel import TimerWheel
+
+
+class HeartbeatMonitor:
+    """Report devices that have not been seen for ``timeout`` seconds.
+
+    Every sighting pushes the device's deadline back on one hashed timer
+    wheel. A single loop timer advances the wheel once per tick while any
+    device is tracked. Devices that expire in the same tick are reported
+    together, as one batch, to ``on_expired``.
+    """
+
+    def __init__(
+        self,
+        on_expired: Callable[[list[str]], None],
+        timeout: float = HEARTBEAT_TIMEOUT,
+        tick: float = HEARTBEAT_TICK,
+        slots: int = HEARTBEAT_WHEEL_SLOTS,
+    ) -> None:
+        """Init monitor."""
+        self.on_expired = on_expired
+        self.timeout = timeout
+        self._tick = tick
+        self._slots = slots
+        self._wheel = TimerWheel(tick, slots)
+        self._timer: asyncio.TimerHandle | None = None
+        self.expired = 0  # 超时的设备数
+        self.batches = 0  # 超时批次数
+
+    def seen(self, device_id: str, timeout: float | None = None) -> None:
+        """Record a sign of life from a device, (re)starting its deadline."""
+        self._wheel.schedule(device_id, time.monotonic() + (timeout or self.timeout))
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self._tick, self._on_tick
+            )
+
+    def seen_all(self, device_ids: list[str], timeout: float | None = None) -> None:
+        """Record a sign of life from many devices, e.g. a poll result."""
+        for device_id in device_ids:
+            self.seen(device_id, timeout)
+
+    def forget(self, device_id: str) -> None:
+        """Stop tracking a removed device."""
+        self._wheel.cancel(device_id)
+
+    def _on_tick(self) -> None:
+        self._timer = None
+        expired = self._wheel.advance(time.monotonic())
+        if len(self._wheel):
+            self._timer = asyncio.get_running_loop().call_later(
+                self._tick, self._on_tick
+            )
+        if expired:
+            self.expired += len(expired)
+            self.batches += 1
+            self.on_expired(expired)
+
+    def close(self) -> None:
+        """Stop the timer and forget every device."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._wheel = TimerWheel(self._tick, self._slots)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters, for diagnostics."""
+        return {
+            "timeout": self.timeout,
+            "tracked": len(self._wheel),
+            "expired": self.expired,
+            "batches": self.batches,
+        }
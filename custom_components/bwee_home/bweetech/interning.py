@@ -0,0 +1,95 @@
+"""Shared Room and Product instances across devices."""
+
+from __future__ import annotations
+
+from dataclasses import astuple
+import sys
+from typing import Any
+
+from .models import Device, Product, Room
+from .patch import ROOM_PATCHER
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+class ModelInterner:
+    """Flyweight tables for the sub-objects that repeat across devices.
+
+    Rooms are keyed by id, so every device in a room points at the same
+    Room and a later payload updates it for all of them. The ids of the
+    rooms changed that way are kept until pop_updated_rooms, so the caller
+    can write every entity in them. Products are keyed by content. Type
+    strings are interned.
+    """
+
+    def __init__(self) -> None:
+        """Init tables."""
+        self._rooms: dict[str, Room] = {}
+        self._products: dict[tuple, Product] = {}
+        self._updated_rooms: set[str] = set()
+
+    def intern_devices(self, devices: list[Device]) -> list[Device]:
+        """Intern every device in place, return the list."""
+        for device in devices:
+            self.intern_device(device)
+        return devices
+
+    def intern_device(self, device: Device) -> Device:
+        """Replace the device's room, product and type strings by shared ones."""
+        device.type = _intern(device.type)
+        if device.ext_room is not None:
+            device.ext_room = self.intern_room(device.ext_room)
+        if device.product is not None:
+            device.product = self.intern_product(device.product)
+        for service in device.services or ():
+            service.rtype = _intern(service.rtype)
+        for light in device.ext_light or ():
+            light.type = _intern(light.type)
+        return device
+
+    def intern_room(self, room: Room) -> Room:
+        """Return the shared room with this id, updated from room."""
+        if room.id is None:
+            return room
+        shared = self._rooms.get(room.id)
+        if shared is None:
+            room.type = _intern(room.type)
+            self._rooms[room.id] = room
+            return room
+        if shared is not room:
+            # 以最新的数据为准，所有设备同时生效；局部更新只带部分字段
+            self._merge_room(shared, room)
+        return shared
+
+    def update_room(self, room: Room, patch: dict[str, Any]) -> bool:
+        """Merge a partial room payload into a (shared) room."""
+        return self._merge_room(room, patch)
+
+    def _merge_room(self, shared: Room, patch: Room | dict[str, Any]) -> bool:
+        if not ROOM_PATCHER.apply(shared, patch):
+            return False
+        shared.type = _intern(shared.type)
+        if shared.id is not None:
+            self._updated_rooms.add(shared.id)
+        return True
+
+    def pop_updated_rooms(self) -> set[str]:
+        """Return and reset the ids of the rooms changed since the last call."""
+        updated, self._updated_rooms = self._updated_rooms, set()
+        return updated
+
+    def intern_product(self, product: Product) -> Product:
+        """Return the shared product with the same content."""
+        return self._products.setdefault(astuple(product), product)
+
+    def clear(self) -> None:
+        """Forget every shared instance."""
+        self._rooms.clear()
+        self._products.clear()
+        self._updated_rooms.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Table sizes, for diagnostics."""
+        return {"rooms": len(self._rooms), "products": len(self._products)}
@@ -1,28 +1,51 @@
 """调用light相关接口."""
 
 from . import API, Result
+from .enums import RequestPriority
 from .forms import ControlForm
 from .models import Light
+from .resource_cache import LIGHT_URL, RESOURCE_CACHE
 from .utils import dataclass_to_dict
 
 
-async def get_all_lights() -> Result[Light]:
+async def get_all_lights(
+    priority: RequestPriority = RequestPriority.BULK,
+) -> Result[Light]:
     """Get lights."""
-    return await API.get("/clip/v2/resource/light", data_type=Light)
+    return await API.get("/clip/v2/resource/light", data_type=Light, priority=priority)
 
 
-async def get_lights(device_uuid: str) -> Result[Light]:
+async def get_lights(
+    device_uuid: str,
+    priority: RequestPriority = RequestPriority.REFRESH,
+    use_cache: bool = True,
+) -> Result[Light]:
     """Get lights."""
-    return await API.get(f"/clip/v2/resource/light/{device_uuid}", data_type=Light)
+    url = f"{LIGHT_URL}/{device_uuid}"
 
+    def fetch():
+        return API.get(url, data_type=Light, priority=priority)
 
-async def light_by_uuid(light_uuid: str) -> Result[Light]:
+    return await RESOURCE_CACHE.read(url, fetch) if use_cache else await fetch()
+
+
+async def light_by_uuid(
+    light_uuid: str, priority: RequestPriority = RequestPriority.REFRESH
+) -> Result[Light]:
     """Get lights."""
-    return await API.get(f"/clip/v2/resource/light/{light_uuid}", data_type=Light)
+    return await API.get(
+        f"/clip/v2/resource/light/{light_uuid}", data_type=Light, priority=priority
+    )
 
 
-async def light_control(light_uuid: str, form: ControlForm) -> Result:
+async def light_control(
+    light_uuid: str,
+    form: ControlForm,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+) -> Result:
     """Control lights."""
     return await API.put(
-        f"/clip/v2/resource/light/{light_uuid}", data=dataclass_to_dict(form)
+        f"/clip/v2/resource/light/{light_uuid}",
+        data=dataclass_to_dict(form),
+        priority=priority,
     )
@@ -1,23 +1,40 @@
 """Mqtt client utils."""
 
 import asyncio
-from collections.abc import Callable
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 import logging
+from typing import Any
 
 import paho.mqtt.client as mqtt
 
 from .models import Device, DeviceUpdatePayload, LightUpdatePayload, Resource
+from .profiler import profiled
 from .utils import json_to_bean
 
 _LOGGER = logging.getLogger(__name__)
 
 
-ALL_TOPICS = [
-    "res/device/add",  # 添加设备
-    "res/device/remove",  # 删除设备
-    "res/device/update",  # 更新设备
-    "res/light/update",  # 灯具更新
-]
+# 订阅网关的全部资源事件
+SUBSCRIBE_TOPIC = "res/#"
+
+# 主题及其负载类型
+TOPIC_TYPES: dict[str, type] = {
+    "res/device/add": list[Device],  # 添加设备
+    "res/device/remove": list[Resource],  # 删除设备
+    "res/device/update": list[DeviceUpdatePayload],  # 更新设备
+    "res/light/update": list[LightUpdatePayload],  # 灯具更新
+}
+
+
+@dataclass
+class MqttRoute:
+    """Decoder and handler of one topic."""
+
+    data_type: type = None  # 负载解码的目标类型
+    handler: Callable[[Any], Awaitable[None]] = None  # 事件处理协程
+    count: int = 0  # 已分发的消息数
 
 
 class MqttServiceForGateway:
@@ -30,39 +47,12 @@ class MqttServiceForGateway:
         """Init mqtt client."""
         self._mqtt = mqtt.Client()
         self._ip = ip_address
-        self._on_device_add: (
-            Callable[
-                [
-                    list[Device],
-                ]
-            ]
-            | None
-        ) = None
-        self._on_device_remove: (
-            Callable[
-                [
-                    list[Resource],
-                ]
-            ]
-            | None
-        ) = None
-        self._on_device_update: (
-            Callable[
-                [
-                    list[DeviceUpdatePayload],
-                ]
-            ]
-            | None
-        ) = None
-        self._on_light_update: (
-            Callable[
-                [
-                    list[LightUpdatePayload],
-                ]
-            ]
-            | None
-        ) = None
         self.loop = asyncio.get_event_loop()
+        self._routes: dict[str, MqttRoute] = {}
+        self.unknown_topics: Counter[str] = Counter()  # 未注册主题的消息数
+        self.decode_errors = 0  # 解码失败的消息数
+        # 连接（或重连）成功后在事件循环中调用
+        self.on_connected: Callable[[], None] | None = None
 
     def connect(self) -> None:
         """Gateway connect ."""
@@ -80,70 +70,101 @@ class MqttServiceForGateway:
     def init_subscribe(self) -> None:
         """Init subscribe topic."""
 
-    def on_connect(self, _, __, ___, ____, _____=None) -> None:
+    @property
+    def connected(self) -> bool:
+        """Return True while the MQTT session is up."""
+        return self._mqtt.is_connected()
+
+    def publish(self, topic: str, payload: str) -> bool:
+        """Publish a message, return False if it could not be queued."""
+        info = self._mqtt.publish(topic, payload, qos=1)
+        return info.rc == mqtt.MQTT_ERR_SUCCESS
+
+    def register(
+        self,
+        topic: str,
+        data_type: type,
+        handler: Callable[[Any], Awaitable[None]] | None,
+    ) -> None:
+        """Route a topic to a handler, the payload is decoded as data_type."""
+        if handler is None:
+            self._routes.pop(topic, None)
+            return
+        self._routes[topic] = MqttRoute(data_type=data_type, handler=handler)
+
+    def _route_handler(self, topic: str) -> Callable | None:
+        route = self._routes.get(topic)
+        return route.handler if route else None
+
+    def on_connect(self, _, __, ___, rc, _____=None) -> None:
         """Mqtt connected callback."""
-        # 订阅指令主题
-        for topic in ALL_TOPICS:
-            self._mqtt.subscribe(topic, qos=1)
+        # 订阅全部资源事件，按路由表分发
+        self._mqtt.subscribe(SUBSCRIBE_TOPIC, qos=1)
+        if rc == 0 and self.on_connected:
+            self.loop.call_soon_threadsafe(self.on_connected)
 
+    @profiled
     def on_message(self, _, __, msg):
         """Receive mqtt message."""
-        topic = msg.topic
+        route = self._routes.get(msg.topic)
+        if route is None:
+            self.unknown_topics[msg.topic] += 1
+            _LOGGER.debug("No route for topic %s", msg.topic)
+            return
         payload = msg.payload.decode()
-        _LOGGER.info("Received command: %s from %s", payload, msg.topic)
-        if topic == "res/device/add":
-            if self.on_device_add:
-                data = json_to_bean(payload, list[Device])
-                asyncio.run_coroutine_threadsafe(self.on_device_add(data), self.loop)
-        if topic == "res/device/remove":
-            if self.on_device_remove:
-                data = json_to_bean(payload, list[Resource])
-                asyncio.run_coroutine_threadsafe(self.on_device_remove(data), self.loop)
-        if topic == "res/device/update":
-            if self.on_device_update:
-                data = json_to_bean(payload, list[DeviceUpdatePayload])
-                asyncio.run_coroutine_threadsafe(self.on_device_update(data), self.loop)
-        if topic == "res/light/update":
-            if self.on_light_update:
-                data = json_to_bean(payload, list[LightUpdatePayload])
-                asyncio.run_coroutine_threadsafe(self.on_light_update(data), self.loop)
+        _LOGGER.debug("Received command: %s from %s", payload, msg.topic)
+        try:
+            data = json_to_bean(payload, route.data_type)
+        except Exception:
+            self.decode_errors += 1
+            _LOGGER.exception("Failed to decode message from %s", msg.topic)
+            return
+        route.count += 1
+        asyncio.run_coroutine_threadsafe(route.handler(data), self.loop)
 
     @property
     def on_device_add(self):
         """Device add envent."""
-        return self._on_device_add
+        return self._route_handler("res/device/add")
 
     @on_device_add.setter
     def on_device_add(self, func: Callable | None) -> None:
-        self._on_device_add = func
+        self.register("res/device/add", TOPIC_TYPES["res/device/add"], func)
 
     @property
     def on_device_remove(self):
         """Device add envent."""
-        return self._on_device_remove
+        return self._route_handler("res/device/remove")
 
     @on_device_remove.setter
     def on_device_remove(self, func: Callable | None) -> None:
-        self._on_device_remove = func
+        self.register("res/device/remove", TOPIC_TYPES["res/device/remove"], func)
 
     @property
     def on_device_update(self):
         """Device add envent."""
-        return self._on_device_update
+        return self._route_handler("res/device/update")
 
     @on_device_update.setter
     def on_device_update(self, func: Callable | None) -> None:
-        self._on_device_update = func
-        return self._on_device_update
+        self.register("res/device/update", TOPIC_TYPES["res/device/update"], func)
 
     @property
     def on_light_update(self):
         """Device add envent."""
-        return self._on_light_update
+        return self._route_handler("res/light/update")
 
     @on_light_update.setter
     def on_light_update(self, func: Callable | None) -> None:
-        self._on_light_update = func
+        self.register("res/light/update", TOPIC_TYPES["res/light/update"], func)
 
     def on_disconnect(self, _, __, ___):
         """Mqtt disconnect."""
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters, for diagnostics."""
+        return {
+            "routes": {topic: route.count for topic, route in self._routes.items()},
+            "unknown_topics": dict(self.unknown_topics),
+            "decode_errors": self.decode_errors,
+        }
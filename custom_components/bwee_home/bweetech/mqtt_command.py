@@ -0,0 +1,114 @@
+"""Light commands over the gateway MQTT session, acknowledged by their echo."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from .command_tracker import form_to_values
+from .const import MQTT_COMMAND_TIMEOUT, MQTT_COMMAND_TOPIC
+from .forms import ControlForm
+from .models import LightUpdateValue
+from .mqtt_client import MqttServiceForGateway
+from .utils import dataclass_to_dict
+from .utils.stats import LatencyStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MqttCommandChannel:
+    """Publish control commands and wait for the res/light/update echo.
+
+    A command counts as acknowledged when an echo for the same light carries
+    the values it set. Without an ack within ``timeout`` the caller gets
+    False and is expected to fall back to HTTP.
+    """
+
+    def __init__(
+        self,
+        service: MqttServiceForGateway,
+        timeout: float = MQTT_COMMAND_TIMEOUT,
+        topic: str = MQTT_COMMAND_TOPIC,
+    ) -> None:
+        """Init channel."""
+        self._service = service
+        self._timeout = timeout
+        self._topic = topic
+        # 灯ID -> 等待回显的指令 (期望的值, future)
+        self._waiters: dict[str, list[tuple[dict[str, Any], asyncio.Future]]] = {}
+        self.latency = LatencyStats()
+        self.sent = 0  # 已发布的指令数
+        self.acked = 0  # 收到回显的指令数
+        self.timeouts = 0  # 超时未回显的指令数
+        self.unavailable = 0  # MQTT 未连接，直接使用 HTTP 的指令数
+
+    async def send(self, device_id: str, light_id: str, form: ControlForm) -> bool:
+        """Publish a command, return True once the gateway echoed it."""
+        if not self._service.connected:
+            self.unavailable += 1
+            return False
+        expected = form_to_values(form)
+        future = asyncio.get_running_loop().create_future()
+        waiter = (expected, future)
+        self._waiters.setdefault(light_id, []).append(waiter)
+        payload = json.dumps(
+            {"device_id": device_id, "id": light_id, "value": dataclass_to_dict(form)}
+        )
+        sent_at = time.monotonic()
+        try:
+            if not self._service.publish(self._topic, payload):
+                self.unavailable += 1
+                return False
+            self.sent += 1
+            await asyncio.wait_for(future, self._timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            _LOGGER.debug("No ack for MQTT command on %s", light_id)
+            return False
+        finally:
+            self._discard(light_id, waiter)
+        self.acked += 1
+        self.latency.add(time.monotonic() - sent_at)
+        return True
+
+    def on_echo(self, light_id: str, value: LightUpdateValue) -> None:
+        """Resolve the commands on a light that an echo confirms."""
+        waiters = self._waiters.get(light_id)
+        if not waiters or value is None:
+            return
+        for expected, future in waiters:
+            overlap = [name for name in expected if getattr(value, name, None) is not None]
+            if (
+                overlap
+                and not future.done()
+                and all(getattr(value, name) == expected[name] for name in overlap)
+            ):
+                future.set_result(None)
+
+    def _discard(self, light_id: str, waiter: tuple) -> None:
+        waiters = self._waiters.get(light_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[light_id]
+
+    def close(self) -> None:
+        """Cancel every waiting command."""
+        for waiters in self._waiters.values():
+            for _, future in waiters:
+                future.cancel()
+        self._waiters.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters and latency, for diagnostics."""
+        return {
+            "pending": sum(len(waiters) for waiters in self._waiters.values()),
+            "sent": self.sent,
+            "acked": self.acked,
+            "timeouts": self.timeouts,
+            "unavailable": self.unavailable,
+            "ack_latency": self.latency.as_dict(),
+        }
@@ -0,0 +1,174 @@
+"""Commands held while the gateway is unreachable, replayed when it is back."""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, fields, replace
+import logging
+import time
+from typing import Any
+
+from .const import OUTBOX_SIZE, OUTBOX_TTL
+from .forms import ControlForm
+
+_LOGGER = logging.getLogger(__name__)
+
+_FORM_FIELDS = tuple(field.name for field in fields(ControlForm))
+# 色温与 XY / 分段颜色互斥，只保留最新设置的一种
+_COLOR_CW = ("color_cw",)
+_COLOR_XY = ("color_x", "color_y", "color_arr")
+
+
+@dataclass
+class QueuedCommand:
+    """The latest intent for one light."""
+
+    device_id: str = None  # 设备ID
+    light_id: str = None  # 灯ID
+    form: ControlForm = None  # 合并后的指令
+    queued_at: float = 0.0  # 最早一条指令的入队时间
+    merged: int = 0  # 合并进来的指令数
+
+
+def merge_forms(older: ControlForm, newer: ControlForm) -> ControlForm:
+    """Overlay the set fields of newer on older.
+
+    Turning off replaces everything queued before. A color temperature
+    clears a queued xy color and the other way around.
+    """
+    if newer.on == 0:
+        return replace(newer)
+    merged = replace(older)
+    if newer.color_cw is not None:
+        for name in _COLOR_XY:
+            setattr(merged, name, None)
+    elif any(getattr(newer, name) is not None for name in _COLOR_XY):
+        for name in _COLOR_CW:
+            setattr(merged, name, None)
+    for name in _FORM_FIELDS:
+        value = getattr(newer, name)
+        if value is not None:
+            setattr(merged, name, value)
+    return merged
+
+
+class CommandOutbox:
+    """Bounded per-gateway queue of failed light commands.
+
+    Commands are keyed by light; a newer command merges into the queued
+    one so a replay only sends the latest intent. When full, the oldest
+    light's command is dropped. Commands queued longer than ``ttl``
+    seconds are dropped on the next drain. Every drop is logged and
+    reported to ``on_drop`` with its reason.
+    """
+
+    def __init__(
+        self,
+        on_drop: Callable[[QueuedCommand, str], None] | None = None,
+        maxsize: int = OUTBOX_SIZE,
+        ttl: float = OUTBOX_TTL,
+    ) -> None:
+        """Init outbox."""
+        self._on_drop = on_drop
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._commands: OrderedDict[str, QueuedCommand] = OrderedDict()
+        self.queued = 0  # 入队的指令数
+        self.merged = 0  # 合并的指令数
+        self.replayed = 0  # 重发成功的指令数
+        self.dropped: Counter[str] = Counter()  # 按原因统计的丢弃数
+
+    def put(self, device_id: str, light_id: str, form: ControlForm) -> None:
+        """Queue a command, merged into the one queued for the same light."""
+        self.queued += 1
+        queued = self._commands.get(light_id)
+        if queued is not None:
+            queued.form = merge_forms(queued.form, form)
+            queued.merged += 1
+            self.merged += 1
+            return
+        if len(self._commands) >= self.maxsize:
+            _, oldest = self._commands.popitem(last=False)
+            self._drop(oldest, "full")
+        self._commands[light_id] = QueuedCommand(
+            device_id=device_id,
+            light_id=light_id,
+            form=replace(form),
+            queued_at=time.monotonic(),
+        )
+
+    def requeue(self, commands: list[QueuedCommand]) -> None:
+        """Put back commands whose replay failed, keeping their age.
+
+        Commands queued for the same lights during the replay are newer
+        and are merged on top.
+        """
+        # 倒序插到队首，保持原来的顺序，满了时先丢弃
+        for command in reversed(commands):
+            newer = self._commands.pop(command.light_id, None)
+            if newer is not None:
+                command.form = merge_forms(command.form, newer.form)
+                command.merged += newer.merged + 1
+            self._commands[command.light_id] = command
+            self._commands.move_to_end(command.light_id, last=False)
+
+    def drain(self) -> list[QueuedCommand]:
+        """Drop expired commands, then remove and return the rest in order."""
+        deadline = time.monotonic() - self.ttl
+        commands = []
+        for command in self._commands.values():
+            if command.queued_at <= deadline:
+                self._drop(command, "expired")
+            else:
+                commands.append(command)
+        self._commands.clear()
+        return commands
+
+    def discard(self, light_id: str) -> None:
+        """Forget the command of a removed light."""
+        self._commands.pop(light_id, None)
+
+    def drop(self, command: QueuedCommand, reason: str) -> None:
+        """Give up on a drained command."""
+        self._drop(command, reason)
+
+    def _drop(self, command: QueuedCommand, reason: str) -> None:
+        self.dropped[reason] += 1
+        _LOGGER.warning(
+            "Dropped queued command for light %s (%s, queued %.0fs ago): %s",
+            command.light_id,
+            reason,
+            time.monotonic() - command.queued_at,
+            command.form,
+        )
+        if self._on_drop:
+            self._on_drop(command, reason)
+
+    def clear(self) -> None:
+        """Forget every command without reporting drops."""
+        self._commands.clear()
+
+    def __contains__(self, light_id: str) -> bool:
+        """Return True if a command is queued for the light."""
+        return light_id in self._commands
+
+    def __len__(self) -> int:
+        """Number of lights with a queued command."""
+        return len(self._commands)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Depth and counters, for diagnostics."""
+        oldest = next(iter(self._commands.values()), None)
+        return {
+            "depth": len(self._commands),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "oldest_age": (
+                round(time.monotonic() - oldest.queued_at, 1) if oldest else None
+            ),
+            "queued": self.queued,
+            "merged": self.merged,
+            "replayed": self.replayed,
+            "dropped": dict(self.dropped),
+        }
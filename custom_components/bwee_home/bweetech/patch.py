@@ -0,0 +1,108 @@
+"""Apply partial update payloads to the stored models."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import fields, is_dataclass
+import logging
+from typing import Any, Generic, TypeVar, get_origin, get_type_hints
+
+from .models import Device, Light, Room
+from .utils import dict_to_bean
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _to_int(value: Any) -> Any:
+    # 设备更新的 value 声明为 dict[str, str]，数字可能以字符串形式下发
+    return int(value) if isinstance(value, str) else value
+
+
+def _converter(field_type: Any) -> Callable[[Any], Any] | None:
+    """Return how a raw payload value becomes a value of field_type.
+
+    Nested dataclasses and lists are rebuilt whole from the payload, so a
+    partial nested value replaces the stored one; callers merge those
+    fields themselves (see ROOM_PATCHER).
+    """
+    origin = get_origin(field_type) or field_type
+    if origin is list or is_dataclass(origin):
+        return lambda value: dict_to_bean(value, field_type)
+    if field_type is int:
+        return _to_int
+    return None
+
+
+class ModelPatcher(Generic[T]):
+    """Patch one dataclass type from dicts or from other dataclasses.
+
+    The field lookups and value converters are built once per type, so
+    applying a payload is one dict lookup per key. ``apply`` returns the
+    names of the fields whose value actually changed.
+    """
+
+    def __init__(self, cls: type[T]) -> None:
+        """Build the setters of cls."""
+        self.cls = cls
+        hints = get_type_hints(cls)
+        # 负载键 -> (字段名, 转换函数)
+        self._setters: dict[str, tuple[str, Callable[[Any], Any] | None]] = {}
+        self._names: set[str] = set()
+        for field in fields(cls):
+            key = field.metadata.get("json_key", field.name)
+            self._setters[key] = (field.name, _converter(hints[field.name]))
+            self._names.add(field.name)
+        # 来源数据类 -> 可以写入的字段
+        self._source_fields: dict[type, tuple[str, ...]] = {}
+        self.unknown: Counter[str] = Counter()  # 无法识别的键
+
+    def accepts(self, patch: dict[str, Any]) -> bool:
+        """Return True if every key of patch maps to a field."""
+        return all(key in self._setters for key in patch)
+
+    def _dataclass_items(self, patch: Any) -> Iterator[tuple[str, Any]]:
+        source = type(patch)
+        names = self._source_fields.get(source)
+        if names is None:
+            names = tuple(f.name for f in fields(source) if f.name in self._names)
+            self._source_fields[source] = names
+        for name in names:
+            yield name, getattr(patch, name)
+
+    def apply(self, target: T, patch: Any) -> list[str]:
+        """Write the non-None values of patch into target.
+
+        Returns the names of the fields that changed.
+        """
+        if patch is None:
+            return []
+        items = patch.items() if isinstance(patch, dict) else self._dataclass_items(patch)
+        changed = []
+        for key, value in items:
+            if value is None:
+                continue
+            setter = self._setters.get(key)
+            if setter is None:
+                self.unknown[key] += 1
+                continue
+            name, convert = setter
+            if convert is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError):
+                    _LOGGER.warning(
+                        "Invalid %s.%s in update: %r", self.cls.__name__, name, value
+                    )
+                    continue
+            if getattr(target, name) != value:
+                setattr(target, name, value)
+                changed.append(name)
+        return changed
+
+
+DEVICE_PATCHER: ModelPatcher[Device] = ModelPatcher(Device)
+LIGHT_PATCHER: ModelPatcher[Light] = ModelPatcher(Light)
+ROOM_PATCHER: ModelPatcher[Room] = ModelPatcher(Room)
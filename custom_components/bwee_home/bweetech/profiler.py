@@ -0,0 +1,170 @@
+"""On-demand profiling of the integration's hot paths."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 只统计集成自身代码的内存分配
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class CallStats:
+    """Aggregated timing of one instrumented function."""
+
+    count: int = 0  # 调用次数
+    total: float = 0.0  # 累计耗时（秒），协程包含等待时间
+    max: float = 0.0  # 单次最长耗时（秒）
+
+
+class Profiler:
+    """Collect call counts, cumulative time and allocations while active.
+
+    Functions opt in with ``@profiled``. While the profiler is off the
+    wrapper only checks ``active`` and calls through. Properties, read far
+    more often, are registered with ``instrument_properties`` and only
+    wrapped between start and stop.
+    """
+
+    def __init__(self) -> None:
+        """Init profiler."""
+        self.active = False
+        self._stats: dict[str, CallStats] = {}
+        # on_message 在 paho 线程中调用
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self._traced = False  # 是否由本分析器开启了 tracemalloc
+        self._properties: list[tuple[type, tuple[str, ...]]] = []
+        self._originals: list[tuple[type, str, property]] = []
+
+    def start(self, allocations: bool = True, frames: int = 5) -> None:
+        """Reset the counters and start collecting."""
+        import tracemalloc  # noqa: PLC0415  只在分析时加载
+
+        self._stats = {}
+        self._started_at = time.time()
+        self._traced = allocations and not tracemalloc.is_tracing()
+        if self._traced:
+            tracemalloc.start(frames)
+        for cls, names in self._properties:
+            for name in names:
+                original = cls.__dict__.get(name)
+                if not isinstance(original, property):
+                    continue
+                timed = _timed(original.fget, f"{cls.__qualname__}.{name}")
+                setattr(cls, name, property(timed))
+                self._originals.append((cls, name, original))
+        self.active = True
+
+    def instrument_properties(self, cls: type, names: tuple[str, ...]) -> None:
+        """Time reads of these properties of cls while active."""
+        self._properties.append((cls, names))
+
+    def stop(self, top: int = 25) -> dict[str, Any]:
+        """Stop collecting and return the report."""
+        import tracemalloc  # noqa: PLC0415
+
+        self.active = False
+        for cls, name, original in self._originals:
+            setattr(cls, name, original)
+        self._originals.clear()
+        allocations = []
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(True, os.path.join(_PACKAGE_DIR, "*"))]
+            )
+            for stat in snapshot.statistics("lineno")[:top]:
+                frame = stat.traceback[0]
+                allocations.append(
+                    {
+                        "location": f"{frame.filename}:{frame.lineno}",
+                        "size_kib": round(stat.size / 1024, 1),
+                        "count": stat.count,
+                    }
+                )
+            if self._traced:
+                tracemalloc.stop()
+                self._traced = False
+        calls = sorted(
+            self._stats.items(), key=lambda item: item[1].total, reverse=True
+        )
+        return {
+            "started": self._started_at,
+            "duration_s": round(time.time() - self._started_at, 1),
+            "calls": [
+                {
+                    "name": name,
+                    "count": stats.count,
+                    "total_ms": round(stats.total * 1000, 2),
+                    "mean_ms": round(stats.total / stats.count * 1000, 4),
+                    "max_ms": round(stats.max * 1000, 2),
+                }
+                for name, stats in calls
+            ],
+            "allocations": allocations,
+        }
+
+    def record(self, name: str, elapsed: float) -> None:
+        """Add one call of name."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CallStats()
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+
+
+PROFILER = Profiler()
+
+
+def _timed(func: Callable, name: str) -> Callable:
+    """Wrap a sync function so every call is recorded."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            PROFILER.record(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+def profiled(func: F) -> F:
+    """Time calls of func while PROFILER is active."""
+    name = func.__qualname__
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not PROFILER.active:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.perf_counter() - start)
+
+        return async_wrapper
+
+    timed = _timed(func, name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILER.active:
+            return func(*args, **kwargs)
+        return timed(*args, **kwargs)
+
+    return wrapper
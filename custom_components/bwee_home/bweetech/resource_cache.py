@@ -0,0 +1,76 @@
+"""Read-through cache for gateway resources, kept fresh by MQTT events."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from copy import deepcopy
+from typing import Any
+
+from . import API, Result
+from .const import RESOURCE_CACHE_SIZE, RESOURCE_CACHE_TTL
+from .models import LightUpdateValue
+from .patch import LIGHT_PATCHER
+from .utils.cache import TTLCache
+
+LIGHT_URL = "/clip/v2/resource/light"
+
+
+class ResourceCache:
+    """Cache successful GET results by gateway and path.
+
+    Entries live for ``ttl`` seconds at most. In between, the MQTT events
+    patch the cached lights (res/light/update) or drop them (channel list
+    changes, res/device/remove), so reads do not go stale while cached.
+    The cache keeps its own copies; callers may change what they get.
+    """
+
+    def __init__(
+        self, maxsize: int = RESOURCE_CACHE_SIZE, ttl: float = RESOURCE_CACHE_TTL
+    ) -> None:
+        """Init cache."""
+        self._entries: TTLCache[Result] = TTLCache(maxsize, ttl)
+
+    async def read(
+        self, url: str, fetch: Callable[[], Awaitable[Result]]
+    ) -> Result:
+        """Return a copy of the cached result for url, or fetch and cache it."""
+        key = (API.gateway_host, url)
+        cached = self._entries.get(key)
+        if cached is not None:
+            return deepcopy(cached)
+        result = await fetch()
+        # 只缓存成功的结果，错误下次重新请求
+        if result.is_ok():
+            self._entries.put(key, deepcopy(result))
+        return result
+
+    def _items(self, url: str) -> list:
+        result = self._entries.peek((API.gateway_host, url))
+        if result is None or result.data is None:
+            return []
+        return result.data.arr or []
+
+    def patch_light(
+        self, device_id: str, light_id: str, value: LightUpdateValue
+    ) -> None:
+        """Apply a res/light/update to the cached light."""
+        if value is None:
+            return
+        for light in self._items(f"{LIGHT_URL}/{device_id}"):
+            if light.id == light_id:
+                LIGHT_PATCHER.apply(light, value)
+
+    def invalidate_device(self, device_id: str) -> None:
+        """Drop the lights cached for a device."""
+        self._entries.pop((API.gateway_host, f"{LIGHT_URL}/{device_id}"))
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Size and hit/miss/eviction counters, for diagnostics."""
+        return self._entries.as_dict()
+
+
+RESOURCE_CACHE = ResourceCache()
@@ -0,0 +1,242 @@
+"""Client-side transitions and effects driven by one tick per gateway."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import astuple, dataclass, field
+import logging
+import math
+import time
+
+from .const import TRANSITION_FRAME_BUDGET, TRANSITION_FRAME_INTERVAL
+from .forms import ControlForm
+from .models import Light
+from .utils import color_utils
+
+_LOGGER = logging.getLogger(__name__)
+
+EFFECT_BREATHE = "breathe"
+EFFECT_COLORLOOP = "colorloop"
+EFFECTS = (EFFECT_BREATHE, EFFECT_COLORLOOP)
+
+# 效果周期（秒）
+BREATHE_PERIOD = 4.0
+COLORLOOP_PERIOD = 20.0
+
+MIN_BRIGHTNESS = 1
+MAX_BRIGHTNESS = 100
+
+# 一批要发送的帧：(表单, 使用该表单的灯ID列表)
+FrameBatch = list[tuple[ControlForm, list[str]]]
+
+
+@dataclass
+class _Fade:
+    """One light fading, or running an effect."""
+
+    light_id: str = None  # 灯ID
+    start: dict[str, float] = field(default_factory=dict)  # 起始值
+    end: dict[str, float] = field(default_factory=dict)  # 目标值
+    started_at: float = None
+    duration: float = 0.0
+    turn_on: bool = False  # 渐变过程中保持开灯
+    final: ControlForm = None  # 最后一帧
+    effect: str = None  # 正在运行的效果
+    last_frame: tuple | None = None  # 上一次发送的帧
+    last_sent_at: float = 0.0
+
+
+def _kelvin_to_mired(kelvin: float) -> float:
+    return 1_000_000 / kelvin
+
+
+def _mired_to_kelvin(mired: float) -> int:
+    return round(1_000_000 / mired)
+
+
+class TransitionEngine:
+    """Interpolate brightness, color temperature and xy for many lights.
+
+    A single task ticks every ``frame_interval`` seconds while anything is
+    active. Each tick sends at most ``frame_budget()`` light commands;
+    lights that computed identical frames share one form, and lights left
+    over get priority on the next tick.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[FrameBatch], Awaitable[None]],
+        frame_interval: float = TRANSITION_FRAME_INTERVAL,
+        frame_budget: Callable[[], int] = lambda: TRANSITION_FRAME_BUDGET,
+    ) -> None:
+        """Init engine."""
+        self._send_batch = send_batch
+        self._frame_interval = frame_interval
+        self._frame_budget = frame_budget
+        self._fades: dict[str, _Fade] = {}
+        self._task: asyncio.Task | None = None
+        self.frames_sent = 0  # 已发送的灯光帧数
+        self.frames_deferred = 0  # 因超出预算推迟的帧数
+
+    def start(
+        self, light_id: str, light: Light, form: ControlForm, duration: float
+    ) -> None:
+        """Fade a light from its current state to the form over duration seconds."""
+        fade = _Fade(
+            light_id=light_id,
+            started_at=time.monotonic(),
+            duration=max(duration, self._frame_interval),
+        )
+        current = light.brightness or MAX_BRIGHTNESS
+        if form.on == 0:
+            # 渐暗后关灯，并恢复原亮度，下次开灯不会停在最低亮度
+            fade.start["brightness"] = current if light.on == 1 else MIN_BRIGHTNESS
+            fade.end["brightness"] = MIN_BRIGHTNESS
+            fade.final = ControlForm(on=0, brightness=current)
+        else:
+            fade.turn_on = True
+            fade.start["brightness"] = current if light.on == 1 else MIN_BRIGHTNESS
+            fade.end["brightness"] = form.brightness or current
+            # 无法插值的颜色（当前不在该模式）在第一帧直接切换
+            if form.color_cw is not None:
+                fade.end["mired"] = _kelvin_to_mired(form.color_cw)
+                fade.start["mired"] = (
+                    _kelvin_to_mired(light.color_cw)
+                    if light.color_cw and light.color_mode == 2
+                    else fade.end["mired"]
+                )
+            if form.color_x is not None and form.color_y is not None:
+                fade.end["color_x"] = form.color_x
+                fade.end["color_y"] = form.color_y
+                in_xy_mode = light.color_mode == 1 and light.color_x is not None
+                fade.start["color_x"] = light.color_x if in_xy_mode else form.color_x
+                fade.start["color_y"] = light.color_y if in_xy_mode else form.color_y
+            fade.final = ControlForm(
+                on=1,
+                brightness=fade.end["brightness"],
+                color_cw=form.color_cw,
+                color_x=form.color_x,
+                color_y=form.color_y,
+            )
+        self._fades[light_id] = fade
+        self._ensure_running()
+
+    def start_effect(self, light_id: str, light: Light, effect: str) -> None:
+        """Run a looping effect until stopped."""
+        if effect not in EFFECTS:
+            _LOGGER.warning("Unsupported effect: %s", effect)
+            return
+        fade = _Fade(
+            light_id=light_id,
+            started_at=time.monotonic(),
+            turn_on=True,
+            effect=effect,
+        )
+        fade.end["brightness"] = light.brightness or MAX_BRIGHTNESS
+        self._fades[light_id] = fade
+        self._ensure_running()
+
+    def stop(self, light_id: str) -> None:
+        """Stop the fade or effect of a light where it is."""
+        self._fades.pop(light_id, None)
+
+    def effect_of(self, light_id: str) -> str | None:
+        """Return the running effect of a light."""
+        fade = self._fades.get(light_id)
+        return fade.effect if fade else None
+
+    def is_active(self, light_id: str) -> bool:
+        """Return True while a light is fading or running an effect."""
+        return light_id in self._fades
+
+    async def close(self) -> None:
+        """Stop everything."""
+        self._fades.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """The shared tick."""
+        next_tick = time.monotonic()
+        while self._fades:
+            now = time.monotonic()
+            batch = self._next_batch(now)
+            if batch:
+                try:
+                    await self._send_batch(batch)
+                except Exception:
+                    _LOGGER.exception("Failed to send transition frames")
+            next_tick += self._frame_interval
+            # 发送耗时超过一帧时跳过落后的帧
+            next_tick = max(next_tick, time.monotonic())
+            await asyncio.sleep(next_tick - time.monotonic())
+
+    def _next_batch(self, now: float) -> FrameBatch:
+        """Compute this tick's frames within the budget."""
+        finals: list[tuple[_Fade, ControlForm]] = []
+        frames: list[tuple[_Fade, ControlForm]] = []
+        for fade in self._fades.values():
+            if fade.effect is None and now - fade.started_at >= fade.duration:
+                finals.append((fade, fade.final))
+                continue
+            form = self._frame(fade, now)
+            if astuple(form) != fade.last_frame:
+                frames.append((fade, form))
+        # 最后一帧优先，其余按等待时间排序
+        frames.sort(key=lambda item: item[0].last_sent_at)
+        selected = (finals + frames)[: self._frame_budget()]
+        self.frames_deferred += len(finals) + len(frames) - len(selected)
+
+        groups: dict[tuple, tuple[ControlForm, list[str]]] = {}
+        for fade, form in selected:
+            key = astuple(form)
+            fade.last_frame = key
+            fade.last_sent_at = now
+            if form is fade.final:
+                self._fades.pop(fade.light_id, None)
+            groups.setdefault(key, (form, []))[1].append(fade.light_id)
+        self.frames_sent += len(selected)
+        return list(groups.values())
+
+    def _frame(self, fade: _Fade, now: float) -> ControlForm:
+        """Interpolate one frame."""
+        form = ControlForm(on=1 if fade.turn_on else None)
+        elapsed = now - fade.started_at
+        if fade.effect == EFFECT_BREATHE:
+            phase = (1 - math.cos(2 * math.pi * elapsed / BREATHE_PERIOD)) / 2
+            top = fade.end["brightness"]
+            form.brightness = round(top - (top - MIN_BRIGHTNESS) * phase)
+            return form
+        if fade.effect == EFFECT_COLORLOOP:
+            hue = (elapsed / COLORLOOP_PERIOD * 360) % 360
+            # 量化到 2 度，便于多灯合并相同的帧
+            form.color_x, form.color_y = color_utils.hs_to_xy16(round(hue / 2) * 2, 100)
+            return form
+
+        progress = min(elapsed / fade.duration, 1.0)
+
+        def _lerp(name: str) -> float:
+            start = fade.start[name]
+            return start + (fade.end[name] - start) * progress
+
+        form.brightness = max(round(_lerp("brightness")), MIN_BRIGHTNESS)
+        if "mired" in fade.start:
+            form.color_cw = _mired_to_kelvin(_lerp("mired"))
+        if "color_x" in fade.start:
+            form.color_x = round(_lerp("color_x"))
+            form.color_y = round(_lerp("color_y"))
+        return form
+
+    def as_dict(self) -> dict[str, int]:
+        """Counters, for diagnostics."""
+        return {
+            "active": len(self._fades),
+            "frames_sent": self.frames_sent,
+            "frames_deferred": self.frames_deferred,
+        }
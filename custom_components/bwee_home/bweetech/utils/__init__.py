@@ -1,6 +1,6 @@
 """packages for bwee_home."""
 
-from .common_utils import dataclass_to_dict, json_to_bean
+from .common_utils import dataclass_to_dict, dict_to_bean, json_to_bean
 from .gateway_discovery import GatewayDiscovery
 
-__all__ = ["GatewayDiscovery", "dataclass_to_dict", "json_to_bean"]
+__all__ = ["GatewayDiscovery", "dataclass_to_dict", "dict_to_bean", "json_to_bean"]
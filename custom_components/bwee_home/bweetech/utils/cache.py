@@ -0,0 +1,82 @@
+"""Size-bounded LRU cache whose entries expire after a fixed TTL."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+import time
+from typing import Any, Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """LRU cache of at most ``maxsize`` entries, each valid for ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Init cache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # 键 -> (过期时间, 值)，按最近使用排序
+        self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # 超出容量被淘汰的条目数
+        self.expirations = 0  # 过期被丢弃的条目数
+
+    def get(self, key: Hashable) -> V | None:
+        """Return the live value for key, or None on a miss."""
+        value = self.peek(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> V | None:
+        """Return the live value for key without counting or reordering."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Store value, evicting the least recently used entries if full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> V | None:
+        """Remove key, return its value if it was cached."""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        """Number of entries, expired ones included until touched."""
+        return len(self._entries)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Size and counters, for diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,177 @@
+"""Color util.
+
+网关使用 16 位的 CIE xy 坐标（0-65535）和开尔文色温，这里负责与
+Home Assistant 的 RGB / HS / xy / 色温之间的转换。
+"""
+
+from __future__ import annotations
+
+import colorsys
+from functools import lru_cache
+
+from ..const import MAX_KELVIN, MIN_KELVIN
+from ..models import ColorXY
+
+# 网关 xy 坐标的量程
+XY_SCALE = 65535
+_XY_INV_SCALE = 1 / XY_SCALE
+
+# 默认色域（红、绿、蓝三个顶点的 xy 坐标），与 Home Assistant 使用的 Wide RGB 一致
+DEFAULT_GAMUT: tuple[tuple[float, float], ...] = (
+    (0.7006, 0.2993),
+    (0.1724, 0.7468),
+    (0.1355, 0.0399),
+)
+
+# D65 白点
+WHITE_POINT = (0.3127, 0.3290)
+
+# sRGB 8 位值到线性光的查找表
+_SRGB_TO_LINEAR: tuple[float, ...] = tuple(
+    (value / 12.92) if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+    for value in (index / 255 for index in range(256))
+)
+
+# 线性光到 sRGB 8 位值的查找表（4096 级）
+_LINEAR_STEPS = 4095
+_LINEAR_TO_SRGB: tuple[int, ...] = tuple(
+    round(
+        255
+        * (
+            12.92 * value
+            if value <= 0.0031308
+            else 1.055 * value ** (1 / 2.4) - 0.055
+        )
+    )
+    for value in (index / _LINEAR_STEPS for index in range(_LINEAR_STEPS + 1))
+)
+
+
+def _cross(
+    point_a: tuple[float, float], point_b: tuple[float, float]
+) -> float:
+    """2D cross product."""
+    return point_a[0] * point_b[1] - point_a[1] * point_b[0]
+
+
+@lru_cache(maxsize=8)
+def _gamut_edges(
+    gamut: tuple[tuple[float, float], ...],
+) -> tuple[tuple[tuple[float, float], tuple[float, float], float], ...]:
+    """Precompute (start, direction, squared length) for every gamut edge."""
+    edges = []
+    for index, start in enumerate(gamut):
+        end = gamut[(index + 1) % len(gamut)]
+        direction = (end[0] - start[0], end[1] - start[1])
+        edges.append((start, direction, direction[0] ** 2 + direction[1] ** 2))
+    return tuple(edges)
+
+
+def clamp_to_gamut(
+    x: float, y: float, gamut: tuple[tuple[float, float], ...] = DEFAULT_GAMUT
+) -> tuple[float, float]:
+    """Return (x, y) if inside the gamut, else the closest point on its edge."""
+    edges = _gamut_edges(gamut)
+    inside = True
+    for start, direction, _ in edges:
+        if _cross(direction, (x - start[0], y - start[1])) < 0:
+            inside = False
+            break
+    if inside:
+        return x, y
+
+    best = (x, y)
+    best_distance = float("inf")
+    for start, direction, length in edges:
+        ratio = ((x - start[0]) * direction[0] + (y - start[1]) * direction[1]) / length
+        ratio = min(max(ratio, 0.0), 1.0)
+        point = (start[0] + ratio * direction[0], start[1] + ratio * direction[1])
+        distance = (point[0] - x) ** 2 + (point[1] - y) ** 2
+        if distance < best_distance:
+            best, best_distance = point, distance
+    return best
+
+
+def xy16_to_xy(color_x: int | None, color_y: int | None) -> tuple[float, float]:
+    """Convert the gateway 16 bit xy to Home Assistant xy."""
+    return (color_x or 0) * _XY_INV_SCALE, (color_y or 0) * _XY_INV_SCALE
+
+
+def xy_to_xy16(x: float, y: float) -> tuple[int, int]:
+    """Convert Home Assistant xy to the gateway 16 bit xy."""
+    return (
+        min(max(round(x * XY_SCALE), 0), XY_SCALE),
+        min(max(round(y * XY_SCALE), 0), XY_SCALE),
+    )
+
+
+@lru_cache(maxsize=4096)
+def rgb_to_xy16(
+    red: int,
+    green: int,
+    blue: int,
+    gamut: tuple[tuple[float, float], ...] = DEFAULT_GAMUT,
+) -> tuple[int, int]:
+    """Convert 8 bit RGB to the gateway 16 bit xy, clamped to the gamut."""
+    linear_r = _SRGB_TO_LINEAR[min(max(int(red), 0), 255)]
+    linear_g = _SRGB_TO_LINEAR[min(max(int(green), 0), 255)]
+    linear_b = _SRGB_TO_LINEAR[min(max(int(blue), 0), 255)]
+    big_x = linear_r * 0.664511 + linear_g * 0.154324 + linear_b * 0.162028
+    big_y = linear_r * 0.283881 + linear_g * 0.668433 + linear_b * 0.047685
+    big_z = linear_r * 0.000088 + linear_g * 0.072310 + linear_b * 0.986039
+    total = big_x + big_y + big_z
+    if total == 0:
+        return xy_to_xy16(*WHITE_POINT)
+    return xy_to_xy16(*clamp_to_gamut(big_x / total, big_y / total, gamut))
+
+
+@lru_cache(maxsize=4096)
+def hs_to_xy16(
+    hue: float,
+    saturation: float,
+    gamut: tuple[tuple[float, float], ...] = DEFAULT_GAMUT,
+) -> tuple[int, int]:
+    """Convert Home Assistant hs (0-360, 0-100) to the gateway 16 bit xy."""
+    red, green, blue = colorsys.hsv_to_rgb(hue / 360, saturation / 100, 1)
+    return rgb_to_xy16(int(red * 255), int(green * 255), int(blue * 255), gamut)
+
+
+def xy16_to_rgb(color_x: int, color_y: int) -> tuple[int, int, int]:
+    """Convert the gateway 16 bit xy to full brightness 8 bit RGB."""
+    x, y = xy16_to_xy(color_x, color_y)
+    if y == 0:
+        return 0, 0, 0
+    big_x = x / y
+    big_z = (1 - x - y) / y
+    red = big_x * 1.656492 - 0.354851 - big_z * 0.255038
+    green = -big_x * 0.707196 + 1.655397 + big_z * 0.036152
+    blue = big_x * 0.051713 - 0.121364 + big_z * 1.011530
+    peak = max(red, green, blue)
+    if peak <= 0:
+        return 0, 0, 0
+    return tuple(
+        _LINEAR_TO_SRGB[round(max(value, 0.0) / peak * _LINEAR_STEPS)]
+        for value in (red, green, blue)
+    )
+
+
+def clamp_kelvin(kelvin: int) -> int:
+    """Clamp a color temperature to the range the gateway accepts."""
+    return min(max(int(kelvin), MIN_KELVIN), MAX_KELVIN)
+
+
+def rgb_list_to_color_arr(
+    colors: list[tuple[int, int, int]],
+    gamut: tuple[tuple[float, float], ...] = DEFAULT_GAMUT,
+) -> list[ColorXY]:
+    """Convert a segment array of RGB colors to gateway ColorXY values."""
+    result = []
+    for red, green, blue in colors:
+        x, y = rgb_to_xy16(red, green, blue, gamut)
+        result.append(ColorXY(x=x, y=y))
+    return result
+
+
+def color_arr_to_rgb_list(color_arr: list[ColorXY]) -> list[tuple[int, int, int]]:
+    """Convert gateway ColorXY values of a segment array to RGB colors."""
+    return [xy16_to_rgb(color.x or 0, color.y or 0) for color in color_arr]
@@ -75,6 +75,11 @@ def json_to_bean(json_data: str, cls: type[T]) -> T:
     return _convert_to_class(json_dict, cls)
 
 
+def dict_to_bean(data: Any, cls: type[T]) -> T:
+    """Convert decoded JSON (dict or list) to an entity class instance."""
+    return _convert_to_class(data, cls)
+
+
 def dataclass_to_dict(obj: Any, ignore_none: bool = True) -> dict:
     """将数据类转换为字典，可选忽略 None 值."""
     if not is_dataclass(obj):
@@ -0,0 +1,150 @@
+"""Incremental decoding of one JSON array inside a streamed document.
+
+网关的设备列表是一个很大的 JSON 文档，这里逐块读取响应，把 ``data.arr``
+中的元素逐个解码交给调用方，不需要同时持有完整的文本和字典树。
+"""
+
+from __future__ import annotations
+
+import codecs
+from collections.abc import Iterator
+import json
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+# 数组元素之后可能出现的字符
+_DELIMITERS = _WHITESPACE + ",]"
+
+# 解码状态
+_PREFIX = 0  # 数组之前
+_ARRAY = 1  # 数组内
+_SUFFIX = 2  # 数组之后
+
+
+class ArrayStreamDecoder:
+    """Decode the elements of the array at ``path`` as chunks arrive.
+
+    Feed bytes with :meth:`feed`, which yields every element completed so
+    far. :meth:`close` returns the rest of the document with the array left
+    empty, so the envelope (code, msg, len...) can be parsed as usual.
+    """
+
+    def __init__(self, path: tuple[str, ...] = ("data", "arr")) -> None:
+        """Init decoder."""
+        self._path = list(path)
+        self._json = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _PREFIX
+        self._prefix = ""  # 数组之前的文本
+        self._suffix: list[str] = []  # 数组之后的文本
+        # 扫描数组之前的文本时的状态
+        self._pos = 0
+        self._stack: list[list] = []  # [容器类型, 当前键]
+        self._in_string = False
+        self._escape = False
+        self._string: list[str] = []
+        self._last_string: str | None = None
+        self.count = 0  # 已解码的元素数
+
+    def feed(self, chunk: bytes) -> Iterator[Any]:
+        """Add a chunk and yield the elements it completes."""
+        self._buffer += self._text.decode(chunk)
+        yield from self._drain(final=False)
+
+    def close(self) -> tuple[dict[str, Any], list[Any]]:
+        """Finish decoding, return the envelope and any remaining elements."""
+        self._buffer += self._text.decode(b"", final=True)
+        tail = list(self._drain(final=True))
+        if self._state == _ARRAY:
+            raise ValueError("Truncated JSON array")
+        if self._state == _PREFIX:
+            # 没有找到数组，整个文档按普通 JSON 解析
+            return json.loads(self._buffer), tail
+        envelope = json.loads(self._prefix + "[]" + "".join(self._suffix))
+        return envelope, tail
+
+    def _drain(self, final: bool) -> Iterator[Any]:
+        if self._state == _PREFIX and self._scan_prefix():
+            self._prefix = self._buffer[: self._pos]
+            self._buffer = self._buffer[self._pos + 1 :]
+            self._state = _ARRAY
+        if self._state == _ARRAY:
+            yield from self._decode_elements(final)
+        if self._state == _SUFFIX and self._buffer:
+            self._suffix.append(self._buffer)
+            self._buffer = ""
+
+    def _scan_prefix(self) -> bool:
+        """Scan for the opening bracket of the array, True once found."""
+        buffer = self._buffer
+        stack = self._stack
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string)
+                    self._string.clear()
+                    self._pos += 1
+                    continue
+                self._string.append(char)
+            elif char == '"':
+                self._in_string = True
+            elif char == ":":
+                if stack:
+                    stack[-1][1] = self._last_string
+            elif char == ",":
+                if stack:
+                    stack[-1][1] = None
+            elif char == "[":
+                if len(stack) == len(self._path) and [
+                    key for _, key in stack
+                ] == self._path:
+                    return True
+                stack.append(["[", None])
+            elif char == "{":
+                stack.append(["{", None])
+            elif char in "]}":
+                if stack:
+                    stack.pop()
+            self._pos += 1
+        return False
+
+    def _decode_elements(self, final: bool) -> Iterator[Any]:
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                self._state = _SUFFIX
+                pos += 1
+                break
+            try:
+                element, end = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # 元素还不完整，等待下一块
+                break
+            if (
+                not final
+                and not isinstance(element, (dict, list, str))
+                and (end == len(buffer) or buffer[end] not in _DELIMITERS)
+            ):
+                # 数字或字面量可能被截断，如 "1." 或 "-0.5e"，等到分隔符再解码
+                break
+            pos = end
+            self.count += 1
+            yield element
+        self._buffer = buffer[pos:]
@@ -0,0 +1,138 @@
+"""Token-bucket rate limiter with priority lanes."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import time
+
+from ..enums import RequestPriority
+from .stats import LatencyStats
+
+
+class PriorityRateLimiter:
+    """Admit requests at a steady rate, serving higher priorities first.
+
+    A request only waits behind queued requests of the same or a higher
+    priority, so interactive commands overtake a running bulk sync.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Init limiter."""
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._queues: dict[RequestPriority, deque[asyncio.Future]] = {
+            priority: deque() for priority in RequestPriority
+        }
+        self._timer: asyncio.TimerHandle | None = None
+        self.wait_stats = {priority: LatencyStats() for priority in RequestPriority}
+
+    def configure(self, rate: float, burst: int) -> None:
+        """Change rate (requests per second) and burst.
+
+        A rate of 0 or less switches limiting off and admits every queued
+        request at once.
+        """
+        self._refill()
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = min(self._tokens, self._burst)
+        # 按新的速率重新计算下次发放的时间
+        self._wake()
+
+    @property
+    def rate(self) -> float:
+        """Requests per second, 0 or less when switched off."""
+        return self._rate
+
+    @property
+    def enabled(self) -> bool:
+        """Return False when rate limiting is switched off."""
+        return self._rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._rate > 0:
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+        self._updated = now
+
+    async def acquire(self, priority: RequestPriority) -> None:
+        """Wait until a request of this priority may be sent."""
+        if not self.enabled:
+            return
+        start = time.monotonic()
+        self._refill()
+        blocked = any(self._queues[lane] for lane in RequestPriority if lane <= priority)
+        if self._tokens >= 1 and not blocked:
+            self._tokens -= 1
+            self.wait_stats[priority].add(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(future)
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in self._queues[priority]:
+                self._queues[priority].remove(future)
+            elif future.done() and not future.cancelled() and self.enabled:
+                # 已分到令牌但没有发送，还给下一个请求
+                self._tokens = min(self._burst, self._tokens + 1)
+                self._wake()
+            raise
+        self.wait_stats[priority].add(time.monotonic() - start)
+
+    def _schedule(self) -> None:
+        """Wake up when the next token is available."""
+        if self._timer is not None:
+            return
+        delay = max(0.0, (1 - self._tokens) / self._rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _wake(self) -> None:
+        """Hand out tokens now instead of at the scheduled time."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._release()
+
+    def _release(self) -> None:
+        """Hand out tokens to the queued requests, highest priority first."""
+        self._timer = None
+        if not self.enabled:
+            for queue in self._queues.values():
+                while queue:
+                    future = queue.popleft()
+                    if not future.done():
+                        future.set_result(None)
+            return
+        self._refill()
+        for priority in RequestPriority:
+            queue = self._queues[priority]
+            while queue and self._tokens >= 1:
+                future = queue.popleft()
+                if future.done():
+                    continue
+                future.set_result(None)
+                self._tokens -= 1
+        if any(self._queues.values()):
+            self._schedule()
+
+    def as_dict(self) -> dict:
+        """Queue depth and wait times per priority, for diagnostics."""
+        return {
+            "rate": self._rate,
+            "burst": self._burst,
+            "tokens": round(self._tokens, 2),
+            "lanes": {
+                priority.name.lower(): {
+                    "queued": len(self._queues[priority]),
+                    "wait": self.wait_stats[priority].as_dict(),
+                }
+                for priority in RequestPriority
+            },
+        }
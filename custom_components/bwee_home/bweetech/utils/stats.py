@@ -0,0 +1,116 @@
+"""Lightweight latency statistics."""
+
+from __future__ import annotations
+
+from collections import deque
+
+
+class LatencyStats:
+    """Keep the most recent latency samples (seconds) and summarize them."""
+
+    def __init__(self, size: int = 512) -> None:
+        """Init stats with a bounded sample window."""
+        self._samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        """Record one sample."""
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of every sample recorded so far."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, pct: float) -> float | None:
+        """Nearest-rank percentile over the sample window."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def as_dict(self) -> dict[str, float | int | None]:
+        """Summary in milliseconds, for diagnostics."""
+
+        def _ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 2)
+
+        return {
+            "count": self.count,
+            "mean_ms": _ms(self.mean),
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(self.max if self.count else None),
+        }
+
+
+class AdaptiveTimeout(LatencyStats):
+    """Latency of one endpoint, with a timeout and hedge delay derived from it.
+
+    Until ``min_samples`` responses were seen the timeout is the ceiling and
+    no hedge delay is offered. Only answered requests are sampled; each
+    consecutive timeout doubles the timeout instead, until the next answer.
+    """
+
+    def __init__(
+        self,
+        floor: float,
+        ceiling: float,
+        factor: float,
+        min_samples: int,
+        size: int = 512,
+    ) -> None:
+        """Init stats with timeout bounds."""
+        super().__init__(size)
+        self._floor = floor
+        self._ceiling = ceiling
+        self._factor = factor
+        self._min_samples = min_samples
+        self.timeouts = 0  # 超时次数
+        self._backoff = 1  # 连续超时后的倍数
+
+    @property
+    def warm(self) -> bool:
+        """Return True once enough samples were recorded."""
+        return len(self._samples) >= self._min_samples
+
+    def timeout(self) -> float:
+        """factor x p99, clamped to [floor, ceiling]."""
+        if not self.warm:
+            return self._ceiling
+        timeout = max(self._factor * self.percentile(99), self._floor) * self._backoff
+        return min(timeout, self._ceiling)
+
+    def hedge_delay(self) -> float | None:
+        """Delay after which a second request is worth sending (p95)."""
+        if not self.warm:
+            return None
+        return self.percentile(95)
+
+    def add(self, value: float) -> None:
+        """Record one answered request."""
+        super().add(value)
+        self._backoff = 1
+
+    def add_timeout(self) -> None:
+        """Record a request that timed out."""
+        self.timeouts += 1
+        # 超时不计入样本（会推高 p99 形成正反馈），改为指数退避
+        self._backoff = min(self._backoff * 2, 16)
+
+    def as_dict(self) -> dict[str, float | int | None]:
+        """Summary in milliseconds, for diagnostics."""
+        hedge_delay = self.hedge_delay()
+        return {
+            **super().as_dict(),
+            "timeouts": self.timeouts,
+            "timeout_ms": round(self.timeout() * 1000, 2),
+            "hedge_delay_ms": None if hedge_delay is None else round(hedge_delay * 1000, 2),
+        }
@@ -0,0 +1,75 @@
+"""Hashed timer wheel for many deadlines that are pushed back often."""
+
+from __future__ import annotations
+
+from collections.abc import Hashable
+import math
+import time
+
+
+class TimerWheel:
+    """Deadlines hashed into ``slots`` buckets of ``tick`` seconds.
+
+    Scheduling, rescheduling and cancelling are O(1). ``advance`` only
+    looks at the buckets whose tick has passed since the previous call.
+    A deadline further away than one revolution stays in its bucket
+    until the revolution it belongs to.
+    """
+
+    def __init__(self, tick: float, slots: int, now: float | None = None) -> None:
+        """Init wheel."""
+        self._tick = tick
+        self._buckets: list[set[Hashable]] = [set() for _ in range(slots)]
+        self._deadlines: dict[Hashable, float] = {}
+        self._slot_of: dict[Hashable, int] = {}
+        # 已处理到的节拍
+        self._current = self._tick_of(time.monotonic() if now is None else now) - 1
+
+    def _tick_of(self, deadline: float) -> int:
+        # 向上取整，节拍到达时截止时间一定已过
+        return math.ceil(deadline / self._tick)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Set, or move, the deadline of key."""
+        # 已处理过的节拍放到下一拍，否则要等一整圈
+        tick = max(self._tick_of(deadline), self._current + 1)
+        slot = tick % len(self._buckets)
+        old = self._slot_of.get(key)
+        if old != slot:
+            if old is not None:
+                self._buckets[old].discard(key)
+            self._buckets[slot].add(key)
+            self._slot_of[key] = slot
+        self._deadlines[key] = deadline
+
+    def cancel(self, key: Hashable) -> None:
+        """Drop the deadline of key."""
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            self._buckets[slot].discard(key)
+            del self._deadlines[key]
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Remove and return every key whose deadline is at or before now."""
+        target = math.floor(now / self._tick)
+        # 落后超过一圈时，每个桶只需检查一次
+        start = max(self._current + 1, target - len(self._buckets) + 1)
+        expired = []
+        for tick in range(start, target + 1):
+            bucket = self._buckets[tick % len(self._buckets)]
+            due = [key for key in bucket if self._deadlines[key] <= now]
+            for key in due:
+                bucket.discard(key)
+                del self._deadlines[key]
+                del self._slot_of[key]
+            expired.extend(due)
+        self._current = max(self._current, target)
+        return expired
+
+    def __len__(self) -> int:
+        """Number of scheduled keys."""
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return True if key has a deadline."""
+        return key in self._deadlines
@@ -0,0 +1,94 @@
+"""Cap how often each entity writes its state, keeping the last value."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import time
+from typing import Any
+
+from .const import STATE_WRITE_MAX_RATE
+
+
+class StateWriteLimiter:
+    """At most ``max_rate`` writes per second per key, plus a trailing write.
+
+    A write arriving too soon after the previous one is deferred to the
+    end of the interval. Writes deferred in the same interval collapse
+    into one, which runs after the last of them and so shows the final value.
+    ``max_rate`` <= 0 disables the cap.
+    """
+
+    def __init__(self, max_rate: float = STATE_WRITE_MAX_RATE) -> None:
+        """Init limiter."""
+        self._interval = 1 / max_rate if max_rate > 0 else 0.0
+        self._last: dict[str, float] = {}  # 键 -> 上次写入时间
+        # 键 -> (延迟写入的定时器, 写入函数)
+        self._trailing: dict[str, tuple[asyncio.TimerHandle, Callable[[], None]]] = {}
+        self.written = 0  # 立即写入的次数
+        self.coalesced = 0  # 被合并到延迟写入中的次数
+        self.trailing = 0  # 延迟写入的次数
+
+    def write(self, key: str, write: Callable[[], None]) -> None:
+        """Write now if the key is under its rate, otherwise defer."""
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is None or now - last >= self._interval:
+            self._write(key, write, now)
+            return
+        self.coalesced += 1
+        pending = self._trailing.get(key)
+        if pending is not None:
+            # 已有延迟写入，只更新写入函数
+            self._trailing[key] = (pending[0], write)
+            return
+        timer = asyncio.get_running_loop().call_later(
+            last + self._interval - now, self._flush, key
+        )
+        self._trailing[key] = (timer, write)
+
+    def write_now(self, key: str, write: Callable[[], None]) -> None:
+        """Write immediately, e.g. for user-initiated changes."""
+        self.cancel(key)
+        self._write(key, write, time.monotonic())
+
+    def _write(self, key: str, write: Callable[[], None], now: float) -> None:
+        self._last[key] = now
+        self.written += 1
+        write()
+
+    def _flush(self, key: str) -> None:
+        pending = self._trailing.pop(key, None)
+        if pending is None:
+            return
+        self._last[key] = time.monotonic()
+        self.trailing += 1
+        pending[1]()
+
+    def cancel(self, key: str) -> None:
+        """Drop the deferred write of a key."""
+        pending = self._trailing.pop(key, None)
+        if pending is not None:
+            pending[0].cancel()
+
+    def forget(self, key: str) -> None:
+        """Drop everything about a removed key."""
+        self.cancel(key)
+        self._last.pop(key, None)
+
+    def close(self) -> None:
+        """Cancel every deferred write."""
+        for timer, _ in self._trailing.values():
+            timer.cancel()
+        self._trailing.clear()
+        self._last.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters, for diagnostics."""
+        return {
+            "max_rate": 1 / self._interval if self._interval else None,
+            "pending": len(self._trailing),
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "trailing": self.trailing,
+        }
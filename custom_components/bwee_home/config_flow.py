@@ -6,7 +6,6 @@ import asyncio
 import logging
 from typing import Any
 
-import ping3
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
@@ -17,7 +16,6 @@ from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 
 from .bweetech import API
 from .bweetech.gateway import get_gateway_info, get_auth
-from .bweetech.utils.gateway_discovery import GatewayDiscovery
 from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,6 +28,13 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 )
 
 
+def _ping(ip_address: str) -> float | None:
+    """Ping the gateway, ping3 is only loaded for the manual step."""
+    import ping3  # noqa: PLC0415
+
+    return ping3.ping(ip_address, 2)
+
+
 class BweeConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for BWEE home."""
 
@@ -156,7 +161,9 @@ class BweeConfigFlow(ConfigFlow, domain=DOMAIN):
     async def validate_input(self: BweeConfigFlow, user_input: dict[str, Any]) -> bool:
         """Validate the user input allows us to connect."""
         # 检查输入的IP地址是否正确
-        ping_result = ping3.ping(user_input[CONF_IP_ADDRESS], 2)
+        ping_result = await self.hass.async_add_executor_job(
+            _ping, user_input[CONF_IP_ADDRESS]
+        )
         if ping_result is None:
             raise DeviceDiscoveryError("device_not_found")
 
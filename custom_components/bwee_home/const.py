@@ -10,3 +10,10 @@ SUPPORT_PLATFORMS: list[Platform] = [
     # Platform.SCENE,
     # Platform.SWITCH,
 ]
+
+# 批量新增设备时并发查询 ext_light 的上限
+DEVICE_ADD_CONCURRENCY = 8
+
+# 性能分析服务的默认时长和最长时长（秒）
+PROFILE_DEFAULT_DURATION = 60
+PROFILE_MAX_DURATION = 3600
@@ -0,0 +1,18 @@
+"""Diagnostics support for BWEE home."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, _: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    dm = hass.data[DOMAIN].get("dm")
+    return {"device_manager": dm.diagnostics() if dm else None}
@@ -2,17 +2,29 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from functools import partial
 import logging
+import time
+from typing import Any
 
 import voluptuous as vol
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_COLOR_TEMP_KELVIN,
+    ATTR_EFFECT,
+    ATTR_HS_COLOR,
+    ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
     ATTR_XY_COLOR,
+    EFFECT_OFF,
     PLATFORM_SCHEMA as LIGHT_PLATFORM_SCHEMA,
     ColorMode,
     LightEntity,
+    LightEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, CONF_IP_ADDRESS
@@ -22,14 +34,48 @@ from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util.color import brightness_to_value, value_to_brightness
 
-from .bweetech import API
-from .bweetech.device import device_control, get_all_devices
-from .bweetech.enums import DeviceSupport
+from .bweetech import API, Result
+from .bweetech.adaptive import AdaptiveEngine, AdaptiveProfile
+from .bweetech.command_tracker import CommandTracker, PendingCommand
+from .bweetech.const import (
+    HEARTBEAT_PROBE_BACKOFF,
+    HEARTBEAT_PROBE_BULK,
+    MQTT_COMMAND_ENABLED,
+    OUTBOX_PROBE_INTERVAL,
+    OUTBOX_RETRY_INTERVAL,
+    TRANSITION_FRAME_BUDGET,
+    TRANSITION_FRAME_INTERVAL,
+    TRANSITION_RATE_SHARE,
+)
+from .bweetech.device import device_by_uuid, device_control, get_all_devices
+from .bweetech.enums import DeviceSupport, RequestPriority
 from .bweetech.forms import ControlForm, SearchForm
-from .bweetech.light import get_lights
-from .bweetech.models import Device, DeviceUpdatePayload, LightUpdatePayload, Resource
+from .bweetech.heartbeat import HeartbeatMonitor
+from .bweetech.interning import ModelInterner
+from .bweetech.light import get_lights, light_control
+from .bweetech.models import (
+    Device,
+    DeviceUpdatePayload,
+    Light,
+    LightUpdatePayload,
+    Resource,
+    Room,
+)
 from .bweetech.mqtt_client import MqttServiceForGateway
-from .const import DOMAIN
+from .bweetech.mqtt_command import MqttCommandChannel
+from .bweetech.outbox import CommandOutbox, QueuedCommand
+from .bweetech.patch import DEVICE_PATCHER, LIGHT_PATCHER
+from .bweetech.profiler import PROFILER, profiled
+from .bweetech.resource_cache import RESOURCE_CACHE
+from .bweetech.transition import (
+    EFFECT_BREATHE,
+    EFFECT_COLORLOOP,
+    FrameBatch,
+    TransitionEngine,
+)
+from .bweetech.utils import color_utils, dict_to_bean
+from .bweetech.write_limiter import StateWriteLimiter
+from .const import DEVICE_ADD_CONCURRENCY, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -68,10 +114,27 @@ async def async_setup_entry(
 class BweeLight(LightEntity):
     """Representation of an Awesome Light."""
 
-    def __init__(self, id: str) -> None:
-        """Initialize the device."""
-        self._id = id
-        self._attr_unique_id = id
+    def __init__(
+        self, device: Device, light: Light, manager: DeviceManager | None = None
+    ) -> None:
+        """Initialize one light channel of a device."""
+        self._id = device.id
+        self._light_id = light.id
+        # 第一路沿用设备ID，保持已有实体的 unique_id 不变
+        self._channel = next(
+            (index for index, item in enumerate(device.ext_light) if item.id == light.id),
+            0,
+        )
+        self._attr_unique_id = (
+            device.id if self._channel == 0 else f"{device.id}_{light.id}"
+        )
+        self._manager = manager
+
+    @property
+    def _light(self) -> Light | None:
+        """The light of this channel in the store."""
+        lights: dict[str, Light] = self.hass.data[DOMAIN]["lights"]
+        return lights.get(self._light_id)
 
     @property
     def supported_color_modes(self):
@@ -81,19 +144,46 @@ class BweeLight(LightEntity):
             gp_id = devices.get(self._id).product.cat3_id
             support = DeviceSupport.of_gp_id(gp_id=gp_id)
             if support == DeviceSupport.RGB_CW:
-                return (ColorMode.COLOR_TEMP,ColorMode.XY,)
+                return (
+                    ColorMode.COLOR_TEMP,
+                    ColorMode.HS,
+                    ColorMode.RGB,
+                    ColorMode.XY,
+                )
             if support == DeviceSupport.RGB:
-                return (ColorMode.XY,)
+                return (
+                    ColorMode.HS,
+                    ColorMode.RGB,
+                    ColorMode.XY,
+                )
             if support == DeviceSupport.CW:
                 return (ColorMode.COLOR_TEMP,)
         return (ColorMode.UNKNOWN,)
 
+    @property
+    def supported_features(self) -> LightEntityFeature:
+        """Return the supported features of the device."""
+        return LightEntityFeature.TRANSITION | LightEntityFeature.EFFECT
+
+    @property
+    def effect_list(self) -> list[str]:
+        """Return the effects of the device."""
+        if ColorMode.XY in self.supported_color_modes:
+            return [EFFECT_BREATHE, EFFECT_COLORLOOP]
+        return [EFFECT_BREATHE]
+
+    @property
+    def effect(self) -> str | None:
+        """Return the running effect of the device."""
+        if self._manager is None:
+            return None
+        return self._manager.transition_engine.effect_of(self._light_id) or EFFECT_OFF
+
     @property
     def color_mode(self):
         """Return the color_mode of the device."""
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            color_mode = devices.get(self._id).ext_light[0].color_mode
+        if "lights" in self.hass.data[DOMAIN]:
+            color_mode = self._light.color_mode
             if color_mode == 1:
                 return ColorMode.XY
             if color_mode == 2:
@@ -106,7 +196,10 @@ class BweeLight(LightEntity):
         """Return the name of the device."""
         if "devices" in self.hass.data[DOMAIN]:
             devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            return devices.get(self._id).name
+            name = devices.get(self._id).name
+            if self._channel == 0:
+                return name
+            return f"{name} {self._light.name or self._channel + 1}"
         return None
 
     @property
@@ -114,60 +207,57 @@ class BweeLight(LightEntity):
         """Return the available of the device."""
         if "devices" in self.hass.data[DOMAIN]:
             devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            return devices.get(self._id).online
+            device = devices.get(self._id)
+            if device is None:
+                return False
+            # 长时间没有消息且探测无响应的设备视为离线
+            stale = self._manager is not None and self._manager.is_stale(self._id)
+            return bool(device.online) and not stale
         return None
 
     @property
     def is_on(self):
         """Return true if the light is on."""
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            return devices.get(self._id).ext_light[0].on == 1
+        if "lights" in self.hass.data[DOMAIN]:
+            return self._light.on == 1
         return None
 
     @property
     def brightness(self):
         """Return the brightness of the device."""
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
+        if "lights" in self.hass.data[DOMAIN]:
             return value_to_brightness(
                 (
                     1,
                     100,
                 ),
-                devices.get(self._id).ext_light[0].brightness,
+                self._light.brightness,
             )
         return None
 
     @property
     def color_temp_kelvin(self):
         """Return the color_temp_kelvin of the device."""
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            return devices.get(self._id).ext_light[0].color_cw
+        if "lights" in self.hass.data[DOMAIN]:
+            return self._light.color_cw
         return None
 
     @property
     def min_color_temp_kelvin(self) -> int:
         """Set min mireds."""
-        return 2000
+        return color_utils.MIN_KELVIN
 
     @property
     def max_color_temp_kelvin(self) -> int:
         """Set max mireds."""
-        return 6500
+        return color_utils.MAX_KELVIN
 
     @property
     def xy_color(self):
         """Return the color_temp_kelvin of the device."""
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            x = devices.get(self._id).ext_light[0].color_x / 65535
-            y = devices.get(self._id).ext_light[0].color_y / 65535
-            return (
-                x,
-                y,
-            )
+        if "lights" in self.hass.data[DOMAIN]:
+            light = self._light
+            return color_utils.xy16_to_xy(light.color_x, light.color_y)
         return None
 
     @property
@@ -211,36 +301,88 @@ class BweeLight(LightEntity):
             form.brightness = brightness
         # color-temperature
         if ATTR_COLOR_TEMP_KELVIN in kwargs:
-            form.color_cw = kwargs[ATTR_COLOR_TEMP_KELVIN]
+            form.color_cw = color_utils.clamp_kelvin(kwargs[ATTR_COLOR_TEMP_KELVIN])
         # rgb color
         if ATTR_XY_COLOR in kwargs:
-            x = kwargs[ATTR_XY_COLOR][0]
-            y = kwargs[ATTR_XY_COLOR][1]
-            form.color_x = int(x * 65535)
-            form.color_y = int(y * 65535)
-        res = await device_control(self._id, form)
-        _LOGGER.info("Turn_on: form:%s,res:%s", form, res)
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            light = devices.get(self._id).ext_light[0]
-            if form.brightness:
-                light.brightness = form.brightness
-            if form.color_cw:
-                light.color_cw = form.color_cw
-            if form.color_x:
-                light.color_x = form.color_x
-            if form.color_y:
-                light.color_y = form.color_y
-            light.on = 1
+            form.color_x, form.color_y = color_utils.xy_to_xy16(*kwargs[ATTR_XY_COLOR])
+        elif ATTR_HS_COLOR in kwargs:
+            form.color_x, form.color_y = color_utils.hs_to_xy16(*kwargs[ATTR_HS_COLOR])
+        elif ATTR_RGB_COLOR in kwargs:
+            form.color_x, form.color_y = color_utils.rgb_to_xy16(
+                *kwargs[ATTR_RGB_COLOR]
+            )
+        await self._async_apply(form, **kwargs)
 
     async def async_turn_off(self, **kwargs):
         """Turn the light off."""
         form = ControlForm(on=0)
-        res = await device_control(self._id, form)
-        _LOGGER.debug("Turn_off: form:%s,res:%s", form, res)
-        if "devices" in self.hass.data[DOMAIN]:
-            devices: dict[str, Device] = self.hass.data[DOMAIN]["devices"]
-            devices.get(self._id).ext_light[0].on = 0
+        await self._async_apply(form, **kwargs)
+
+    async def _async_apply(self, form: ControlForm, **kwargs) -> None:
+        """Send the form directly, as a transition, or start an effect."""
+        engine = self._manager.transition_engine
+        light = self._light
+        engine.stop(self._light_id)
+        # 普通开灯使用自适应目标，手动调整则暂停自适应直到关灯
+        self._manager.adaptive.on_user_command(self._light_id, form)
+        effect = kwargs.get(ATTR_EFFECT)
+        if form.on == 1 and effect and effect != EFFECT_OFF:
+            await self._async_control(form)
+            engine.start_effect(self._light_id, light, effect)
+            self._manager.write_state(self, immediate=True)
+            return
+        if kwargs.get(ATTR_TRANSITION):
+            # 由网关共享的节拍逐帧发送
+            engine.start(self._light_id, light, form, kwargs[ATTR_TRANSITION])
+            self._manager.write_state(self, immediate=True)
+            return
+        await self._async_control(form)
+
+    async def _async_control(self, form: ControlForm) -> None:
+        """Show the new state right away, then send it to the gateway."""
+        light = self._light
+        manager = self._manager
+        tracker = manager.command_tracker
+        # 乐观更新，等待 res/light/update 回显确认
+        tracker.track(self._id, light, form)
+        manager.write_state(self, immediate=True)
+        if self._light_id in manager.outbox:
+            # 同一路灯排在暂存的指令之后保证顺序，并立即试探网关是否已恢复
+            manager.queue_command(self._id, self._light_id, form)
+            manager.probe_outbox()
+            return
+        res = await manager.control(self._id, self._light_id, form)
+        _LOGGER.debug("Control: form:%s,res:%s", form, res)
+        if res.is_ok():
+            tracker.arm(light.id)
+            if manager.outbox:
+                # 网关已恢复，不必等待重试定时器
+                manager.flush_outbox()
+            return
+        if res.is_transport_error():
+            # 保持乐观状态，网关恢复后重发，过期未发出则回滚
+            manager.queue_command(self._id, self._light_id, form)
+            return
+        # 发送失败，回滚
+        if tracker.rollback(light.id):
+            self._manager.write_state(self, immediate=True)
+
+
+# 实体属性只在分析期间计时，平时没有额外开销
+PROFILER.instrument_properties(
+    BweeLight,
+    (
+        "supported_color_modes",
+        "effect",
+        "color_mode",
+        "name",
+        "available",
+        "is_on",
+        "brightness",
+        "color_temp_kelvin",
+        "xy_color",
+    ),
+)
 
 
 class DeviceManager:
@@ -248,8 +390,16 @@ class DeviceManager:
 
     _hass: HomeAssistant
     _async_add_entities: AddEntitiesCallback
-    _light_entitie_dict: dict[str, BweeLight]
+    _light_entitie_dict: dict[str, BweeLight]  # 灯ID -> 实体
     _mqtt_service: MqttServiceForGateway
+    command_tracker: CommandTracker
+    transition_engine: TransitionEngine
+    adaptive: AdaptiveEngine
+    interner: ModelInterner
+    mqtt_commands: MqttCommandChannel | None
+    outbox: CommandOutbox
+    state_writes: StateWriteLimiter
+    heartbeats: HeartbeatMonitor
 
     def __init__(
         self,
@@ -261,11 +411,51 @@ class DeviceManager:
         self._hass = hass
         self._async_add_entities = async_add_entities
         self._light_entitie_dict = {}
+        self._light_device: dict[str, str] = {}
+        self.command_tracker = CommandTracker(on_rollback=self.on_command_rollback)
+        # 渐变帧走刷新通道，用户指令可以插队
+        self.transition_engine = TransitionEngine(
+            partial(self.send_frames, priority=RequestPriority.REFRESH),
+            frame_budget=self.transition_budget,
+        )
+        # 自适应照明在后台整批发送，不占用交互请求的配额
+        self.adaptive = AdaptiveEngine(
+            lambda: self._hass.data[DOMAIN]["lights"],
+            partial(self.send_frames, priority=RequestPriority.BULK),
+        )
+        self.interner = ModelInterner()
+        # 网关推送的状态按实体限制写入频率
+        self.state_writes = StateWriteLimiter()
+        # 设备最后一次有消息的时间，超时后探测
+        self.heartbeats = HeartbeatMonitor(self.on_devices_silent)
+        self._stale: set[str] = set()  # 探测无响应的设备ID
+        self._probe_backoff = 1  # 站点安静时整表探测间隔的倍数，收到消息后复位
+        self._probes: set[asyncio.Task] = set()
         self._mqtt_service = MqttServiceForGateway(ip_address)
-        self._mqtt_service.on_device_add = self.on_device_add
-        self._mqtt_service.on_device_remove = self.on_device_remove
-        self._mqtt_service.on_device_update = self.on_device_update
-        self._mqtt_service.on_light_update = self.on_light_update
+        # 初次拉取期间收到的事件，拉取完成后按顺序重放
+        self._early_events: deque[tuple[Callable, Any]] | None = None
+        self.early_events_replayed = 0
+        self.last_reconcile: dict[str, int] = {}
+        # 断线期间的事件已丢失，重连后重新拉取并对比
+        self._connected_before = False
+        self._refresh_task: asyncio.Task | None = None
+        self._refresh_again = False  # 拉取期间又发生了重连
+        self._mqtt_service.on_device_add = self._buffered(self.on_device_add)
+        self._mqtt_service.on_device_remove = self._buffered(self.on_device_remove)
+        self._mqtt_service.on_device_update = self._buffered(self.on_device_update)
+        self._mqtt_service.on_light_update = self._acked(
+            self._buffered(self.on_light_update)
+        )
+        # 网关不可达时暂存的控制指令，重连或定时重试时整批重发
+        self.outbox = CommandOutbox(on_drop=self.on_command_dropped)
+        self._outbox_timer: asyncio.TimerHandle | None = None
+        self._outbox_flush: asyncio.Task | None = None
+        self._outbox_failed_at = 0.0  # 上次重发失败的时间
+        self._mqtt_service.on_connected = self.on_mqtt_connected
+        # 可选的 MQTT 控制通道，未回显时回退到 HTTP
+        self.mqtt_commands = (
+            MqttCommandChannel(self._mqtt_service) if MQTT_COMMAND_ENABLED else None
+        )
 
     @staticmethod
     def to_dict(devices: list[Device]) -> dict[str, Device]:
@@ -276,52 +466,354 @@ class DeviceManager:
             result[device_id] = device
         return result
 
+    def _index_device(self, device: Device) -> None:
+        """Add the lights of a device to the light-id index."""
+        lights: dict[str, Light] = self._hass.data[DOMAIN]["lights"]
+        for light in device.ext_light or ():
+            lights[light.id] = light
+            self._light_device[light.id] = device.id
+
+    def _unindex_device(self, device: Device) -> None:
+        """Remove the lights of a device from the light-id index."""
+        lights: dict[str, Light] = self._hass.data[DOMAIN]["lights"]
+        for light in device.ext_light or ():
+            lights.pop(light.id, None)
+            self._light_device.pop(light.id, None)
+
+    def _device_entities(self, device: Device) -> list[BweeLight]:
+        """Entities of every light channel of a device."""
+        return [
+            self._light_entitie_dict[light.id]
+            for light in device.ext_light or ()
+            if light.id in self._light_entitie_dict
+        ]
+
     async def init_devices(self) -> None:
-        """Get devices."""
+        """Get devices.
+
+        MQTT connects while the device list is fetched. Events arriving
+        before the entities exist are buffered and replayed in order on
+        top of the snapshot, so no change between the two is lost.
+        """
+        self._mqtt_service.connect()
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+        await self._refresh_task
+
+    def on_mqtt_connected(self) -> None:
+        """Replay queued commands; after a reconnect, catch up with a refresh.
+
+        The first connection happens while init_devices fetches the list.
+        A reconnect during a refresh makes that refresh fetch again instead
+        of starting a second one, so the buffered events stay in one queue.
+        """
+        self.flush_outbox()
+        if not self._connected_before:
+            self._connected_before = True
+            return
+        # 断线期间的更新没有推送到缓存
+        RESOURCE_CACHE.clear()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(
+                self.refresh()
+            )
+        else:
+            self._refresh_again = True
+
+    async def refresh(self) -> None:
+        """Fetch every device and reconcile the entities with the list.
+
+        Runs at startup and after every MQTT reconnect, since events sent
+        while disconnected are lost. Only changed devices are touched.
+        Call it through _refresh_task; overlapping calls share the buffer.
+        """
+        self._refresh_again = True
+        while self._refresh_again:
+            self._refresh_again = False
+            if self._early_events is None:
+                self._early_events = deque()
+            try:
+                await self._load_snapshot()
+            finally:
+                await self._replay_early_events()
+
+    async def _load_snapshot(self) -> None:
+        """Fetch every device and reconcile the store with it."""
         form = SearchForm(cat1_id=2, ext_light=1, ext_room=1)
         res = await get_all_devices(form)
-        if res.is_ok():
-            self._hass.data[DOMAIN]["devices"] = self.to_dict(res.data.arr)
-        # 清空
-        if len(self._light_entitie_dict) > 0:
-            for light in self._light_entitie_dict.values():
-                light.async_remove()
-            self._light_entitie_dict.clear()
-        # 创建灯的实体
+        if not res.is_ok():
+            _LOGGER.warning(
+                "Failed to fetch devices, keeping the current ones: %s %s",
+                res.code,
+                res.msg,
+            )
+            return
+        # 同一房间、同一型号的设备共用 Room / Product 实例
+        await self.reconcile(self.interner.intern_devices(res.data.arr))
+
+    async def reconcile(self, fetched: list[Device]) -> None:
+        """Diff a full device list against the store and the entities.
+
+        New devices and channels get entities, vanished ones are removed,
+        the rest are patched in place. Only entities whose device or light
+        actually changed are written.
+        """
         devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
-        self.init_light_entities(devices.values())
+        fresh = self.to_dict(fetched)
+        stats = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0}
+        for device_id in [device_id for device_id in devices if device_id not in fresh]:
+            RESOURCE_CACHE.invalidate_device(device_id)
+            await self.remove_light_entitie(device_id)
+            stats["removed"] += 1
 
-        # 连接MQTT
-        self._mqtt_service.connect()
+        new_entities: list[BweeLight] = []
+        changed: dict[str, BweeLight] = {}  # 待写入的实体，按灯ID去重
+        # 拉取结果在驻留时已更新了共用的房间，此时存储中只有已注册的设备
+        self._changed_rooms(changed)
+        for device in fresh.values():
+            current = devices.get(device.id)
+            if current is None:
+                devices[device.id] = device
+                self._index_device(device)
+                self.heartbeats.seen(device.id)
+                new_entities.extend(self._new_entities(device, device.ext_light or ()))
+                stats["added"] += 1
+                continue
+            # 快照也是一次心跳，之前探测无响应的设备在此恢复
+            self._mark_seen(current)
+            if await self._patch_device(current, device, new_entities, changed):
+                stats["changed"] += 1
+            else:
+                stats["unchanged"] += 1
+        for entitie in changed.values():
+            self.write_state(entitie)
+        # 一次性注册整批实体
+        if new_entities:
+            self._async_add_entities(new_entities)
+        self.last_reconcile = stats
+        _LOGGER.debug("Reconciled devices: %s", stats)
 
-    def init_light_entities(self, devices: list[Device]) -> None:
-        """Create light entitie."""
-        for device in devices:
-            light = BweeLight(device.id)
-            self._light_entitie_dict.setdefault(device.id, light)
-        self._async_add_entities(self._light_entitie_dict.values())
-
-    async def create_light_entitie(self, device: Device) -> None:
-        """Create light entitie."""
-        light = BweeLight(device.id)
-        self._light_entitie_dict.setdefault(device.id, light)
+    async def _patch_device(
+        self,
+        current: Device,
+        fresh: Device,
+        new_entities: list[BweeLight],
+        changed: dict[str, BweeLight],
+    ) -> bool:
+        """Patch a stored device and its lights from a fetched one.
+
+        Entities to write are added to changed, entities of new channels
+        to new_entities. Returns True if anything changed.
+        """
+        fresh_lights = fresh.ext_light or []
+        # 通道单独比较，避免整体替换列表
+        fresh.ext_light = None
+        device_changed = bool(DEVICE_PATCHER.apply(current, fresh))
+        if device_changed:
+            self._changed_channels(current, changed)
+        lights_changed = await self._patch_lights(
+            current, fresh_lights, new_entities, changed
+        )
+        return device_changed or lights_changed
+
+    def _changed_channels(self, device: Device, changed: dict[str, BweeLight]) -> None:
+        """Mark every channel entity of a device for writing."""
+        for light in device.ext_light or ():
+            if light.id in self._light_entitie_dict:
+                changed[light.id] = self._light_entitie_dict[light.id]
+
+    async def _patch_lights(
+        self,
+        device: Device,
+        fresh_lights: list[Light],
+        new_entities: list[BweeLight],
+        changed: dict[str, BweeLight],
+    ) -> bool:
+        """Patch the channels of a stored device from its full channel list.
+
+        Known channels are patched in place, so the light-id index keeps
+        pointing at the stored lights. New channels get entities, vanished
+        ones are removed. Returns True if anything changed.
+        """
+        lights_changed = False
+        old_lights = {light.id: light for light in device.ext_light or ()}
+        lights: list[Light] = []
+        added: list[Light] = []
+        for light in fresh_lights:
+            old = old_lights.pop(light.id, None)
+            if old is None:
+                added.append(light)
+                lights.append(light)
+            else:
+                lights.append(old)
+                if LIGHT_PATCHER.apply(old, light):
+                    lights_changed = True
+                    if old.id in self._light_entitie_dict:
+                        changed[old.id] = self._light_entitie_dict[old.id]
+        if not (added or old_lights):
+            return lights_changed
+        # 通道增减后其余通道的名称也会变化
+        self._changed_channels(device, changed)
+        self._unindex_device(device)
+        device.ext_light = lights
+        self._index_device(device)
+        for light_id in old_lights:
+            changed.pop(light_id, None)
+            await self._remove_entitie(light_id)
+        new_entities.extend(self._new_entities(device, added))
+        return True
+
+    def _patch_room(self, device: Device, patch: dict[str, Any]) -> bool:
+        """Merge a partial room into the device's room.
+
+        A patch without an id belongs to the current room, which is shared
+        by every device in it. A different id moves the device to that room.
+        The other devices of a changed room are written by _changed_rooms.
+        """
+        room_id = patch.get("id")
+        current = device.ext_room
+        if current is None or (room_id is not None and room_id != current.id):
+            device.ext_room = self.interner.intern_room(dict_to_bean(patch, Room))
+            return True
+        return self.interner.update_room(current, patch)
+
+    def _changed_rooms(self, changed: dict[str, BweeLight]) -> None:
+        """Mark the entities of every device in a room a payload changed."""
+        room_ids = self.interner.pop_updated_rooms()
+        if not room_ids:
+            return
         devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
-        if not device.ext_light:
-            # 查询ext_light
-            res = await get_lights(device_uuid=device.id)
+        for device in devices.values():
+            if device.ext_room is not None and device.ext_room.id in room_ids:
+                self._changed_channels(device, changed)
+
+    def _buffered(
+        self, handler: Callable[[Any], Awaitable[None]]
+    ) -> Callable[[Any], Awaitable[None]]:
+        """Wrap an MQTT handler so it queues events during a refresh."""
+
+        async def dispatch(data: Any) -> None:
+            if self._early_events is not None:
+                self._early_events.append((handler, data))
+                return
+            await handler(data)
+
+        return dispatch
+
+    def _acked(
+        self, handler: Callable[[Any], Awaitable[None]]
+    ) -> Callable[[Any], Awaitable[None]]:
+        """Wrap the light update handler so echoes confirm MQTT commands first.
+
+        A command waiting for its echo must not wait for a refresh to end,
+        or it times out and is sent again over HTTP.
+        """
+
+        async def dispatch(data: list[LightUpdatePayload]) -> None:
+            if self.mqtt_commands:
+                for item in data:
+                    self.mqtt_commands.on_echo(item.id, item.value)
+            await handler(data)
+
+        return dispatch
+
+    async def _replay_early_events(self) -> None:
+        """Apply the buffered events in arrival order, then stop buffering."""
+        events = self._early_events
+        # 重放期间新到的事件继续排在队尾，保证顺序
+        while events:
+            handler, data = events.popleft()
+            self.early_events_replayed += 1
+            try:
+                await handler(data)
+            except Exception:
+                _LOGGER.exception("Failed to replay %s", handler.__name__)
+        self._early_events = None
+
+    def _new_entities(self, device: Device, lights: Iterable[Light]) -> list[BweeLight]:
+        """Create and register the entities of some light channels of a device."""
+        entities = []
+        for item in lights:
+            light = BweeLight(device, item, self)
+            self._light_entitie_dict[item.id] = light
+            entities.append(light)
+        return entities
+
+    @profiled
+    async def create_light_entities(self, devices: list[Device]) -> None:
+        """Create light entities for a batch of new devices."""
+        devices_dict: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
+        # 忽略已存在的设备，同一批次内按ID去重
+        new_devices = {
+            device.id: device for device in devices if device.id not in devices_dict
+        }
+        if not new_devices:
+            return
+        # 并发查询缺少的ext_light
+        semaphore = asyncio.Semaphore(DEVICE_ADD_CONCURRENCY)
+
+        async def _fetch_lights(device: Device) -> None:
+            async with semaphore:
+                res = await get_lights(
+                    device_uuid=device.id, priority=RequestPriority.BULK
+                )
             if res.is_ok():
                 device.ext_light = res.data.arr
-        devices.setdefault(device.id, device)
-        self._async_add_entities([light])
+
+        pending = [device for device in new_devices.values() if not device.ext_light]
+        results = await asyncio.gather(
+            *(_fetch_lights(device) for device in pending), return_exceptions=True
+        )
+        # 单个设备查询失败不影响同批次的其他设备
+        for device, result in zip(pending, results, strict=True):
+            if isinstance(result, Exception):
+                _LOGGER.warning(
+                    "Failed to fetch the lights of new device %s: %r", device.id, result
+                )
+
+        lights = []
+        for device in new_devices.values():
+            if device.id in devices_dict:
+                # 查询期间已由其他批次创建
+                continue
+            if not device.ext_light:
+                _LOGGER.warning("No light found for new device %s, skipped", device.id)
+                continue
+            devices_dict[device.id] = self.interner.intern_device(device)
+            self._index_device(device)
+            self.heartbeats.seen(device.id)
+            lights.extend(self._new_entities(device, device.ext_light))
+        # 新设备带来的房间数据也会更新已有设备
+        changed: dict[str, BweeLight] = {}
+        self._changed_rooms(changed)
+        for entitie in changed.values():
+            if entitie not in lights:
+                self.write_state(entitie)
+        # 一次性注册整批实体
+        if lights:
+            self._async_add_entities(lights)
 
     async def remove_light_entitie(self, device_id: str) -> None:
         """Remove light entitie."""
-        light = self._light_entitie_dict.pop(device_id)
+        devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
+        device = devices.pop(device_id, None)
+        if device is None:
+            return
+        self._unindex_device(device)
+        self.heartbeats.forget(device_id)
+        self._stale.discard(device_id)
+        for item in device.ext_light or ():
+            await self._remove_entitie(item.id)
+
+    async def _remove_entitie(self, light_id: str) -> None:
+        """Remove the entity of one light channel."""
+        self.outbox.discard(light_id)
+        self.adaptive.disable((light_id,))
+        self.transition_engine.stop(light_id)
+        light = self._light_entitie_dict.pop(light_id, None)
         if light:
-            devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
-            devices.pop(device_id)
+            self.state_writes.forget(light.unique_id)
             await light.async_remove()
-    
+
     async def clear_light_entitie(self) -> None:
         """Remove light entitie."""
         devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
@@ -329,50 +821,362 @@ class DeviceManager:
         for device_id in device_ids:
             await self.remove_light_entitie(device_id)
 
+    @profiled
     async def on_device_add(self, data: list[Device]):
         """设备新增时触发."""
-        for device in data:
-            await self.create_light_entitie(device)
+        await self.create_light_entities(data)
 
+    @profiled
     async def on_device_remove(self, data: list[Resource]):
         """设备删除时触发."""
         for service in data:
+            RESOURCE_CACHE.invalidate_device(service.id)
             await self.remove_light_entitie(service.id)
 
+    @profiled
     async def on_device_update(self, data: list[DeviceUpdatePayload]):
         """设备更新时触发."""
+        devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
+        new_entities: list[BweeLight] = []
+        changed: dict[str, BweeLight] = {}  # 待写入的实体，按灯ID去重
         for item in data:
-            entitie = self._light_entitie_dict.get(item.id)
-            devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
             device = devices.get(item.id)
-            if entitie and device:
-                if "name" in item.value:
-                    device.name = item.value.get("name")
-                await entitie.async_write_ha_state()
+            if device is not None:
+                self._probe_backoff = 1
+                self._mark_seen(device)
+                value = dict(item.value or {})
+                # 通道列表和房间不能整体替换，分别合并
+                raw_lights = value.pop("ext_light", None)
+                raw_room = value.pop("ext_room", None)
+                device_changed = bool(DEVICE_PATCHER.apply(device, value))
+                if isinstance(raw_room, dict) and self._patch_room(device, raw_room):
+                    device_changed = True
+                if device_changed:
+                    # 设备名称、在线状态等属性由所有通道共享
+                    self._changed_channels(device, changed)
+                if raw_lights:
+                    await self._patch_lights(
+                        device,
+                        dict_to_bean(raw_lights, list[Light]),
+                        new_entities,
+                        changed,
+                    )
+            if item.value and "ext_light" in item.value:
+                # 通道列表变化后缓存的灯列表可能已不完整
+                RESOURCE_CACHE.invalidate_device(item.id)
+        self._changed_rooms(changed)
+        for entitie in changed.values():
+            # 新通道的实体由 add_entities 写入
+            if entitie not in new_entities:
+                self.write_state(entitie)
+        if new_entities:
+            self._async_add_entities(new_entities)
 
+    @profiled
     async def on_light_update(self, data: list[LightUpdatePayload]):
         """灯光更新时触发."""
+        lights: dict[str, Light] = self._hass.data[DOMAIN]["lights"]
         for item in data:
-            entitie = self._light_entitie_dict.get(item.device_id)
-            devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
-            device = devices.get(item.device_id)
-            if entitie and device and device.ext_light[0].id == item.id:
-                if item.value.brightness is not None:
-                    device.ext_light[0].brightness = item.value.brightness
-                if item.value.color_cw is not None:
-                    device.ext_light[0].color_cw = item.value.color_cw
-                if item.value.color_arr is not None:
-                    device.ext_light[0].color_arr = item.value.color_arr
-                if item.value.color_x is not None:
-                    device.ext_light[0].color_x = item.value.color_x
-                if item.value.color_y is not None:
-                    device.ext_light[0].color_y = item.value.color_y
-                if item.value.on is not None:
-                    device.ext_light[0].on = item.value.on
-                if item.value.color_mode is not None:
-                    device.ext_light[0].color_mode = item.value.color_mode
-                await entitie.async_write_ha_state()
+            # 按灯ID直接定位，多通道设备的每一路都能收到更新
+            entitie = self._light_entitie_dict.get(item.id)
+            light = lights.get(item.id)
+            if entitie and light and item.value:
+                self._mark_seen_id(self._light_device.get(item.id))
+                if not (
+                    self.command_tracker.is_pending(item.id)
+                    or self.transition_engine.is_active(item.id)
+                ):
+                    # 厂商 App 或墙面开关的调整，暂停自适应照明
+                    self.adaptive.on_light_update(item.id, light, item.value)
+                self.command_tracker.confirm(item.id, item.value)
+                # 与乐观更新一致的回显不再写入状态
+                if LIGHT_PATCHER.apply(light, item.value):
+                    self.write_state(entitie)
+            RESOURCE_CACHE.patch_light(item.device_id, item.id, item.value)
+
+    def is_stale(self, device_id: str) -> bool:
+        """Return True if the device went silent and did not answer a probe."""
+        return device_id in self._stale
+
+    def _mark_seen_id(self, device_id: str | None) -> None:
+        devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
+        device = devices.get(device_id)
+        if device is not None:
+            self._probe_backoff = 1
+            self._mark_seen(device)
+
+    def _mark_seen(self, device: Device) -> None:
+        """Push back the device's deadline, bring it back if it was stale."""
+        self.heartbeats.seen(device.id)
+        if device.id in self._stale:
+            self._stale.discard(device.id)
+            for entitie in self._device_entities(device):
+                self.write_state(entitie)
+
+    def on_devices_silent(self, device_ids: list[str]) -> None:
+        """Probe a batch of devices that sent nothing for a while."""
+        task = asyncio.get_running_loop().create_task(self._async_probe(device_ids))
+        self._probes.add(task)
+        task.add_done_callback(self._probes.discard)
+
+    async def _async_probe(self, device_ids: list[str]) -> None:
+        """Poll silent devices, mark the ones without an answer unavailable."""
+        devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
+        device_ids = [device_id for device_id in device_ids if device_id in devices]
+        polled: dict[str, Device] = {}
+        bulk = len(device_ids) > HEARTBEAT_PROBE_BULK
+        if bulk:
+            # 大批量超时（如启动后一直无消息）时重新拉取整个列表
+            res = await get_all_devices(SearchForm(cat1_id=2))
+            if res.is_ok():
+                polled = {device.id: device for device in res.data.arr}
+        else:
+            results = await asyncio.gather(
+                *(
+                    device_by_uuid(device_id, priority=RequestPriority.BULK)
+                    for device_id in device_ids
+                )
+            )
+            for device_id, res in zip(device_ids, results, strict=True):
+                if res.is_ok() and res.data and res.data.arr:
+                    polled[device_id] = res.data.arr[0]
+
+        newly_stale = 0
+        for device_id in device_ids:
+            device = devices.get(device_id)
+            if device is None:
+                # 探测期间已被删除
+                continue
+            fresh = polled.get(device_id)
+            if fresh is not None:
+                online_changed = DEVICE_PATCHER.apply(device, {"online": fresh.online})
+                self._mark_seen(device)
+                if not online_changed:
+                    continue
+            else:
+                # 下一个周期再探测，收到消息时恢复
+                self.heartbeats.seen(device_id)
+                if device_id in self._stale:
+                    continue
+                self._stale.add(device_id)
+                newly_stale += 1
+            for entitie in self._device_entities(device):
+                self.write_state(entitie)
+        if newly_stale:
+            _LOGGER.warning("%s silent devices did not answer, unavailable", newly_stale)
+        if bulk and polled:
+            # 整表拉取成功视为全站的心跳；站点一直安静时逐次推迟下次探测
+            self._probe_backoff = min(self._probe_backoff * 2, HEARTBEAT_PROBE_BACKOFF)
+            self.heartbeats.seen_all(
+                [device_id for device_id in devices if device_id in polled],
+                self.heartbeats.timeout * self._probe_backoff,
+            )
+
+    @profiled
+    def on_command_rollback(self, pending: PendingCommand) -> None:
+        """乐观更新超时回滚时触发."""
+        entitie = self._light_entitie_dict.get(pending.light.id)
+        if entitie:
+            self.write_state(entitie, immediate=True)
+
+    def queue_command(self, device_id: str, light_id: str, form: ControlForm) -> None:
+        """Hold a command until the gateway is reachable again."""
+        self.outbox.put(device_id, light_id, form)
+        if self._outbox_timer is None:
+            self._outbox_timer = asyncio.get_running_loop().call_later(
+                OUTBOX_RETRY_INTERVAL, self.flush_outbox
+            )
+
+    def flush_outbox(self) -> None:
+        """Replay the queued commands: on reconnect, retry or a new command."""
+        if self._outbox_timer:
+            self._outbox_timer.cancel()
+            self._outbox_timer = None
+        if self._outbox_flush and not self._outbox_flush.done():
+            return
+        if self.outbox:
+            self._outbox_flush = asyncio.get_running_loop().create_task(
+                self._async_flush_outbox()
+            )
+
+    def probe_outbox(self) -> None:
+        """Replay now, unless a replay failed less than a moment ago."""
+        if time.monotonic() - self._outbox_failed_at >= OUTBOX_PROBE_INTERVAL:
+            self.flush_outbox()
+
+    async def _async_flush_outbox(self) -> None:
+        """Send the first command; if the gateway answers, send the rest at once.
+
+        Commands queued during the replay are sent right after it, as long
+        as the gateway keeps answering.
+        """
+        while commands := self.outbox.drain():
+            first, rest = commands[0], commands[1:]
+            if await self._replay(first):
+                results = await asyncio.gather(*(self._replay(c) for c in rest))
+                failed = [c for c, ok in zip(rest, results, strict=True) if not ok]
+            else:
+                failed = commands
+            self.outbox.requeue(failed)
+            if len(failed) < len(commands):
+                _LOGGER.info(
+                    "Replayed %s queued commands", len(commands) - len(failed)
+                )
+            if failed:
+                self._outbox_failed_at = time.monotonic()
+                break
+        if self.outbox and self._outbox_timer is None:
+            self._outbox_timer = asyncio.get_running_loop().call_later(
+                OUTBOX_RETRY_INTERVAL, self.flush_outbox
+            )
+
+    async def _replay(self, command: QueuedCommand) -> bool:
+        """Send one queued command, False if the gateway is still unreachable."""
+        res = await self.control(command.device_id, command.light_id, command.form)
+        if res.is_ok():
+            self.outbox.replayed += 1
+            self.command_tracker.arm(command.light_id)
+            return True
+        if res.is_transport_error():
+            return False
+        self.outbox.drop(command, f"rejected: {res.msg}")
+        return True
+
+    def on_command_dropped(self, command: QueuedCommand, _: str) -> None:
+        """A queued command was given up, show the state the light really has."""
+        if self.command_tracker.rollback(command.light_id):
+            entitie = self._light_entitie_dict.get(command.light_id)
+            if entitie:
+                self.write_state(entitie, immediate=True)
+
+    def write_state(self, entitie: BweeLight, immediate: bool = False) -> None:
+        """Write an entity's state, rate-capped per entity.
+
+        Gateway pushes go through the cap, the last one is always written.
+        User-initiated changes pass ``immediate`` and show up right away.
+        """
+        if immediate:
+            self.state_writes.write_now(entitie.unique_id, entitie.async_write_ha_state)
+        else:
+            self.state_writes.write(entitie.unique_id, entitie.async_write_ha_state)
+
+    async def control(
+        self,
+        device_id: str,
+        light_id: str,
+        form: ControlForm,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> Result:
+        """Control one light channel."""
+        if self.mqtt_commands and await self.mqtt_commands.send(
+            device_id, light_id, form
+        ):
+            return Result(code=0, msg="mqtt")
+        devices: dict[str, Device] = self._hass.data[DOMAIN]["devices"]
+        device = devices.get(device_id)
+        if device and len(device.ext_light or ()) > 1:
+            # 多通道设备按灯控制，单通道设备保持按设备控制
+            return await light_control(light_id, form, priority)
+        return await device_control(device_id, form, priority)
+
+    @profiled
+    async def send_frames(
+        self,
+        batch: FrameBatch,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> None:
+        """Send one tick of transition or adaptive lighting frames."""
+        await asyncio.gather(
+            *(
+                self.control(self._light_device[light_id], light_id, form, priority)
+                for form, light_ids in batch
+                for light_id in light_ids
+                if light_id in self._light_device
+            )
+        )
+
+    @staticmethod
+    def transition_budget() -> int:
+        """Frames per tick that fit in the transition share of the rate limit."""
+        limiter = API.rate_limiter
+        if not limiter.enabled:
+            return TRANSITION_FRAME_BUDGET
+        return max(
+            1, int(limiter.rate * TRANSITION_FRAME_INTERVAL * TRANSITION_RATE_SHARE)
+        )
+
+    def _light_ids(self, entity_ids: Iterable[str] | None) -> list[str]:
+        """Light IDs of the given entities, or of every entity."""
+        if entity_ids is None:
+            return list(self._light_entitie_dict)
+        wanted = set(entity_ids)
+        return [
+            light_id
+            for light_id, entitie in self._light_entitie_dict.items()
+            if entitie.entity_id in wanted
+        ]
+
+    def enable_adaptive(
+        self, entity_ids: Iterable[str] | None, profile: AdaptiveProfile
+    ) -> int:
+        """Enroll color temperature lights in adaptive lighting."""
+        light_ids = [
+            light_id
+            for light_id in self._light_ids(entity_ids)
+            if ColorMode.COLOR_TEMP
+            in self._light_entitie_dict[light_id].supported_color_modes
+        ]
+        self.adaptive.enable(light_ids, profile)
+        return len(light_ids)
+
+    def disable_adaptive(self, entity_ids: Iterable[str] | None) -> None:
+        """Stop adaptive lighting, the lights keep their current state."""
+        self.adaptive.disable(self._light_ids(entity_ids))
+
+    def diagnostics(self) -> dict:
+        """Runtime counters for diagnostics."""
+        return {
+            "devices": len(self._hass.data[DOMAIN]["devices"]),
+            "entities": len(self._light_entitie_dict),
+            "commands": self.command_tracker.as_dict(),
+            "transitions": self.transition_engine.as_dict(),
+            "adaptive": self.adaptive.as_dict(),
+            "rate_limiter": API.rate_limiter.as_dict(),
+            "api": API.latency_as_dict(),
+            "mqtt": self._mqtt_service.as_dict(),
+            "interning": self.interner.as_dict(),
+            "mqtt_commands": self.mqtt_commands.as_dict() if self.mqtt_commands else None,
+            "outbox": self.outbox.as_dict(),
+            "cache": RESOURCE_CACHE.as_dict(),
+            "state_writes": self.state_writes.as_dict(),
+            "early_events_replayed": self.early_events_replayed,
+            "last_reconcile": self.last_reconcile,
+            "heartbeats": {**self.heartbeats.as_dict(), "stale": len(self._stale)},
+            "unknown_update_fields": {
+                "device": dict(DEVICE_PATCHER.unknown),
+                "light": dict(LIGHT_PATCHER.unknown),
+            },
+        }
 
     async def close(self):
+        if self._outbox_timer:
+            self._outbox_timer.cancel()
+            self._outbox_timer = None
+        if self._outbox_flush:
+            self._outbox_flush.cancel()
+        if self._refresh_task:
+            self._refresh_task.cancel()
+        self.outbox.clear()
+        self.command_tracker.clear()
+        self.state_writes.close()
+        self.heartbeats.close()
+        for task in self._probes:
+            task.cancel()
+        if self.mqtt_commands:
+            self.mqtt_commands.close()
+        await self.transition_engine.close()
+        await self.adaptive.close()
         await self.clear_light_entitie()
+        self.interner.clear()
+        RESOURCE_CACHE.clear()
         self._mqtt_service.disconnect()
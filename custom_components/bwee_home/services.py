@@ -0,0 +1,169 @@
+"""Services for the BWEE home integration."""
+
+from __future__ import annotations
+
+from datetime import time as dt_time
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID, ENTITY_MATCH_ALL
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.service import async_extract_entity_ids
+
+from .bweetech.const import (
+    ADAPTIVE_MAX_BRIGHTNESS,
+    ADAPTIVE_MIN_BRIGHTNESS,
+    ADAPTIVE_SUNRISE,
+    ADAPTIVE_SUNSET,
+    MAX_KELVIN,
+    MIN_KELVIN,
+)
+from .const import DOMAIN, PROFILE_DEFAULT_DURATION, PROFILE_MAX_DURATION
+
+if TYPE_CHECKING:
+    from .light import DeviceManager
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_PROFILE = "profile"
+ATTR_DURATION = "duration"
+ATTR_ALLOCATIONS = "allocations"
+
+SERVICE_ADAPTIVE_ENABLE = "enable_adaptive_lighting"
+SERVICE_ADAPTIVE_DISABLE = "disable_adaptive_lighting"
+ATTR_MIN_KELVIN = "min_color_temp_kelvin"
+ATTR_MAX_KELVIN = "max_color_temp_kelvin"
+ATTR_MIN_BRIGHTNESS = "min_brightness_pct"
+ATTR_MAX_BRIGHTNESS = "max_brightness_pct"
+ATTR_SUNRISE = "sunrise"
+ATTR_SUNSET = "sunset"
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional(ATTR_ALLOCATIONS, default=True): cv.boolean,
+    }
+)
+
+
+_KELVIN = vol.All(vol.Coerce(int), vol.Range(min=MIN_KELVIN, max=MAX_KELVIN))
+_PERCENT = vol.All(vol.Coerce(int), vol.Range(min=1, max=100))
+
+
+def _time_of(hours: float) -> dt_time:
+    minutes = round(hours * 60)
+    return dt_time(minutes // 60 % 24, minutes % 60)
+
+
+# 默认值取自常量，注册服务时不加载自适应照明模块
+ADAPTIVE_ENABLE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_MIN_KELVIN, default=MIN_KELVIN): _KELVIN,
+        vol.Optional(ATTR_MAX_KELVIN, default=MAX_KELVIN): _KELVIN,
+        vol.Optional(ATTR_MIN_BRIGHTNESS, default=ADAPTIVE_MIN_BRIGHTNESS): _PERCENT,
+        vol.Optional(ATTR_MAX_BRIGHTNESS, default=ADAPTIVE_MAX_BRIGHTNESS): _PERCENT,
+        vol.Optional(ATTR_SUNRISE, default=_time_of(ADAPTIVE_SUNRISE)): cv.time,
+        vol.Optional(ATTR_SUNSET, default=_time_of(ADAPTIVE_SUNSET)): cv.time,
+    }
+)
+
+ADAPTIVE_DISABLE_SCHEMA = cv.make_entity_service_schema({})
+
+
+def _hours(value: dt_time) -> float:
+    return value.hour + value.minute / 60 + value.second / 3600
+
+
+def _device_manager(hass: HomeAssistant) -> DeviceManager:
+    dm = hass.data.get(DOMAIN, {}).get("dm")
+    if dm is None:
+        raise HomeAssistantError("No BWEE gateway is set up")
+    return dm
+
+
+async def _target_entity_ids(hass: HomeAssistant, call: ServiceCall) -> set[str] | None:
+    """Entity IDs of the call's target, None for every light."""
+    if call.data.get(ATTR_ENTITY_ID) == ENTITY_MATCH_ALL:
+        return None
+    return await async_extract_entity_ids(hass, call)
+
+
+def _write_report(path: str, report: dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the integration for a while, then write the stats to a file."""
+        from .bweetech.profiler import PROFILER  # noqa: PLC0415  很少使用，按需加载
+
+        if PROFILER.active:
+            raise HomeAssistantError("Profiling is already running")
+        duration = call.data[ATTR_DURATION]
+        path = hass.config.path(f"{DOMAIN}_profile_{int(time.time())}.json")
+        PROFILER.start(allocations=call.data[ATTR_ALLOCATIONS])
+        _LOGGER.warning("Profiling %s for %.0f seconds", DOMAIN, duration)
+
+        async def async_finish(_: Any) -> None:
+            report = PROFILER.stop()
+            await hass.async_add_executor_job(_write_report, path, report)
+            _LOGGER.warning("Profile of %s written to %s", DOMAIN, path)
+
+        # 到时自动关闭
+        async_call_later(hass, duration, async_finish)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
+
+    async def async_enable_adaptive(call: ServiceCall) -> None:
+        """Let lights follow a daily brightness and color temperature curve."""
+        from .bweetech.adaptive import AdaptiveProfile  # noqa: PLC0415
+
+        data = call.data
+        if data[ATTR_MIN_KELVIN] > data[ATTR_MAX_KELVIN]:
+            raise HomeAssistantError("Minimum color temperature exceeds maximum")
+        if data[ATTR_MIN_BRIGHTNESS] > data[ATTR_MAX_BRIGHTNESS]:
+            raise HomeAssistantError("Minimum brightness exceeds maximum")
+        profile = AdaptiveProfile(
+            min_kelvin=data[ATTR_MIN_KELVIN],
+            max_kelvin=data[ATTR_MAX_KELVIN],
+            min_brightness=data[ATTR_MIN_BRIGHTNESS],
+            max_brightness=data[ATTR_MAX_BRIGHTNESS],
+            sunrise=_hours(data[ATTR_SUNRISE]),
+            sunset=_hours(data[ATTR_SUNSET]),
+        )
+        dm = _device_manager(hass)
+        entity_ids = await _target_entity_ids(hass, call)
+        count = dm.enable_adaptive(entity_ids, profile)
+        _LOGGER.info("Adaptive lighting enabled for %s lights", count)
+
+    async def async_disable_adaptive(call: ServiceCall) -> None:
+        """Stop adaptive lighting, the lights keep their current state."""
+        dm = _device_manager(hass)
+        dm.disable_adaptive(await _target_entity_ids(hass, call))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ADAPTIVE_ENABLE,
+        async_enable_adaptive,
+        schema=ADAPTIVE_ENABLE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ADAPTIVE_DISABLE,
+        async_disable_adaptive,
+        schema=ADAPTIVE_DISABLE_SCHEMA,
+    )
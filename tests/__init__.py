@@ -0,0 +1 @@
+"""Tests for the BWEE home integration."""
@@ -0,0 +1,84 @@
+"""Tests for the color conversions."""
+
+import pytest
+
+from custom_components.bwee_home.bweetech.const import MAX_KELVIN, MIN_KELVIN
+from custom_components.bwee_home.bweetech.models import ColorXY
+from custom_components.bwee_home.bweetech.utils.color_utils import (
+    DEFAULT_GAMUT,
+    WHITE_POINT,
+    XY_SCALE,
+    clamp_kelvin,
+    clamp_to_gamut,
+    color_arr_to_rgb_list,
+    hs_to_xy16,
+    rgb_list_to_color_arr,
+    rgb_to_xy16,
+    xy16_to_rgb,
+    xy16_to_xy,
+    xy_to_xy16,
+)
+
+
+@pytest.mark.parametrize(
+    "rgb",
+    [
+        (255, 0, 0),
+        (0, 255, 0),
+        (0, 0, 255),
+        (255, 255, 255),
+        (255, 128, 0),
+        (0, 200, 255),
+        (128, 0, 255),
+    ],
+)
+def test_rgb_round_trip(rgb):
+    # 只保留色度，回到 RGB 后亮度归一到最大分量 255
+    result = xy16_to_rgb(*rgb_to_xy16(*rgb))
+    assert max(result) == 255
+    for expected, actual in zip(rgb, result, strict=True):
+        assert abs(expected - actual) <= 3
+
+
+def test_black_maps_to_the_white_point():
+    assert rgb_to_xy16(0, 0, 0) == xy_to_xy16(*WHITE_POINT)
+
+
+def test_xy16_round_trip():
+    for x, y in [(0.0, 0.0), (0.3127, 0.329), (0.7006, 0.2993), (1.0, 1.0)]:
+        back = xy16_to_xy(*xy_to_xy16(x, y))
+        assert back == pytest.approx((x, y), abs=1 / XY_SCALE)
+
+
+def test_xy16_is_clamped_to_its_range():
+    assert xy_to_xy16(-0.1, 1.5) == (0, XY_SCALE)
+    assert xy16_to_xy(None, None) == (0.0, 0.0)
+
+
+def test_clamp_to_gamut():
+    red = DEFAULT_GAMUT[0]
+    assert clamp_to_gamut(*WHITE_POINT) == WHITE_POINT
+    # 色域外的点落到最近的边上
+    x, y = clamp_to_gamut(red[0] + 0.1, red[1])
+    assert (x, y) == pytest.approx(red, abs=0.02)
+    assert clamp_to_gamut(x, y) == (x, y)
+
+
+def test_hs_matches_rgb():
+    assert hs_to_xy16(0, 100) == rgb_to_xy16(255, 0, 0)
+    assert hs_to_xy16(240, 100) == rgb_to_xy16(0, 0, 255)
+    assert hs_to_xy16(0, 0) == rgb_to_xy16(255, 255, 255)
+
+
+def test_segment_colors_round_trip():
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+    color_arr = rgb_list_to_color_arr(colors)
+    assert all(isinstance(color, ColorXY) for color in color_arr)
+    for expected, actual in zip(colors, color_arr_to_rgb_list(color_arr), strict=True):
+        assert max(abs(a - b) for a, b in zip(expected, actual, strict=True)) <= 3
+
+
+def test_clamp_kelvin():
+    assert clamp_kelvin(1000) == MIN_KELVIN
+    assert clamp_kelvin(4000) == 4000
+    assert clamp_kelvin(9000.7) == MAX_KELVIN
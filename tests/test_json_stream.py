@@ -0,0 +1,75 @@
+"""Tests for the streaming JSON array decoder."""
+
+import json
+
+import pytest
+
+from custom_components.bwee_home.bweetech.utils.json_stream import ArrayStreamDecoder
+
+DOCUMENT = {
+    "code": 0,
+    "msg": "ok",
+    "data": {
+        "len": 4,
+        "arr": [
+            {"id": "a", "name": "客厅灯", "tags": ["x", "]", "{"]},
+            {"id": "b", "nested": {"arr": [1, 2]}, "text": "quote \" and \\"},
+            12345,
+            -0.5e3,
+        ],
+    },
+}
+
+
+def _decode(raw: bytes, size: int):
+    decoder = ArrayStreamDecoder()
+    elements = []
+    for start in range(0, len(raw), size):
+        elements.extend(decoder.feed(raw[start : start + size]))
+    envelope, tail = decoder.close()
+    return envelope, elements + tail, decoder
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 20])
+def test_chunk_boundaries(size):
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    envelope, elements, decoder = _decode(raw, size)
+    assert elements == DOCUMENT["data"]["arr"]
+    assert decoder.count == 4
+    assert envelope == {**DOCUMENT, "data": {"len": 4, "arr": []}}
+
+
+def test_number_split_at_the_end_of_a_chunk():
+    decoder = ArrayStreamDecoder()
+    assert list(decoder.feed(b'{"data": {"arr": [12')) == []
+    assert list(decoder.feed(b"34, 5")) == [1234]
+    assert list(decoder.feed(b"6]}}")) == [56]
+    assert decoder.close() == ({"data": {"arr": []}}, [])
+
+
+def test_number_split_inside_its_fraction_or_exponent():
+    decoder = ArrayStreamDecoder()
+    assert list(decoder.feed(b'{"data": {"arr": [1.')) == []
+    assert list(decoder.feed(b"5e")) == []
+    assert list(decoder.feed(b"2, -0")) == [150.0]
+    assert list(decoder.feed(b".25]}}")) == [-0.25]
+
+
+def test_keys_named_like_the_path_elsewhere_are_ignored():
+    raw = b'{"arr": [9], "data": {"other": {"arr": [8]}, "arr": [1, 2]}}'
+    envelope, elements, _ = _decode(raw, 5)
+    assert elements == [1, 2]
+    assert envelope == {"arr": [9], "data": {"other": {"arr": [8]}, "arr": []}}
+
+
+def test_document_without_the_array():
+    envelope, elements, _ = _decode(b'{"code": 1, "msg": "fail", "data": null}', 4)
+    assert elements == []
+    assert envelope == {"code": 1, "msg": "fail", "data": None}
+
+
+def test_truncated_array_raises():
+    decoder = ArrayStreamDecoder()
+    list(decoder.feed(b'{"data": {"arr": [{"id": "a"}, {"id": '))
+    with pytest.raises(ValueError):
+        decoder.close()
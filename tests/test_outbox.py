@@ -0,0 +1,135 @@
+"""Tests for the offline command outbox."""
+
+from custom_components.bwee_home.bweetech import outbox as outbox_module
+from custom_components.bwee_home.bweetech.forms import ControlForm
+from custom_components.bwee_home.bweetech.models import ColorXY
+from custom_components.bwee_home.bweetech.outbox import CommandOutbox, merge_forms
+
+
+class FakeClock:
+    """Stands in for time.monotonic in the outbox module."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(outbox_module.time, "monotonic", clock)
+    return clock
+
+
+def test_merge_newer_fields_win():
+    merged = merge_forms(
+        ControlForm(on=1, brightness=10, name="a"), ControlForm(brightness=80)
+    )
+    assert merged == ControlForm(on=1, brightness=80, name="a")
+
+
+def test_merge_off_replaces_everything():
+    merged = merge_forms(
+        ControlForm(on=1, brightness=80, color_cw=3000), ControlForm(on=0)
+    )
+    assert merged == ControlForm(on=0)
+
+
+def test_merge_color_temperature_clears_xy():
+    older = ControlForm(
+        brightness=50, color_x=100, color_y=200, color_arr=[ColorXY(x=1, y=2)]
+    )
+    merged = merge_forms(older, ControlForm(color_cw=4000))
+    assert merged == ControlForm(brightness=50, color_cw=4000)
+
+
+def test_merge_xy_clears_color_temperature():
+    merged = merge_forms(
+        ControlForm(brightness=50, color_cw=4000), ControlForm(color_x=1, color_y=2)
+    )
+    assert merged == ControlForm(brightness=50, color_x=1, color_y=2)
+
+
+def test_merge_does_not_touch_inputs():
+    older = ControlForm(on=1, brightness=10)
+    newer = ControlForm(brightness=80)
+    merge_forms(older, newer)
+    assert older == ControlForm(on=1, brightness=10)
+    assert newer == ControlForm(brightness=80)
+
+
+def test_put_merges_per_light():
+    outbox = CommandOutbox()
+    outbox.put("d1", "l1", ControlForm(on=1))
+    outbox.put("d1", "l1", ControlForm(brightness=40))
+    outbox.put("d2", "l2", ControlForm(on=0))
+    commands = outbox.drain()
+    assert [command.light_id for command in commands] == ["l1", "l2"]
+    assert commands[0].form == ControlForm(on=1, brightness=40)
+    assert commands[0].merged == 1
+    assert len(outbox) == 0
+
+
+def test_full_outbox_drops_oldest_light():
+    dropped = []
+    outbox = CommandOutbox(
+        on_drop=lambda command, reason: dropped.append((command.light_id, reason)),
+        maxsize=2,
+    )
+    for light_id in ("l1", "l2", "l3"):
+        outbox.put("d", light_id, ControlForm(on=1))
+    assert dropped == [("l1", "full")]
+    assert [command.light_id for command in outbox.drain()] == ["l2", "l3"]
+
+
+def test_drain_drops_expired_commands(monkeypatch):
+    clock = _clock(monkeypatch)
+    dropped = []
+    outbox = CommandOutbox(
+        on_drop=lambda command, reason: dropped.append((command.light_id, reason)),
+        ttl=60,
+    )
+    outbox.put("d", "old", ControlForm(on=1))
+    clock.now += 30
+    outbox.put("d", "new", ControlForm(on=1))
+    clock.now += 30
+    assert [command.light_id for command in outbox.drain()] == ["new"]
+    assert dropped == [("old", "expired")]
+    assert outbox.dropped == {"expired": 1}
+
+
+def test_merging_keeps_the_first_queue_time(monkeypatch):
+    clock = _clock(monkeypatch)
+    outbox = CommandOutbox(ttl=60)
+    outbox.put("d", "l1", ControlForm(on=1))
+    clock.now += 50
+    outbox.put("d", "l1", ControlForm(brightness=20))
+    clock.now += 10
+    assert outbox.drain() == []
+
+
+def test_requeue_keeps_order_ahead_of_newer_commands():
+    outbox = CommandOutbox()
+    outbox.put("d", "l1", ControlForm(on=1))
+    outbox.put("d", "l2", ControlForm(on=1))
+    failed = outbox.drain()
+    # 重发期间新到的指令
+    outbox.put("d", "l3", ControlForm(on=1))
+    outbox.put("d", "l2", ControlForm(brightness=70))
+    outbox.requeue(failed)
+    commands = outbox.drain()
+    assert [command.light_id for command in commands] == ["l1", "l2", "l3"]
+    assert commands[1].form == ControlForm(on=1, brightness=70)
+    assert commands[1].merged == 1
+
+
+def test_requeue_keeps_age(monkeypatch):
+    clock = _clock(monkeypatch)
+    outbox = CommandOutbox(ttl=60)
+    outbox.put("d", "l1", ControlForm(on=1))
+    failed = outbox.drain()
+    clock.now += 61
+    outbox.requeue(failed)
+    assert outbox.drain() == []
+    assert outbox.dropped == {"expired": 1}
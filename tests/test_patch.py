@@ -0,0 +1,70 @@
+"""Tests for the compiled patch applier."""
+
+from custom_components.bwee_home.bweetech.models import (
+    ColorXY,
+    Device,
+    Light,
+    LightUpdateValue,
+    Room,
+)
+from custom_components.bwee_home.bweetech.patch import ModelPatcher
+
+
+def test_apply_returns_changed_fields():
+    patcher = ModelPatcher(Light)
+    light = Light(id="l1", on=1, brightness=10)
+    assert patcher.apply(light, {"on": 1, "brightness": 40}) == ["brightness"]
+    assert light == Light(id="l1", on=1, brightness=40)
+
+
+def test_apply_skips_none_values():
+    patcher = ModelPatcher(Light)
+    light = Light(id="l1", brightness=10)
+    assert patcher.apply(light, {"brightness": None}) == []
+    assert light.brightness == 10
+    assert patcher.apply(light, None) == []
+
+
+def test_apply_converts_numeric_strings():
+    patcher = ModelPatcher(Device)
+    device = Device(id="d1", online=0)
+    assert patcher.apply(device, {"online": "1"}) == ["online"]
+    assert device.online == 1
+
+
+def test_apply_skips_invalid_values():
+    patcher = ModelPatcher(Device)
+    device = Device(id="d1", online=1)
+    assert patcher.apply(device, {"online": "yes"}) == []
+    assert device.online == 1
+
+
+def test_apply_counts_unknown_keys():
+    patcher = ModelPatcher(Light)
+    light = Light(id="l1")
+    assert patcher.apply(light, {"flux": 3, "on": 1}) == ["on"]
+    assert patcher.unknown == {"flux": 1}
+    assert not patcher.accepts({"flux": 3})
+    assert patcher.accepts({"on": 1, "brightness": 2})
+
+
+def test_apply_rebuilds_nested_values():
+    patcher = ModelPatcher(Light)
+    light = Light(id="l1", color_arr=[ColorXY(x=1, y=1)])
+    changed = patcher.apply(light, {"color_arr": [{"x": 5, "y": 6}, {"x": 7, "y": 8}]})
+    assert changed == ["color_arr"]
+    assert light.color_arr == [ColorXY(x=5, y=6), ColorXY(x=7, y=8)]
+
+
+def test_apply_from_another_dataclass():
+    patcher = ModelPatcher(Light)
+    light = Light(id="l1", name="Desk", on=0, brightness=10)
+    assert patcher.apply(light, LightUpdateValue(on=1, brightness=10)) == ["on"]
+    assert light == Light(id="l1", name="Desk", on=1, brightness=10)
+
+
+def test_apply_from_same_dataclass_merges_set_fields():
+    patcher = ModelPatcher(Room)
+    room = Room(id="r1", name="Kitchen", icon="pot")
+    assert patcher.apply(room, Room(name="Dining")) == ["name"]
+    assert room == Room(id="r1", name="Dining", icon="pot")
@@ -0,0 +1,78 @@
+"""Tests for the hashed timer wheel."""
+
+import math
+
+from custom_components.bwee_home.bweetech.utils.timer_wheel import TimerWheel
+
+
+def _wheel(slots: int = 8) -> TimerWheel:
+    # 节拍 1 秒，从 t=0 开始
+    return TimerWheel(1.0, slots, now=0.0)
+
+
+def test_expires_at_the_deadline():
+    wheel = _wheel()
+    wheel.schedule("a", 2.5)
+    assert wheel.advance(2.4) == []
+    assert wheel.advance(3.0) == ["a"]
+    assert len(wheel) == 0
+
+
+def test_deadline_past_one_revolution_waits_for_its_round():
+    wheel = _wheel(slots=8)
+    # 与 t=2 落在同一个槽，但属于下一圈
+    wheel.schedule("late", 10.0)
+    wheel.schedule("soon", 2.0)
+    assert wheel.advance(2.0) == ["soon"]
+    assert wheel.advance(9.0) == []
+    assert "late" in wheel
+    assert wheel.advance(10.0) == ["late"]
+
+
+def test_wraps_around_many_times():
+    wheel = _wheel(slots=4)
+    deadlines = {f"k{index}": index * 1.5 for index in range(1, 20)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    expired = {}
+    now = 0.0
+    while now < 30:
+        now += 0.5
+        for key in wheel.advance(now):
+            expired[key] = now
+    # 不早于截止时间，最多晚一个节拍
+    assert expired == {
+        key: float(math.ceil(deadline)) for key, deadline in deadlines.items()
+    }
+
+
+def test_advance_after_a_long_pause():
+    wheel = _wheel(slots=4)
+    for index in range(10):
+        wheel.schedule(index, index + 1.0)
+    # 跨过两圈多，每个桶只检查一次
+    assert sorted(wheel.advance(11.0)) == list(range(10))
+
+
+def test_reschedule_moves_the_deadline():
+    wheel = _wheel()
+    wheel.schedule("a", 2.0)
+    wheel.schedule("a", 20.0)
+    assert wheel.advance(10.0) == []
+    assert wheel.advance(20.0) == ["a"]
+
+
+def test_deadline_already_processed_fires_on_the_next_tick():
+    wheel = _wheel()
+    wheel.advance(5.0)
+    wheel.schedule("a", 3.0)
+    assert wheel.advance(6.0) == ["a"]
+
+
+def test_cancel():
+    wheel = _wheel()
+    wheel.schedule("a", 2.0)
+    wheel.cancel("a")
+    wheel.cancel("missing")
+    assert wheel.advance(5.0) == []
+    assert "a" not in wheel